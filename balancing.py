@@ -0,0 +1,206 @@
+"""
+Class-balancing strategies for the TF-IDF training matrix.
+
+``train_and_evaluate()`` used to always run SMOTE, which synthesizes rows by
+nearest-neighbour search inside every class and multiplies the size of the
+training matrix. The strategies here all return ``(X, y, sample_weight)`` so
+they plug into the same ``LinearSVC.fit`` call:
+
+``class_weight``
+    No resampling. Every row is weighted ``n_rows / (n_classes * class_count)``,
+    the same weighting as ``class_weight='balanced'``.
+``oversample``
+    Random oversampling up to the size of the largest class. The duplicates are
+    not materialized: each row's weight is the number of times it was drawn,
+    which is equivalent for liblinear and leaves the sparse matrix untouched.
+``smote``
+    ``imblearn`` SMOTE with ``k_neighbors`` set from the smallest class (the
+    original behaviour).
+``none``
+    Train on the data as is.
+
+``compare_strategies()`` fits each strategy on the same training rows and
+reports time, peak traced memory, and accuracy and macro-F1 on a validation
+split of the training data, and picks the fastest one whose macro-F1 is within
+a tolerance of the best. The test set is only used to score the chosen one.
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.svm import LinearSVC
+
+
+BALANCING_STRATEGIES = ('class_weight', 'oversample', 'smote', 'none')
+DEFAULT_F1_TOLERANCE = 0.01
+
+
+def _class_positions(y):
+    classes, positions, counts = np.unique(np.asarray(y), return_inverse=True, return_counts=True)
+    return classes, positions, counts
+
+
+def balanced_class_weights(y):
+    """Per-row weights ``n_rows / (n_classes * class_count)``."""
+    classes, positions, counts = _class_positions(y)
+    return (len(positions) / (len(classes) * counts))[positions]
+
+
+def oversample_weights(y, seed=42):
+    """
+    Random oversampling expressed as integer row weights.
+
+    Each class is topped up to the size of the largest class by drawing its rows
+    with replacement; a row's weight is 1 plus the number of times it was drawn.
+    """
+    rng = np.random.default_rng(seed)
+    classes, positions, counts = _class_positions(y)
+    weights = np.ones(len(positions))
+    order = np.argsort(positions, kind='stable')
+    starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+    missing = counts.max() - counts
+    # One draw per missing row: pick an offset inside the row's class block
+    draw_class = np.repeat(np.arange(len(classes)), missing)
+    offsets = (rng.random(len(draw_class)) * counts[draw_class]).astype(int)
+    np.add.at(weights, order[starts[draw_class] + offsets], 1.0)
+    return weights
+
+
+def smote_resample(X, y, seed=42):
+    """SMOTE with ``k_neighbors`` derived from the smallest class; a no-op below 2 rows per class."""
+    min_class_count = int(_class_positions(y)[2].min())
+    if min_class_count <= 1:
+        print("Skipping SMOTE: The smallest class has only 1 sample, not enough for resampling.")
+        return X, y
+    from imblearn.over_sampling import SMOTE
+
+    k_neighbors_dynamic = min_class_count - 1
+    print(f"Smallest class has {min_class_count} samples. Setting SMOTE k_neighbors to {k_neighbors_dynamic}.")
+    return SMOTE(random_state=seed, k_neighbors=k_neighbors_dynamic).fit_resample(X, y)
+
+
+def balance(X, y, strategy='class_weight', seed=42):
+    """
+    Apply a balancing strategy to a training matrix.
+
+    Args:
+        X (sparse matrix): TF-IDF training rows.
+        y (array-like): Their labels.
+        strategy (str): One of ``BALANCING_STRATEGIES``.
+
+    Returns:
+        tuple: ``(X, y, sample_weight)``; ``sample_weight`` is None when rows are unweighted.
+
+    Raises:
+        ValueError: For an unknown strategy.
+    """
+    if strategy == 'class_weight':
+        return X, y, balanced_class_weights(y)
+    if strategy == 'oversample':
+        return X, y, oversample_weights(y, seed)
+    if strategy == 'smote':
+        X_resampled, y_resampled = smote_resample(X, y, seed)
+        return X_resampled, y_resampled, None
+    if strategy == 'none':
+        return X, y, None
+    raise ValueError(f"Unknown balancing strategy {strategy!r}; expected one of {', '.join(BALANCING_STRATEGIES)}")
+
+
+def fit_balanced(X, y, strategy='class_weight', seed=42):
+    """
+    Balance and fit a LinearSVC.
+
+    Returns:
+        tuple: (model, stats) where stats has the balancing and fit seconds and the training row count.
+    """
+    start = time.perf_counter()
+    X_balanced, y_balanced, sample_weight = balance(X, y, strategy, seed)
+    balanced_at = time.perf_counter()
+    model = LinearSVC(random_state=seed).fit(X_balanced, y_balanced, sample_weight=sample_weight)
+    stats = {
+        'strategy': strategy,
+        'train_rows': int(X_balanced.shape[0]),
+        'balance_seconds': round(balanced_at - start, 3),
+        'fit_seconds': round(time.perf_counter() - balanced_at, 3),
+    }
+    return model, stats
+
+
+def measure_strategy(strategy, X_train, y_train, X_test, y_test, seed=42):
+    """
+    Fit one strategy and measure it.
+
+    Peak memory is what ``tracemalloc`` sees (NumPy/SciPy buffers and Python
+    objects); liblinear's own allocations are not included.
+    """
+    tracemalloc.start()
+    try:
+        model, stats = fit_balanced(X_train, y_train, strategy, seed)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    y_pred = model.predict(X_test)
+    stats.update({
+        'seconds': round(stats['balance_seconds'] + stats['fit_seconds'], 3),
+        'peak_mb': round(peak / 2 ** 20, 1),
+        'accuracy': round(accuracy_score(y_test, y_pred), 4),
+        'macro_f1': round(f1_score(y_test, y_pred, average='macro', zero_division=0), 4),
+    })
+    return stats
+
+
+def compare_strategies(X_train, y_train, holdout, X_test=None, y_test=None, strategies=BALANCING_STRATEGIES,
+                       tolerance=DEFAULT_F1_TOLERANCE, seed=42):
+    """
+    Measure several strategies on a validation split of the training rows.
+
+    Every strategy is fitted on the same training rows and scored on the rows
+    selected by the boolean mask ``holdout``, so the test set plays no part in
+    the choice. When test matrices are given, only the chosen strategy is refitted
+    on all training rows and scored on them.
+
+    Returns:
+        dict: ``results`` (one entry per strategy, fastest first, validation scores),
+        ``chosen``, the fastest strategy whose validation macro-F1 is within
+        ``tolerance`` of the best, and ``test`` (the chosen strategy's test
+        accuracy and macro-F1) when test matrices are given.
+    """
+    y_train = np.asarray(y_train)
+    holdout = np.asarray(holdout, dtype=bool)
+    X_fit, y_fit = X_train[~holdout], y_train[~holdout]
+    X_val, y_val = X_train[holdout], y_train[holdout]
+
+    results = []
+    for strategy in strategies:
+        print(f"Measuring balancing strategy '{strategy}'...")
+        results.append(measure_strategy(strategy, X_fit, y_fit, X_val, y_val, seed))
+    results.sort(key=lambda r: r['seconds'])
+    best_f1 = max(r['macro_f1'] for r in results)
+    chosen = next(r['strategy'] for r in results if r['macro_f1'] >= best_f1 - tolerance)
+    comparison = {'results': results, 'best_macro_f1': best_f1, 'tolerance': tolerance, 'chosen': chosen,
+                  'validation_rows': int(holdout.sum())}
+
+    if X_test is not None:
+        model, _ = fit_balanced(X_train, y_train, chosen, seed)
+        y_pred = model.predict(X_test)
+        comparison['test'] = {
+            'strategy': chosen,
+            'accuracy': round(accuracy_score(y_test, y_pred), 4),
+            'macro_f1': round(f1_score(y_test, y_pred, average='macro', zero_division=0), 4),
+        }
+    return comparison
+
+
+def format_comparison(comparison):
+    """The comparison as a fixed-width table."""
+    lines = [f"{'strategy':<14}{'rows':>10}{'seconds':>10}{'peak MB':>10}{'val acc':>10}{'val F1':>10}"]
+    for r in comparison['results']:
+        marker = '  <- chosen' if r['strategy'] == comparison['chosen'] else ''
+        lines.append(f"{r['strategy']:<14}{r['train_rows']:>10}{r['seconds']:>10.2f}{r['peak_mb']:>10.1f}"
+                     f"{r['accuracy']:>10.4f}{r['macro_f1']:>10.4f}{marker}")
+    test = comparison.get('test')
+    if test is not None:
+        lines.append(f"Test ({test['strategy']}): accuracy {test['accuracy']:.4f}, macro-F1 {test['macro_f1']:.4f}")
+    return '\n'.join(lines)
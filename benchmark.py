@@ -0,0 +1,329 @@
+"""
+Micro-benchmarks for the prediction serving path.
+
+Usage:
+    python benchmark.py helper [--repeat N]
+    python benchmark.py batch [--repeat N]
+    python benchmark.py artifact [--repeat N]
+    python benchmark.py engine [--repeat N]
+    python benchmark.py spatial [--repeat N]
+    python benchmark.py serve [--repeat N]
+
+Benchmarks that need a model read disease_model.joblib (run medicine_rec_train.py first).
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _load_recommendation_tables():
+    def load(name):
+        return pd.read_csv(os.path.join(BASE_DIR, name))
+
+    return (load('description.csv'), load('precautions_df.csv'), load('medications.csv'),
+            load('diets.csv'), load('workout_df.csv'), load('causes.csv'), load('treatment_lookup.csv'))
+
+
+def _load_model_pipeline():
+    import joblib
+
+    return joblib.load(os.path.join(BASE_DIR, 'disease_model.joblib'))
+
+
+def _sample_symptom_texts(n):
+    """n symptom descriptions drawn (with repetition) from Diseases_Symptoms.csv."""
+    texts = pd.read_csv(os.path.join(BASE_DIR, 'Diseases_Symptoms.csv'))['Symptoms'].dropna().tolist()
+    return [texts[i % len(texts)] for i in range(n)]
+
+
+def _per_call_us(func, args_list, repeat):
+    """Mean microseconds per call of func over args_list, best of ``repeat`` rounds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args in args_list:
+            func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best / len(args_list) * 1e6
+
+
+def bench_helper(repeat=3):
+    """Compare the old per-request DataFrame scan with the precomputed recommendation index."""
+    from recommendation_index import build_recommendation_index, lookup_recommendations_scan
+
+    tables = _load_recommendation_tables()
+    diseases = [d.title() for d in tables[0]['Disease'].dropna().unique()[:100]]
+
+    start = time.perf_counter()
+    index = build_recommendation_index(*tables, diseases=diseases)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    scan_us = _per_call_us(lambda d: lookup_recommendations_scan(d, *tables), [(d,) for d in diseases], repeat)
+    index_us = _per_call_us(index.lookup, [(d,) for d in diseases], repeat)
+    return {
+        'benchmark': 'helper',
+        'diseases': len(diseases),
+        'index_build_ms': round(build_ms, 2),
+        'dataframe_scan_us_per_call': round(scan_us, 2),
+        'index_us_per_call': round(index_us, 2),
+        'speedup': round(scan_us / index_us, 1),
+    }
+
+
+def bench_batch(repeat=3):
+    """Per-text latency of predict_diseases_batch against one predict_disease_from_symptoms call per text."""
+    from main import predict_disease_from_symptoms, predict_diseases_batch
+
+    model_pipeline = _load_model_pipeline()
+    results = {'benchmark': 'batch', 'single_us_per_text': None, 'batch_us_per_text': {}}
+
+    texts = _sample_symptom_texts(1000)
+    results['single_us_per_text'] = round(
+        _per_call_us(lambda t: predict_disease_from_symptoms(t, model_pipeline), [(t,) for t in texts], repeat), 2)
+    for size in (10, 100, 1000, 10000):
+        batch = _sample_symptom_texts(size)
+        per_batch_us = _per_call_us(lambda b: predict_diseases_batch(b, model_pipeline), [(batch,)], repeat)
+        results['batch_us_per_text'][size] = round(per_batch_us / size, 2)
+    return results
+
+
+# Run in a fresh interpreter so each loader starts from the same baseline
+_LOAD_PROBE = r"""
+import json, sys, time
+import numpy as np
+import sklearn.svm, sklearn.feature_extraction.text
+
+def memory_kb():
+    fields = {}
+    with open('/proc/self/status') as f:
+        for line in f:
+            key, _, value = line.partition(':')
+            fields[key] = int(value.split()[0]) if value.strip().endswith('kB') else value
+    return fields.get('RssAnon', 0), fields.get('RssFile', 0)
+
+kind, path = sys.argv[1], sys.argv[2]
+anon0, file0 = memory_kb()
+start = time.perf_counter()
+if kind == 'joblib':
+    import joblib
+    pipeline = joblib.load(path)
+else:
+    from model_artifact import load_model_artifact, to_sklearn_pipeline
+    pipeline = to_sklearn_pipeline(load_model_artifact(path))
+load_ms = (time.perf_counter() - start) * 1000
+pipeline['model'].predict(pipeline['vectorizer'].transform(['fever headache cough']))
+anon1, file1 = memory_kb()
+print(json.dumps({'load_ms': load_ms, 'private_rss_kb': anon1 - anon0, 'shared_file_rss_kb': file1 - file0}))
+"""
+
+
+def _probe_load(kind, path):
+    output = subprocess.run([sys.executable, '-c', _LOAD_PROBE, kind, path], cwd=BASE_DIR,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def bench_artifact(repeat=3):
+    """Cold-start load time and memory of disease_model.joblib against the memory-mapped artifact."""
+    from model_artifact import export_model_artifact
+
+    joblib_path = os.path.join(BASE_DIR, 'disease_model.joblib')
+    artifact_dir = os.path.join(BASE_DIR, 'disease_model_arrays')
+    with tempfile.TemporaryDirectory() as tmp:
+        if not os.path.isdir(artifact_dir):
+            artifact_dir = export_model_artifact(_load_model_pipeline(), os.path.join(tmp, 'arrays'))
+
+        results = {'benchmark': 'artifact'}
+        for kind, path in (('joblib', joblib_path), ('artifact', artifact_dir)):
+            runs = [_probe_load(kind, path) for _ in range(repeat)]
+            results[kind] = {
+                'load_ms': round(min(r['load_ms'] for r in runs), 2),
+                'private_rss_kb': min(r['private_rss_kb'] for r in runs),
+                'shared_file_rss_kb': min(r['shared_file_rss_kb'] for r in runs),
+            }
+    return results
+
+
+def _import_ms(statement):
+    """Wall time of running ``statement`` in a fresh interpreter, minus interpreter startup."""
+    def run(code):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, check=True)
+        return time.perf_counter() - start
+
+    baseline = min(run('pass') for _ in range(3))
+    return round((min(run(statement) for _ in range(3)) - baseline) * 1000, 1)
+
+
+def bench_engine(repeat=3):
+    """Per-call latency and import cost of the NumPy inference engine against sklearn."""
+    from inference_engine import load_inference_pipeline
+    from main import predict_disease_from_symptoms, predict_diseases_batch
+    from model_artifact import export_model_artifact
+
+    sklearn_pipeline = _load_model_pipeline()
+    texts = _sample_symptom_texts(1000)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine_pipeline = load_inference_pipeline(export_model_artifact(sklearn_pipeline, os.path.join(tmp, 'arrays')))
+
+        results = {'benchmark': 'engine'}
+        for name, pipeline in (('sklearn', sklearn_pipeline), ('numpy_engine', engine_pipeline)):
+            results[name] = {
+                'single_us_per_call': round(_per_call_us(
+                    lambda t: predict_disease_from_symptoms(t, pipeline), [(t,) for t in texts], repeat), 2),
+                'batch_1000_us_per_text': round(_per_call_us(
+                    lambda b: predict_diseases_batch(b, pipeline), [(texts,)], repeat) / len(texts), 2),
+            }
+    results['sklearn']['import_ms'] = _import_ms(
+        'import joblib, sklearn.svm, sklearn.feature_extraction.text')
+    results['numpy_engine']['import_ms'] = _import_ms('import inference_engine')
+    return results
+
+
+def bench_spatial(repeat=3):
+    """Radius and k-nearest queries of the grid index against a brute-force haversine scan."""
+    import numpy as np
+    from spatial_index import SpatialIndex, haversine_km
+
+    rng = np.random.default_rng(0)
+    n = 500_000
+    # Half the places in five city clusters, half spread over land-ish latitudes
+    centres = np.array([(40.71, -74.01), (51.51, -0.13), (28.61, 77.21), (19.08, 72.88), (12.97, 77.59)])
+    picks = centres[rng.integers(0, len(centres), n // 2)]
+    lats = np.concatenate([picks[:, 0] + rng.normal(0, 0.2, n // 2), rng.uniform(-60, 70, n - n // 2)])
+    lngs = np.concatenate([picks[:, 1] + rng.normal(0, 0.2, n // 2), rng.uniform(-180, 180, n - n // 2)])
+    types = rng.choice(['Hospital', 'Clinic', 'Doctor', 'Pharmacy'], n)
+    open_now = rng.random(n) < 0.7
+
+    start = time.perf_counter()
+    index = SpatialIndex(lats, lngs, attributes={'type': types, 'open_now': open_now})
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = [(centre[0] + dy, centre[1] + dx) for centre in centres
+               for dy, dx in rng.normal(0, 0.1, (20, 2))]
+
+    def brute(lat, lng):
+        distances = haversine_km(lat, lng, lats, lngs)
+        within = np.flatnonzero(distances <= 5.0)
+        return within[np.argsort(distances[within])][:20]
+
+    return {
+        'benchmark': 'spatial',
+        'points': n,
+        'build_ms': round(build_ms, 1),
+        'radius_5km_limit20_us': round(_per_call_us(
+            lambda lat, lng: index.radius(lat, lng, 5.0, limit=20), queries, repeat), 1),
+        'radius_5km_filtered_us': round(_per_call_us(
+            lambda lat, lng: index.radius(lat, lng, 5.0, limit=20, type=['Clinic', 'Hospital'], open_now=True),
+            queries, repeat), 1),
+        'nearest_k10_us': round(_per_call_us(lambda lat, lng: index.nearest(lat, lng, k=10), queries, repeat), 1),
+        'brute_force_us': round(_per_call_us(brute, queries[:20], 1), 1),
+    }
+
+
+def _free_port():
+    import socket
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_ready(url, process, timeout=120):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"server exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(url + '/ready', timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.2)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+
+def _tree_pss_kb(pid):
+    """Proportional set size of a process and its children: shared pages are split, not double-counted."""
+    total = 0
+    pending = [pid]
+    while pending:
+        current = pending.pop()
+        try:
+            with open(f'/proc/{current}/smaps_rollup') as f:
+                total += next(int(line.split()[1]) for line in f if line.startswith('Pss:'))
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pending.extend(int(child) for child in f.read().split())
+        except (OSError, StopIteration):
+            pass
+    return total
+
+
+# (label, serve.py arguments) of the servers compared by bench_serve
+SERVE_CONFIGS = [
+    ('dev server', ['--dev']),
+    ('gunicorn 1 worker', ['--workers', '1']),
+    ('gunicorn 4 workers', ['--workers', '4']),
+    ('gunicorn 4 workers x 4 threads', ['--workers', '4', '--threads', '4']),
+]
+
+
+def bench_serve(repeat=3, total=1500, concurrency=16):
+    """Throughput and memory of serve.py configurations against the dev server, replaying loadtest_requests.jsonl."""
+    from load_test import HttpClient, read_requests, run_load_test
+
+    records = read_requests(os.path.join(BASE_DIR, 'loadtest_requests.jsonl'))
+    env = {**os.environ, 'MEDI_WARMUP': '1', 'LOG_LEVEL': 'WARNING'}
+    results = {'benchmark': 'serve', 'requests': total, 'concurrency': concurrency, 'cpus': os.cpu_count(),
+               'servers': {}}
+    for label, args in SERVE_CONFIGS:
+        url = f'http://127.0.0.1:{_free_port()}'
+        process = subprocess.Popen([sys.executable, 'serve.py', '--bind', url[len('http://'):]] + args, cwd=BASE_DIR,
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(url, process)
+            runs = [run_load_test(records, HttpClient(url), concurrency=concurrency, total=total, seed=i)
+                    for i in range(repeat)]
+            best = max(runs, key=lambda run: run['requests_per_s'])
+            results['servers'][label] = {
+                'requests_per_s': best['requests_per_s'],
+                'p50_ms': best['latency']['p50_ms'],
+                'p99_ms': best['latency']['p99_ms'],
+                'errors': best['errors'],
+                'pss_mb': round(_tree_pss_kb(process.pid) / 1024, 1),
+            }
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    baseline = results['servers']['dev server']['requests_per_s']
+    for server in results['servers'].values():
+        server['speedup'] = round(server['requests_per_s'] / baseline, 2)
+    return results
+
+
+BENCHMARKS = {
+    'artifact': bench_artifact,
+    'batch': bench_batch,
+    'engine': bench_engine,
+    'helper': bench_helper,
+    'serve': bench_serve,
+    'spatial': bench_spatial,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmark', choices=sorted(BENCHMARKS))
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(BENCHMARKS[args.benchmark](repeat=args.repeat), indent=2))
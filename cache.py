@@ -0,0 +1,150 @@
+"""
+Small in-process caches for the Flask app.
+
+``LRUCache`` is a thread-safe, size-bounded LRU map with an optional TTL and
+hit/miss/eviction counters. It can watch a set of files (``FileWatcher``) and
+drops every entry when one of them changes, e.g. when the model is retrained
+or a CSV is edited.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+_MISSING = object()
+
+
+class FileWatcher:
+    """
+    Detects changes to a set of files by their (mtime, size) signature.
+
+    ``os.stat`` is called at most once per ``check_interval`` seconds so the
+    check is cheap enough to run on every cache lookup.
+    """
+
+    def __init__(self, paths, check_interval=5.0):
+        self.paths = list(paths)
+        self.check_interval = check_interval
+        self._signature = self._read_signature()
+        self._next_check = time.monotonic() + check_interval
+        self._lock = threading.Lock()
+
+    def _read_signature(self):
+        signature = []
+        for path in self.paths:
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def changed(self):
+        """True once after any watched file was created, modified or removed."""
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        with self._lock:
+            if now < self._next_check:
+                return False
+            self._next_check = now + self.check_interval
+            signature = self._read_signature()
+            if signature == self._signature:
+                return False
+            self._signature = signature
+            return True
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache with optional TTL and file invalidation.
+
+    Args:
+        maxsize (int): Maximum number of entries; 0 disables caching.
+        ttl (float, optional): Seconds an entry stays valid; None or 0 means forever.
+        watcher (FileWatcher, optional): Clears the cache when its files change.
+        on_invalidate (callable, optional): Called after a file-change invalidation.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, watcher=None, on_invalidate=None):
+        self.maxsize = maxsize
+        self.ttl = ttl or None
+        self.watcher = watcher
+        self.on_invalidate = on_invalidate
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _check_watcher(self):
+        if self.watcher is not None and self.watcher.changed():
+            with self._lock:
+                self._data.clear()
+                self.invalidations += 1
+            if self.on_invalidate is not None:
+                self.on_invalidate()
+
+    def get(self, key, default=None):
+        """Return the cached value for ``key`` (marking it recently used) or ``default``."""
+        self._check_watcher()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store ``value`` under ``key``, evicting the least recently used entries if full."""
+        if self.maxsize <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for ``key``, computing and storing it on a miss."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Counters as a JSON-serializable dict."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+        }
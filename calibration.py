@@ -0,0 +1,98 @@
+"""
+Ranking and confidence calibration for linear classifier decision scores.
+
+LinearSVC has no ``predict_proba``; its ``decision_function`` margins are only
+meaningful relative to each other. Training fits a single softmax temperature
+on held-out scores (``fit_temperature``) and stores it in the model pipeline as
+``{'method': 'temperature', 'temperature': T}``. Serving ranks classes with a
+partial sort and turns the margins into calibrated confidences with that
+temperature.
+"""
+
+import numpy as np
+
+
+def _as_class_scores(scores):
+    """Decision scores as an (n_samples, n_classes) array, including the binary case."""
+    scores = np.asarray(scores, dtype=np.float64)
+    if scores.ndim == 1:
+        # Binary models return the margin of classes_[1] only
+        scores = np.column_stack([-scores, scores])
+    return scores
+
+
+def softmax(scores, temperature=1.0):
+    """Row-wise softmax of ``scores / temperature``."""
+    scaled = _as_class_scores(scores) / temperature
+    scaled -= scaled.max(axis=1, keepdims=True)
+    np.exp(scaled, out=scaled)
+    scaled /= scaled.sum(axis=1, keepdims=True)
+    return scaled
+
+
+def fit_temperature(scores, true_indices, temperatures=None):
+    """
+    Fit the softmax temperature that minimizes the negative log-likelihood.
+
+    Args:
+        scores (array): Decision scores on held-out data, (n_samples, n_classes).
+        true_indices (array): Index into the classes of each sample's true label.
+        temperatures (array, optional): Candidate temperatures to search.
+
+    Returns:
+        dict: The calibration entry stored in the model pipeline.
+    """
+    scores = _as_class_scores(scores)
+    true_indices = np.asarray(true_indices)
+    if temperatures is None:
+        temperatures = np.logspace(-2, 1, 61)
+
+    rows = np.arange(len(scores))
+    best_temperature, best_nll = 1.0, np.inf
+    for temperature in temperatures:
+        probs = softmax(scores, temperature)
+        nll = -np.mean(np.log(np.clip(probs[rows, true_indices], 1e-12, None)))
+        if nll < best_nll:
+            best_temperature, best_nll = float(temperature), float(nll)
+
+    return {'method': 'temperature', 'temperature': best_temperature, 'nll': best_nll}
+
+
+def top_k(scores, classes, k=5, calibration=None):
+    """
+    The ``k`` best-scoring classes for each row of decision scores.
+
+    Uses ``np.argpartition`` so only the selected candidates are sorted.
+    Ties are broken by class order, matching ``predict``.
+
+    Returns:
+        list of list of dict: Per row, candidates as
+        ``{'disease', 'score', 'confidence'}`` (confidence is None when uncalibrated).
+    """
+    scores = _as_class_scores(scores)
+    n_classes = scores.shape[1]
+    k = max(1, min(k, n_classes))
+
+    if calibration is not None:
+        confidences = softmax(scores, calibration['temperature'])
+    else:
+        confidences = None
+
+    if k < n_classes:
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        top = np.tile(np.arange(n_classes), (len(scores), 1))
+
+    ranked = []
+    for row, candidates in enumerate(top):
+        row_scores = scores[row, candidates]
+        order = np.lexsort((candidates, -row_scores))
+        ranked.append([
+            {
+                'disease': str(classes[idx]).title(),
+                'score': float(scores[row, idx]),
+                'confidence': float(confidences[row, idx]) if confidences is not None else None,
+            }
+            for idx in candidates[order]
+        ])
+    return ranked
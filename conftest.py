@@ -0,0 +1,64 @@
+"""Shared pytest fixtures: a small model trained on the bundled CSVs."""
+
+import os
+
+import pandas as pd
+import pytest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='session')
+def training_corpus():
+    """(symptom texts, disease labels) from Diseases_Symptoms.csv and disease_diagnosis.csv."""
+    from text_pipeline import preprocess_text
+
+    df1 = pd.read_csv(os.path.join(BASE_DIR, 'Diseases_Symptoms.csv'))[['Symptoms', 'Name']].dropna()
+    df2 = pd.read_csv(os.path.join(BASE_DIR, 'disease_diagnosis.csv'))
+    df2['Symptoms'] = df2[['Symptom_1', 'Symptom_2', 'Symptom_3']].apply(lambda row: ', '.join(row.dropna()), axis=1)
+
+    texts = [preprocess_text(t) for t in list(df1['Symptoms']) + list(df2['Symptoms'])]
+    labels = [preprocess_text(t) for t in list(df1['Name']) + list(df2['Diagnosis'])]
+    return texts, labels
+
+
+@pytest.fixture(scope='session')
+def model_pipeline(training_corpus):
+    """A TF-IDF + LinearSVC pipeline configured like medicine_rec_train.py."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.svm import LinearSVC
+
+    texts, labels = training_corpus
+    vectorizer = TfidfVectorizer(stop_words='english', max_features=5000, ngram_range=(1, 2))
+    model = LinearSVC(random_state=42)
+    model.fit(vectorizer.fit_transform(texts), labels)
+    return {'model': model, 'vectorizer': vectorizer}
+
+
+@pytest.fixture(scope='session')
+def hashing_pipeline(training_corpus):
+    """A model as saved by ``streaming_train.py --vectorizer hashing``: no vocabulary, no idf_ attribute."""
+    import streaming_train
+    from sklearn.svm import LinearSVC
+
+    texts, labels = training_corpus
+    chunk = pd.DataFrame({'symptoms': texts, 'disease': labels})
+    # A few labels keep the dense (n_classes, 2**20) weight matrix small
+    chunk = chunk[chunk['disease'].isin(chunk['disease'].value_counts().index[:5])]
+    vectorizer = streaming_train.build_vectorizer(streaming_train.scan_corpus([chunk], 'hashing'), 'hashing')
+    model = LinearSVC(random_state=42).fit(vectorizer.transform(chunk['symptoms']), chunk['disease'])
+    return {'model': model, 'vectorizer': vectorizer}
+
+
+@pytest.fixture
+def client(model_pipeline):
+    import main
+
+    main.resources.override('model', model_pipeline)
+    # Built from the model's vectorizer
+    main.resources.reset(['spelling_corrector', 'token_encoder'])
+    main.prediction_cache.clear()
+    main.geo_cache.clear()
+    main.app.config['TESTING'] = True
+    yield main.app.test_client()
+    main.resources.reset(['model', 'spelling_corrector', 'token_encoder'])
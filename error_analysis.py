@@ -0,0 +1,126 @@
+"""
+Error analysis from prediction arrays, without a dense confusion matrix.
+
+The confusion matrix is built as a sparse matrix with one entry per distinct
+(true, predicted) pair, so time and memory grow with the number of test rows
+and distinct mistakes rather than with the square of the number of classes.
+From it:
+
+- the top-N off-diagonal confusions,
+- per-class support, precision, recall and F1,
+- confusion clusters: groups of diseases linked by at least ``min_count``
+  mistakes in either direction (connected components of the confusion graph).
+
+``write_error_report()`` saves everything as JSON next to the model.
+"""
+
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+from scipy.sparse.csgraph import connected_components
+
+
+DEFAULT_TOP_N = 15
+DEFAULT_REPORT_PATH = 'error_report.json'
+
+
+def sparse_confusion(y_true, y_pred):
+    """
+    Sparse confusion matrix over the labels seen in either array.
+
+    Returns:
+        tuple: (labels, csr_matrix) where entry [i, j] counts rows of true label
+        ``labels[i]`` predicted as ``labels[j]``.
+    """
+    labels, codes = np.unique(np.concatenate([np.asarray(y_true, dtype=object), np.asarray(y_pred, dtype=object)]),
+                              return_inverse=True)
+    true_codes, pred_codes = codes[:len(codes) // 2], codes[len(codes) // 2:]
+    counts = sparse.coo_matrix((np.ones(len(true_codes), dtype=np.int64), (true_codes, pred_codes)),
+                               shape=(len(labels), len(labels)))
+    return labels, counts.tocsr()
+
+
+def top_confusions(labels, cm, n=DEFAULT_TOP_N):
+    """The ``n`` most frequent (true, predicted, count) mistakes, most frequent first."""
+    coo = cm.tocoo()
+    mistakes = coo.row != coo.col
+    rows, cols, counts = coo.row[mistakes], coo.col[mistakes], coo.data[mistakes]
+    # Count descending, then label order, so ties are reported deterministically
+    order = np.lexsort((cols, rows, -counts))[:n]
+    return [(labels[rows[k]], labels[cols[k]], int(counts[k])) for k in order]
+
+
+def _class_scores(cm):
+    true_positives = cm.diagonal().astype(np.float64)
+    support = np.asarray(cm.sum(axis=1)).ravel()
+    predicted = np.asarray(cm.sum(axis=0)).ravel()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        precision = np.where(predicted > 0, true_positives / predicted, 0.0)
+        recall = np.where(support > 0, true_positives / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return support, precision, recall, f1
+
+
+def per_class_metrics(labels, cm):
+    """Support, precision, recall and F1 of every label (0 where undefined)."""
+    support, precision, recall, f1 = _class_scores(cm)
+    return {
+        str(label): {'support': int(s), 'precision': round(float(p), 4), 'recall': round(float(r), 4),
+                     'f1': round(float(f), 4)}
+        for label, s, p, r, f in zip(labels, support, precision, recall, f1)
+    }
+
+
+def confusion_clusters(labels, cm, min_count=2):
+    """
+    Groups of labels connected by at least ``min_count`` mistakes in either direction.
+
+    Returns:
+        list[dict]: Clusters of two or more labels with their internal error count, largest first.
+    """
+    errors = cm - sparse.diags(cm.diagonal(), format='csr')
+    symmetric = (errors + errors.T).tocsr()
+    strong = symmetric.multiply(symmetric >= min_count).tocsr()
+    strong.eliminate_zeros()
+    n_components, component = connected_components(strong, directed=False)
+
+    sizes = np.bincount(component, minlength=n_components)
+    # Each mistake is counted twice in the symmetric matrix
+    edges = strong.tocoo()
+    internal = np.bincount(component[edges.row], weights=edges.data, minlength=n_components) / 2
+
+    clusters = []
+    for c in np.flatnonzero(sizes > 1):
+        members = sorted(str(label) for label in labels[component == c])
+        clusters.append({'labels': members, 'errors': int(internal[c])})
+    clusters.sort(key=lambda cluster: (-cluster['errors'], cluster['labels']))
+    return clusters
+
+
+def error_report(y_true, y_pred, top_n=DEFAULT_TOP_N, min_cluster_count=2):
+    """Top confusions, per-class metrics and confusion clusters as one JSON-serializable dict."""
+    labels, cm = sparse_confusion(y_true, y_pred)
+    correct = int(cm.diagonal().sum())
+    total = int(cm.sum())
+    f1 = _class_scores(cm)[3]
+    return {
+        'rows': total,
+        'errors': total - correct,
+        'accuracy': round(correct / total, 4) if total else 0.0,
+        # Over every label in either array, like sklearn's average='macro'
+        'macro_f1': round(float(f1.mean()), 4) if len(f1) else 0.0,
+        'labels': len(labels),
+        'top_confusions': [{'true': str(t), 'predicted': str(p), 'count': c}
+                           for t, p, c in top_confusions(labels, cm, top_n)],
+        'clusters': confusion_clusters(labels, cm, min_cluster_count),
+        'per_class': per_class_metrics(labels, cm),
+    }
+
+
+def write_error_report(report, path=DEFAULT_REPORT_PATH):
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp_path, path)
@@ -0,0 +1,124 @@
+"""
+Result cache for the location endpoints.
+
+Browsers report unique float coordinates, so caching on the raw values never
+hits. ``GeoCache`` quantizes a query point to a grid cell of ``cell_deg``
+degrees and memoizes the provider's answer for the cell's centre per
+(category, cell, radius, type, open_now), in an ``LRUCache`` with a TTL.
+
+The cached search uses the radius widened by the cell's half-diagonal, so it
+contains every place within ``radius`` of any point in the cell; each request
+then re-ranks the cached places by their true distance from its own
+coordinates. Users in the same ~1 km cell share one upstream query but still
+get results ordered from where they are.
+
+City searches go through a small cache of normalized city names
+("  Bombay " -> "mumbai") so spelling variants share one cached result.
+"""
+
+import math
+
+import numpy as np
+
+from cache import LRUCache
+from places_provider import DEFAULT_LIMIT, DEFAULT_RADIUS_M, format_distance, normalize_city
+from spatial_index import KM_PER_DEGREE, haversine_km
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return tuple(sorted(value))
+    return value
+
+
+class GeoCache:
+    """
+    Quantized-coordinate cache in front of a places provider.
+
+    Args:
+        cell_deg (float): Grid cell size in degrees (0.01° ≈ 1.1 km).
+        maxsize (int): Cached searches kept (LRU eviction).
+        ttl (float): Seconds a cached search stays valid.
+        fetch_limit (int): Places fetched per cached search; re-ranking is
+            exact as long as a search area holds fewer places than this.
+        watcher, on_invalidate: Passed to the result ``LRUCache``.
+    """
+
+    def __init__(self, cell_deg=0.01, maxsize=4096, ttl=600, fetch_limit=200, city_maxsize=2048,
+                 watcher=None, on_invalidate=None):
+        self.cell_deg = cell_deg
+        self.fetch_limit = fetch_limit
+        self.results = LRUCache(maxsize=maxsize, ttl=ttl, watcher=watcher, on_invalidate=on_invalidate)
+        self.city_names = LRUCache(maxsize=city_maxsize)
+
+    def cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    def cell_centre(self, cell):
+        return (cell[0] + 0.5) * self.cell_deg, (cell[1] + 0.5) * self.cell_deg
+
+    def _margin_m(self):
+        # Half-diagonal of a cell, measured along the equator (the widest case)
+        return self.cell_deg * KM_PER_DEGREE * math.sqrt(2) / 2 * 1000
+
+    def nearby(self, provider, latitude, longitude, category, radius_m=DEFAULT_RADIUS_M, limit=DEFAULT_LIMIT,
+               types=None, open_now=None):
+        """``provider.nearby`` through the cache; same arguments and result."""
+        latitude, longitude = float(latitude), float(longitude)
+        cell = self.cell(latitude, longitude)
+        key = ('nearby', category, cell, radius_m, _freeze(types), open_now)
+
+        def search():
+            centre_lat, centre_lng = self.cell_centre(cell)
+            return provider.nearby(centre_lat, centre_lng, category, radius_m=radius_m + self._margin_m(),
+                                   limit=self.fetch_limit, types=types, open_now=open_now)
+
+        places = self.results.get_or_compute(key, search)
+        return rerank(places, latitude, longitude, radius_m, limit)
+
+    def normalize_city(self, city):
+        return self.city_names.get_or_compute(city, lambda: normalize_city(city))
+
+    def in_city(self, provider, city, category, limit=DEFAULT_LIMIT, types=None, open_now=None):
+        """
+        ``provider.in_city`` through the cache, keyed by the normalized city name.
+
+        The provider gets the name as typed; it does its own matching or geocoding.
+        """
+        key = ('city', category, self.normalize_city(city), _freeze(types), open_now)
+        places = self.results.get_or_compute(
+            key, lambda: provider.in_city(city, category, limit=self.fetch_limit, types=types, open_now=open_now))
+        return places[:limit]
+
+    def clear(self):
+        self.results.clear()
+        self.city_names.clear()
+
+    def stats(self):
+        """Hit ratio and upstream calls made and saved, plus the underlying cache counters."""
+        results = self.results.stats()
+        return {
+            'cell_deg': self.cell_deg,
+            'hit_ratio': results['hit_rate'],
+            'upstream_calls': results['misses'],
+            'upstream_calls_saved': results['hits'],
+            'results': results,
+            'city_names': self.city_names.stats(),
+        }
+
+
+def rerank(places, latitude, longitude, radius_m, limit):
+    """Copies of ``places`` within ``radius_m`` of the point, with distances from it, nearest first."""
+    if not places:
+        return []
+    lats = np.array([place['latitude'] for place in places], dtype=np.float64)
+    lngs = np.array([place['longitude'] for place in places], dtype=np.float64)
+    distances = haversine_km(latitude, longitude, lats, lngs)
+    inside = np.flatnonzero(distances <= radius_m / 1000.0)
+    order = inside[np.argsort(distances[inside], kind='stable')][:limit]
+
+    ranked = []
+    for i in order:
+        km = float(distances[i])
+        ranked.append({**places[i], 'distance': format_distance(km), 'distance_km': round(km, 3)})
+    return ranked
@@ -0,0 +1,203 @@
+"""
+Pure-NumPy inference for the exported disease model.
+
+Serving a prediction only needs tokenization, a vocabulary lookup, idf
+scaling, L2 normalization and a dot product with the LinearSVC weights. This
+module rebuilds ``TfidfVectorizer`` (word analyzer) and
+``LinearSVC.decision_function`` from the arrays written by
+``model_artifact.export_model_artifact``. It needs neither scikit-learn, scipy
+nor joblib at serve time.
+
+``load_inference_pipeline`` returns the same ``{'model', 'vectorizer'}`` dict
+the app already uses, so ``predict_disease_from_symptoms`` and friends work
+unchanged.
+"""
+
+import math
+import re
+import unicodedata
+
+import numpy as np
+
+from model_artifact import load_model_artifact
+
+
+class SparseRows:
+    """Minimal CSR matrix: what NumpyTfidfVectorizer.transform returns."""
+
+    __slots__ = ('data', 'indices', 'indptr', 'shape')
+
+    def __init__(self, data, indices, indptr, shape):
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+        self.shape = shape
+
+    def toarray(self):
+        dense = np.zeros(self.shape, dtype=self.data.dtype)
+        rows = np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+        dense[rows, self.indices] = self.data
+        return dense
+
+
+def _strip_accents_unicode(text):
+    normalized = unicodedata.normalize('NFKD', text)
+    if normalized == text:
+        return text
+    return ''.join(c for c in normalized if not unicodedata.combining(c))
+
+
+def _strip_accents_ascii(text):
+    return unicodedata.normalize('NFKD', text).encode('ASCII', 'ignore').decode('ASCII')
+
+
+class NumpyTfidfVectorizer:
+    """
+    Re-implementation of a fitted ``TfidfVectorizer(analyzer='word')`` transform.
+
+    Args:
+        params (dict): The 'vectorizer' entry of the artifact metadata.
+        terms (array): Vocabulary terms (UTF-8 bytes) in feature order.
+        idf (array): idf weight per feature.
+    """
+
+    def __init__(self, params, terms, idf):
+        self.params = params
+        self.vocabulary_ = {term.decode('utf-8'): i for i, term in enumerate(terms.tolist())}
+        self.idf_ = np.asarray(idf, dtype=np.float64)
+        self.stop_words_ = frozenset(params.get('stop_words_list') or ())
+        self.min_n, self.max_n = params['ngram_range']
+        self.token_pattern = re.compile(params['token_pattern'])
+        if self.token_pattern.groups > 1:
+            raise ValueError("token_pattern may contain at most one capturing group.")
+
+        strip_accents = params.get('strip_accents')
+        if strip_accents == 'unicode':
+            self._strip_accents = _strip_accents_unicode
+        elif strip_accents == 'ascii':
+            self._strip_accents = _strip_accents_ascii
+        elif strip_accents is None:
+            self._strip_accents = None
+        else:
+            raise ValueError(f"Unsupported strip_accents: {strip_accents!r}")
+
+    def analyze(self, doc):
+        """Word n-grams of ``doc`` exactly as sklearn's word analyzer produces them."""
+        if self.params.get('lowercase', True):
+            doc = doc.lower()
+        if self._strip_accents is not None:
+            doc = self._strip_accents(doc)
+
+        tokens = self.token_pattern.findall(doc)
+        if self.stop_words_:
+            tokens = [w for w in tokens if w not in self.stop_words_]
+
+        min_n, max_n = self.min_n, self.max_n
+        if max_n == 1:
+            return tokens
+        original_tokens = tokens
+        n_original_tokens = len(original_tokens)
+        if min_n == 1:
+            tokens = list(original_tokens)
+            min_n += 1
+        else:
+            tokens = []
+        for n in range(min_n, min(max_n + 1, n_original_tokens + 1)):
+            for i in range(n_original_tokens - n + 1):
+                tokens.append(' '.join(original_tokens[i:i + n]))
+        return tokens
+
+    def _row(self, doc):
+        """Sorted feature ids and raw counts of one document."""
+        vocabulary = self.vocabulary_
+        counts = {}
+        for token in self.analyze(doc):
+            idx = vocabulary.get(token)
+            if idx is not None:
+                counts[idx] = counts.get(idx, 0) + 1
+        return sorted(counts.items())
+
+    def transform(self, raw_documents):
+        """TF-IDF rows for ``raw_documents`` as a SparseRows matrix."""
+        if isinstance(raw_documents, str):
+            raise ValueError("Iterable over raw text documents expected, string object received.")
+        params = self.params
+        binary = params.get('binary', False)
+        sublinear_tf = params.get('sublinear_tf', False)
+        use_idf = params.get('use_idf', True)
+        norm = params.get('norm', 'l2')
+
+        indices = []
+        data = []
+        indptr = [0]
+        for doc in raw_documents:
+            for idx, count in self._row(doc):
+                indices.append(idx)
+                if binary:
+                    count = 1
+                data.append(1.0 + math.log(count) if sublinear_tf else float(count))
+            indptr.append(len(indices))
+
+        indices = np.asarray(indices, dtype=np.int64)
+        data = np.asarray(data, dtype=np.float64)
+        indptr = np.asarray(indptr, dtype=np.int64)
+
+        if use_idf and len(data):
+            data *= self.idf_[indices]
+        if norm is not None and len(data):
+            nonempty = np.flatnonzero(np.diff(indptr))
+            if norm == 'l2':
+                sums = np.add.reduceat(data * data, indptr[nonempty])
+                norms = np.sqrt(sums)
+            elif norm == 'l1':
+                norms = np.add.reduceat(np.abs(data), indptr[nonempty])
+            else:
+                raise ValueError(f"Unsupported norm: {norm!r}")
+            norms[norms == 0.0] = 1.0
+            data /= np.repeat(norms, np.diff(indptr)[nonempty])
+
+        return SparseRows(data, indices, indptr, (len(indptr) - 1, len(self.idf_)))
+
+
+class NumpyLinearModel:
+    """``decision_function`` / ``predict`` of a one-vs-rest linear classifier."""
+
+    def __init__(self, coef_t, intercept, classes):
+        self.coef_t = coef_t
+        self.intercept_ = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.array(classes, dtype=object)
+
+    def decision_function(self, X):
+        n_samples = X.shape[0]
+        scores = np.empty((n_samples, self.coef_t.shape[1]), dtype=np.float64)
+        scores[:] = self.intercept_
+        if len(X.data):
+            # Gather the weight rows of the present features only
+            contributions = self.coef_t[X.indices] * X.data[:, None]
+            nonempty = np.flatnonzero(np.diff(X.indptr))
+            scores[nonempty] += np.add.reduceat(contributions, X.indptr[nonempty], axis=0)
+        if scores.shape[1] == 1:
+            return scores.ravel()
+        return scores
+
+    def predict(self, X):
+        scores = self.decision_function(X)
+        if scores.ndim == 1:
+            return self.classes_[(scores > 0).astype(int)]
+        return self.classes_[scores.argmax(axis=1)]
+
+
+def load_inference_pipeline(directory):
+    """
+    Load an exported artifact as a NumPy-only ``{'model', 'vectorizer'}`` pipeline.
+
+    The weight matrix stays memory-mapped; only touched rows are read.
+    """
+    artifact = load_model_artifact(directory)
+    pipeline = {
+        'vectorizer': NumpyTfidfVectorizer(artifact.meta['vectorizer'], artifact.terms, artifact.idf),
+        'model': NumpyLinearModel(artifact.coef_t, artifact.intercept, artifact.classes),
+    }
+    if artifact.calibration is not None:
+        pipeline['calibration'] = artifact.calibration
+    return pipeline
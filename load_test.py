@@ -0,0 +1,327 @@
+"""
+Load-testing harness for the Flask app.
+
+Replays a recorded request mix against the app, either in-process through
+Flask's test client or against a running server, and reports throughput,
+latency percentiles and memory growth as JSON.
+
+Request mix format (one JSON object per line):
+
+    {"method": "POST", "path": "/predict", "form": {"symptoms": "fever, cough"}}
+    {"method": "POST", "path": "/find-doctors", "json": {"latitude": 40.71, "longitude": -74.0}}
+    {"method": "POST", "path": "/pharmacy_search", "json": {"search_type": "city", "city": "Pune"}}
+
+``form`` is sent as form data, ``json`` as a JSON body; an optional integer
+``weight`` repeats a line in the mix.
+
+Usage:
+    python load_test.py record [--output loadtest_requests.jsonl] [--count 500]
+    python load_test.py run [--requests loadtest_requests.jsonl] [--concurrency 8] [--total 2000]
+                            [--url http://localhost:5000] [--output results.json]
+    python load_test.py compare baseline.json candidate.json
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_REQUESTS_FILE = os.path.join(BASE_DIR, 'loadtest_requests.jsonl')
+
+# Approximate centres used to generate location queries
+CITIES = {
+    'New York': (40.7128, -74.0060),
+    'London': (51.5074, -0.1278),
+    'Delhi': (28.6139, 77.2090),
+    'Mumbai': (19.0760, 72.8777),
+    'Bengaluru': (12.9716, 77.5946),
+}
+
+
+# --- Recording ----------------------------------------------------------
+
+def record_requests(count=500, seed=42, mix=(('predict', 0.7), ('find_doctors', 0.15), ('pharmacy', 0.15))):
+    """
+    Generate a request mix from the bundled datasets.
+
+    Returns:
+        list of dict: Request records in the JSONL format described above.
+    """
+    rng = random.Random(seed)
+    sym_df = pd.read_csv(os.path.join(BASE_DIR, 'symtoms_df.csv'))
+    columns = ['Symptom_1', 'Symptom_2', 'Symptom_3', 'Symptom_4']
+    symptoms = [
+        ', '.join(str(value).strip().replace('_', ' ') for value in row if pd.notna(value))
+        for row in sym_df[columns].itertuples(index=False)
+    ]
+    # A few very common inputs, as users type them
+    symptoms += ['fever, headache'] * 20 + ['cough, fatigue'] * 10 + ['stomach pain, nausea'] * 10
+
+    kinds = [kind for kind, _ in mix]
+    weights = [weight for _, weight in mix]
+    records = []
+    for _ in range(count):
+        kind = rng.choices(kinds, weights)[0]
+        city, (lat, lng) = rng.choice(list(CITIES.items()))
+        lat = round(lat + rng.uniform(-0.05, 0.05), 6)
+        lng = round(lng + rng.uniform(-0.05, 0.05), 6)
+        if kind == 'predict':
+            records.append({'method': 'POST', 'path': '/predict', 'form': {'symptoms': rng.choice(symptoms)}})
+        elif kind == 'find_doctors':
+            records.append({'method': 'POST', 'path': '/find-doctors', 'json': {'latitude': lat, 'longitude': lng}})
+        elif rng.random() < 0.5:
+            records.append({'method': 'POST', 'path': '/pharmacy_search',
+                            'json': {'search_type': 'coordinates', 'latitude': lat, 'longitude': lng}})
+        else:
+            records.append({'method': 'POST', 'path': '/pharmacy_search',
+                            'json': {'search_type': 'city', 'city': city}})
+    return records
+
+
+def write_requests(records, path):
+    with open(path, 'w') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def read_requests(path):
+    records = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if 'path' not in record:
+                raise ValueError(f"{path}:{line_number}: request has no 'path'")
+            records.extend([record] * int(record.get('weight', 1)))
+    return records
+
+
+# --- Clients --------------------------------------------------------------
+
+class InProcessClient:
+    """Sends requests through Flask's test client; one client per thread."""
+
+    def __init__(self):
+        from main import app
+        self.app = app
+        self._local = threading.local()
+
+    def send(self, record):
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.open(record['path'], method=record.get('method', 'GET'),
+                               data=record.get('form'), json=record.get('json'))
+        return response.status_code, response.get_data()
+
+
+class HttpClient:
+    """Sends requests to a running server with urllib (keep-alive is not used)."""
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def send(self, record):
+        headers = {}
+        body = None
+        if record.get('json') is not None:
+            body = json.dumps(record['json']).encode()
+            headers['Content-Type'] = 'application/json'
+        elif record.get('form') is not None:
+            body = urllib.parse.urlencode(record['form']).encode()
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        request = urllib.request.Request(self.base_url + record['path'], data=body, headers=headers,
+                                         method=record.get('method', 'GET'))
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+# --- Running --------------------------------------------------------------
+
+# Routes that report failures as 200 with {"success": false}
+JSON_STATUS_PATHS = ('/find-doctors', '/pharmacy_search')
+
+
+def is_error(path, status, body):
+    """Whether a response failed: any 4xx/5xx, or ``"success": false`` from a JSON_STATUS_PATHS route."""
+    if status >= 400:
+        return True
+    if path in JSON_STATUS_PATHS:
+        try:
+            return json.loads(body).get('success') is not True
+        except (ValueError, AttributeError):
+            return True
+    return False
+
+
+def _rss_kb():
+    """Resident set size of this process in kB (Linux), or None."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _percentiles(latencies):
+    if not latencies:
+        return {}
+    values = np.percentile(np.asarray(latencies) * 1000, [50, 95, 99, 100])
+    return {name: round(float(v), 3) for name, v in zip(('p50_ms', 'p95_ms', 'p99_ms', 'max_ms'), values)}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_load_test(records, client, concurrency=8, total=None, warmup=20, seed=0):
+    """
+    Replay ``records`` through ``client`` with ``concurrency`` worker threads.
+
+    Args:
+        total (int, optional): Number of requests to send, cycling through the
+            (shuffled) records; defaults to one pass.
+        warmup (int): Requests sent first and excluded from the results, so
+            lazy loading and first-request costs don't skew the numbers.
+
+    Returns:
+        dict: Throughput, latency percentiles (overall and per path), error
+        counts and memory growth.
+    """
+    rng = random.Random(seed)
+    records = list(records)
+    rng.shuffle(records)
+    total = total or len(records)
+    schedule = [records[i % len(records)] for i in range(total)]
+
+    for record in records[:warmup]:
+        client.send(record)
+
+    latencies = [None] * total
+    failed = [None] * total
+
+    def worker(i):
+        start = time.perf_counter()
+        try:
+            status, body = client.send(schedule[i])
+            failed[i] = is_error(schedule[i]['path'], status, body)
+        except Exception:
+            failed[i] = True
+        latencies[i] = time.perf_counter() - start
+
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(total)))
+    elapsed = time.perf_counter() - start
+    rss_after = _rss_kb()
+
+    by_path = {}
+    for record, latency, error in zip(schedule, latencies, failed):
+        entry = by_path.setdefault(record['path'], {'latencies': [], 'errors': 0})
+        entry['latencies'].append(latency)
+        entry['errors'] += error
+
+    errors = sum(entry['errors'] for entry in by_path.values())
+    return {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'concurrency': concurrency,
+        'requests': total,
+        'errors': errors,
+        'duration_s': round(elapsed, 3),
+        'requests_per_s': round(total / elapsed, 2) if elapsed else None,
+        'latency': _percentiles(latencies),
+        'paths': {
+            path: {'requests': len(entry['latencies']), 'errors': entry['errors'], **_percentiles(entry['latencies'])}
+            for path, entry in sorted(by_path.items())
+        },
+        'memory': {
+            'rss_before_kb': rss_before,
+            'rss_after_kb': rss_after,
+            'rss_growth_kb': rss_after - rss_before if rss_before is not None and rss_after is not None else None,
+        },
+    }
+
+
+def compare_results(baseline, candidate):
+    """Relative change of throughput and latency between two result files."""
+    def change(old, new):
+        if not old or new is None:
+            return None
+        return round((new - old) / old * 100, 1)
+
+    comparison = {
+        'baseline_commit': baseline.get('commit'),
+        'candidate_commit': candidate.get('commit'),
+        'requests_per_s_change_pct': change(baseline.get('requests_per_s'), candidate.get('requests_per_s')),
+    }
+    for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+        comparison[f'{key}_change_pct'] = change(baseline['latency'].get(key), candidate['latency'].get(key))
+    return comparison
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = commands.add_parser('record', help='Generate a request mix file.')
+    record_parser.add_argument('--output', default=DEFAULT_REQUESTS_FILE)
+    record_parser.add_argument('--count', type=int, default=500)
+    record_parser.add_argument('--seed', type=int, default=42)
+
+    run_parser = commands.add_parser('run', help='Replay a request mix and report results.')
+    run_parser.add_argument('--requests', default=DEFAULT_REQUESTS_FILE)
+    run_parser.add_argument('--concurrency', type=int, default=8)
+    run_parser.add_argument('--total', type=int, default=None, help='Requests to send (default: one pass).')
+    run_parser.add_argument('--warmup', type=int, default=20)
+    run_parser.add_argument('--url', default=None, help='Base URL of a running server (default: in-process).')
+    run_parser.add_argument('--output', default=None, help='Also write the results to this JSON file.')
+
+    compare_parser = commands.add_parser('compare', help='Compare two result files.')
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+
+    args = parser.parse_args()
+    if args.command == 'record':
+        write_requests(record_requests(args.count, args.seed), args.output)
+        print(f"Wrote {args.count} requests to {args.output}")
+    elif args.command == 'run':
+        client = HttpClient(args.url) if args.url else InProcessClient()
+        results = run_load_test(read_requests(args.requests), client, args.concurrency, args.total, args.warmup)
+        results['target'] = args.url or 'in-process'
+        output = json.dumps(results, indent=2)
+        if args.output:
+            with open(args.output, 'w') as f:
+                f.write(output + '\n')
+        print(output)
+    else:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.candidate) as f:
+            candidate = json.load(f)
+        print(json.dumps(compare_results(baseline, candidate), indent=2))
@@ -1,76 +1,444 @@
-from flask import Flask, request, render_template, jsonify
+from flask import Flask, Response, request, render_template, jsonify
+import logging
 import numpy as np
 import pandas as pd
-import joblib
 import os
 import re
 
+from cache import FileWatcher, LRUCache
+from calibration import top_k
+from inference_engine import load_inference_pipeline
+from metrics import metrics, timed, timed_function
+from model_artifact import artifact_matches_source
+from geo_cache import GeoCache
+from places_provider import DEFAULT_FIXTURE, create_places_provider
+from recommendation_index import build_recommendation_index
+from resources import ResourceRegistry
+from spelling import SpellingCorrector
+from symptom_classifier import LABEL_COLUMN, StructuredSymptomClassifier
+from symptom_suggest import DEFAULT_LIMIT, MAX_LIMIT, SymptomSuggester, symptom_phrases
+from text_pipeline import TokenEncoder, preprocess_text
+from triage import SeverityTriage
+
 
 # Resolve paths relative to this file so the app works no matter the CWD
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger('medi_recommend')
+
 # flask app (use absolute folders for templates/static)
 app = Flask(__name__, template_folder=os.path.join(BASE_DIR, 'templates'),
             static_folder=os.path.join(BASE_DIR, 'static'))
 
-# Import the prediction function from your new model
-def preprocess_text(text):
-    """Cleans and standardizes text for prediction."""
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-def predict_disease_from_symptoms(symptoms_text, model_pipeline):
+# Text is cleaned with the same preprocess_text as the training data (text_pipeline.py)
+def predict_disease_from_symptoms(symptoms_text, model_pipeline, cascade=False):
     """
     Predicts the disease from a string of symptoms.
     
     Args:
         symptoms_text (str): A string containing symptoms.
         model_pipeline (dict): A dictionary containing the loaded model and vectorizer.
+        cascade (bool): Let the structured first stage answer first (see structured_candidates).
         
     Returns:
         str: The predicted disease name.
     """
     # Clean the input text
-    cleaned_symptoms = preprocess_text(symptoms_text)
-    
-    # Vectorize the input using the loaded vectorizer
-    vectorizer = model_pipeline['vectorizer']
-    symptoms_tfidf = vectorizer.transform([cleaned_symptoms])
-    
-    # Predict using the loaded model
-    model = model_pipeline['model']
-    predicted_disease = model.predict(symptoms_tfidf)
+    with timed('preprocess'):
+        cleaned_symptoms = preprocess_text(symptoms_text)
+
+    # Inputs made of known symptom IDs are answered by the structured model
+    candidates = structured_candidates(cleaned_symptoms, model_pipeline, k=1) if cascade else None
+    if candidates is not None:
+        return candidates[0]['disease']
+
+    with timed('cascade_tfidf'):
+        # Vectorize the input using the loaded vectorizer
+        with timed('vectorize'):
+            symptoms_tfidf = vectorize_symptoms([cleaned_symptoms], model_pipeline)
+
+        # Predict using the loaded model
+        model = model_pipeline['model']
+        with timed('model'):
+            predicted_disease = model.predict(symptoms_tfidf)
     
     return predicted_disease[0].title()
 
+def predict_diseases_batch(texts, model_pipeline, cascade=False):
+    """
+    Predicts diseases for many symptom strings at once.
+
+    All texts are cleaned first, then vectorized and classified with a single
+    ``transform`` and a single ``predict`` call over the whole sparse matrix.
+
+    Args:
+        texts (list of str): Symptom descriptions.
+        model_pipeline (dict): A dictionary containing the loaded model and vectorizer.
+        cascade (bool): Texts the structured first stage answers confidently skip the TF-IDF model.
+
+    Returns:
+        list of str: The predicted disease name for each text, in order.
+    """
+    if len(texts) == 0:
+        return []
+    with timed('batch_preprocess'):
+        cleaned = [preprocess_text(text) for text in texts]
+
+    results = structured_predictions_batch(cleaned, model_pipeline) if cascade else [None] * len(cleaned)
+    remaining = [i for i, result in enumerate(results) if result is None]
+    if not remaining:
+        return results
+
+    with timed('batch_vectorize'):
+        symptoms_tfidf = vectorize_symptoms([cleaned[i] for i in remaining], model_pipeline)
+    with timed('batch_model'):
+        predicted = model_pipeline['model'].predict(symptoms_tfidf)
+    for i, disease in zip(remaining, predicted):
+        results[i] = str(disease).title()
+    return results
+
+def rank_diseases_from_symptoms(symptoms_text, model_pipeline, k=5, cascade=False):
+    """
+    Ranks the k most likely diseases for a string of symptoms.
+
+    Args:
+        symptoms_text (str): A string containing symptoms.
+        model_pipeline (dict): A dictionary containing the loaded model and vectorizer,
+            plus an optional 'calibration' entry written by medicine_rec_train.py.
+        k (int): Number of candidates to return.
+        cascade (bool): Let the structured first stage answer first (see structured_candidates).
+
+    Returns:
+        list of dict: Candidates ordered best first, each with 'disease', the raw
+        decision 'score' and a calibrated 'confidence' (None if uncalibrated).
+    """
+    with timed('preprocess'):
+        cleaned_symptoms = preprocess_text(symptoms_text)
+    candidates = structured_candidates(cleaned_symptoms, model_pipeline, k) if cascade else None
+    if candidates is not None:
+        return candidates
+
+    with timed('cascade_tfidf'):
+        with timed('vectorize'):
+            symptoms_tfidf = vectorize_symptoms([cleaned_symptoms], model_pipeline)
+        model = model_pipeline['model']
+        with timed('model'):
+            scores = model.decision_function(symptoms_tfidf)
+            return top_k(scores, model.classes_, k, model_pipeline.get('calibration'))[0]
+
 # load databasedataset===================================
-sym_des = pd.read_csv(os.path.join(BASE_DIR, "symtoms_df.csv"))
-precautions = pd.read_csv(os.path.join(BASE_DIR, "precautions_df.csv"))
-workout = pd.read_csv(os.path.join(BASE_DIR, "workout_df.csv"))
-description = pd.read_csv(os.path.join(BASE_DIR, "description.csv"))
-medications = pd.read_csv(os.path.join(BASE_DIR, 'medications.csv'))
-diets = pd.read_csv(os.path.join(BASE_DIR, "diets.csv"))
-causes = pd.read_csv(os.path.join(BASE_DIR, "causes.csv"))
-
-# Load your new treatment lookup for enhanced recommendations
-try:
-    treatment_lookup = pd.read_csv(os.path.join(BASE_DIR, "treatment_lookup.csv"))
-    print("✅ Enhanced treatment lookup loaded successfully")
-except FileNotFoundError:
-    treatment_lookup = None
-    print("⚠️ Treatment lookup not found, using basic recommendations")
+# Datasets and the model are loaded lazily on first use (see resources.py);
+# set MEDI_WARMUP=1 or call warmup() to load everything up front.
+resources = ResourceRegistry()
+
+def _csv_loader(filename):
+    return lambda: pd.read_csv(os.path.join(BASE_DIR, filename))
+
+resources.register('precautions', _csv_loader("precautions_df.csv"))
+resources.register('workout', _csv_loader("workout_df.csv"))
+resources.register('description', _csv_loader("description.csv"))
+resources.register('medications', _csv_loader('medications.csv'))
+resources.register('diets', _csv_loader("diets.csv"))
+resources.register('causes', _csv_loader("causes.csv"))
+
+def load_treatment_lookup():
+    """Load your new treatment lookup for enhanced recommendations"""
+    try:
+        return pd.read_csv(os.path.join(BASE_DIR, "treatment_lookup.csv"))
+    except FileNotFoundError:
+        logger.warning("⚠️ Treatment lookup not found, using basic recommendations")
+        return None
+
+resources.register('treatment_lookup', load_treatment_lookup)
 
 # load new model===========================================
-try:
-    model_pipeline = joblib.load(os.path.join(BASE_DIR, 'disease_model.joblib'))
-    print("✅ New ML model loaded successfully from disease_model.joblib")
-except (FileNotFoundError, ImportError, Exception) as e:
-    print(f"⚠️ Warning: Could not load ML model ({e}). Using fallback mode.")
-    model_pipeline = None
+# The memory-mapped export written by medicine_rec_train.py is preferred: its
+# arrays are shared between worker processes instead of unpickled into each one,
+# and the NumPy inference engine serves it without importing scikit-learn.
+MODEL_ARTIFACT_DIR = os.environ.get('MODEL_ARTIFACT_DIR', os.path.join(BASE_DIR, 'disease_model_arrays'))
+
+def load_model_pipeline():
+    """Load the model from the memory-mapped artifact if it matches disease_model.joblib, else from the joblib."""
+    model_path = os.path.join(BASE_DIR, 'disease_model.joblib')
+    if os.path.isdir(MODEL_ARTIFACT_DIR):
+        if artifact_matches_source(MODEL_ARTIFACT_DIR, model_path):
+            try:
+                pipeline = load_inference_pipeline(MODEL_ARTIFACT_DIR)
+                logger.info("✅ ML model memory-mapped from %s", os.path.basename(MODEL_ARTIFACT_DIR))
+                return pipeline
+            except (OSError, ValueError) as e:
+                logger.warning("⚠️ Could not load model artifact (%s). Falling back to disease_model.joblib.", e)
+        else:
+            logger.warning("⚠️ Model artifact %s is stale (disease_model.joblib changed since export). "
+                           "Falling back to disease_model.joblib.", os.path.basename(MODEL_ARTIFACT_DIR))
+    import joblib
+    pipeline = joblib.load(model_path)
+    logger.info("✅ New ML model loaded successfully from disease_model.joblib")
+    return pipeline
+
+def _load_model_or_none():
+    try:
+        return load_model_pipeline()
+    except (FileNotFoundError, ImportError, Exception) as e:
+        logger.warning("⚠️ Warning: Could not load ML model (%s). Using fallback mode.", e)
+        return None
+
+resources.register('model', _load_model_or_none)
+
+def get_model_pipeline():
+    """The loaded model pipeline, or None when running in fallback mode."""
+    return resources.get('model')
+
+# Cascade first stage: a naive Bayes model over the Training.csv symptom IDs
+# answers inputs made only of known symptoms when it is at least
+# CASCADE_MIN_CONFIDENCE sure; everything else falls through to TF-IDF.
+CASCADE_ENABLED = os.environ.get('STRUCTURED_CASCADE', '1') == '1'
+CASCADE_MIN_CONFIDENCE = float(os.environ.get('CASCADE_MIN_CONFIDENCE', 0.9))
+
+def _load_symptom_classifier():
+    try:
+        classifier = StructuredSymptomClassifier.from_csv(os.path.join(BASE_DIR, 'Training.csv'))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("⚠️ Structured symptom classifier unavailable (%s); using TF-IDF only.", e)
+        return None
+    # Answer with the served model's class names where they match, else the recommendation tables' names
+    model_pipeline = resources.get('model')
+    labels = [str(c) for c in model_pipeline['model'].classes_] if model_pipeline is not None else []
+    labels += resources.get('description')['Disease'].dropna().tolist()
+    renamed = classifier.relabel(labels)
+    if renamed:
+        logger.info("Structured classifier labels mapped: %s", ", ".join(f"{a!r} -> {b!r}" for a, b in renamed.items()))
+    return classifier
+
+resources.register('symptom_classifier', _load_symptom_classifier)
+
+def _cascade_classifier(model_pipeline):
+    """The structured classifier, if the cascade is enabled and ``model_pipeline`` is the served model it maps onto."""
+    if not CASCADE_ENABLED or not _is_served_model(model_pipeline):
+        return None
+    return resources.get('symptom_classifier')
+
+def structured_candidates(cleaned_symptoms, model_pipeline, k=5):
+    """
+    Top-k candidates from the structured first stage, or None to fall through to TF-IDF.
+
+    Only the app's served model has a first stage: the classifier's labels are
+    mapped onto its classes, so any other pipeline always falls through.
+    """
+    classifier = _cascade_classifier(model_pipeline)
+    if classifier is None:
+        return None
+    with timed('cascade_structured'):
+        ids = classifier.encode(cleaned_symptoms)
+        candidates = classifier.rank(ids, k) if ids is not None else None
+    if candidates is None:
+        metrics.increment('medi_cascade_total', stage='tfidf', reason='unmapped')
+        return None
+    if candidates[0]['confidence'] < CASCADE_MIN_CONFIDENCE:
+        metrics.increment('medi_cascade_total', stage='tfidf', reason='low_confidence')
+        return None
+    metrics.increment('medi_cascade_total', stage='structured', reason='confident')
+    return candidates
+
+def structured_predictions_batch(cleaned_texts, model_pipeline):
+    """Structured first-stage answer of every text, None where it falls through to TF-IDF."""
+    results = [None] * len(cleaned_texts)
+    classifier = _cascade_classifier(model_pipeline)
+    if classifier is None:
+        return results
+    with timed('cascade_structured'):
+        positions, labels, confidences = classifier.best_batch(cleaned_texts)
+    confident = confidences >= CASCADE_MIN_CONFIDENCE
+    for position, label in zip(positions[confident].tolist(), labels[confident]):
+        results[position] = str(label).title()
+
+    counts = {'unmapped': len(cleaned_texts) - len(positions), 'low_confidence': int((~confident).sum())}
+    for reason, count in counts.items():
+        if count:
+            metrics.increment('medi_cascade_total', count, stage='tfidf', reason=reason)
+    if confident.any():
+        metrics.increment('medi_cascade_total', int(confident.sum()), stage='structured', reason='confident')
+    return results
+
+def cascade_stats():
+    """Share of predictions answered by each cascade stage and their latency."""
+    counts = {reason: metrics.counter_value('medi_cascade_total', stage=stage, reason=reason)
+              for stage, reason in (('structured', 'confident'), ('tfidf', 'unmapped'), ('tfidf', 'low_confidence'))}
+    total = sum(counts.values())
+
+    def latency(stage):
+        summary = metrics.summary('medi_stage_latency_seconds', stage=stage)
+        if summary is None or not summary.count:
+            return None
+        return {f'p{int(q * 100)}_ms': round(v * 1000, 4) for q, v in summary.quantiles().items()}
+
+    return {
+        'enabled': CASCADE_ENABLED,
+        'min_confidence': CASCADE_MIN_CONFIDENCE,
+        'requests': total,
+        'structured': {'hits': counts['confident'],
+                       'hit_rate': round(counts['confident'] / total, 4) if total else 0.0,
+                       'latency': latency('cascade_structured')},
+        'tfidf': {'unmapped': counts['unmapped'], 'low_confidence': counts['low_confidence'],
+                  'latency': latency('cascade_tfidf')},
+    }
+
+# Misspelled tokens ("hedache") are mapped to the closest vocabulary word before
+# vectorizing, instead of being dropped by transform (see spelling.py)
+SPELL_CORRECTION = os.environ.get('SPELL_CORRECTION', '1') == '1'
+SPELLING_MAX_DISTANCE = int(os.environ.get('SPELLING_MAX_DISTANCE', 2))
+SPELLING_CACHE_SIZE = int(os.environ.get('SPELLING_CACHE_SIZE', 4096))
+
+def _vocabulary_vectorizer():
+    """The loaded model's vectorizer if it has a vocabulary and idf, else None (hashing models have neither)."""
+    model_pipeline = resources.get('model')
+    if model_pipeline is None:
+        return None
+    vectorizer = model_pipeline['vectorizer']
+    if not hasattr(vectorizer, 'vocabulary_') or not hasattr(vectorizer, 'idf_'):
+        return None
+    return vectorizer
+
+def _build_spelling_corrector():
+    vectorizer = _vocabulary_vectorizer()
+    if vectorizer is None:
+        return None
+    return SpellingCorrector.from_vectorizer(vectorizer, max_distance=SPELLING_MAX_DISTANCE,
+                                             cache_size=SPELLING_CACHE_SIZE)
+
+resources.register('spelling_corrector', _build_spelling_corrector)
+
+def correct_spelling(cleaned_symptoms):
+    """``cleaned_symptoms`` with unknown tokens replaced by their closest vocabulary word."""
+    corrector = resources.get('spelling_corrector') if SPELL_CORRECTION else None
+    if corrector is None:
+        return cleaned_symptoms
+    with timed('spelling'):
+        corrected = corrector.correct(cleaned_symptoms)
+    if corrected != cleaned_symptoms:
+        metrics.increment('medi_spelling_corrections_total')
+    return corrected
+
+# Severity score and urgency level of the symptoms, from Symptom-severity.csv (see triage.py)
+def _load_triage():
+    try:
+        return SeverityTriage.from_csv(os.path.join(BASE_DIR, 'Symptom-severity.csv'))
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning("⚠️ Urgency triage unavailable (%s).", e)
+        return None
+
+resources.register('triage', _load_triage)
+
+def assess_urgency(symptoms_text):
+    """``{'level', 'score', 'symptoms', 'rules'}`` for a symptom description, or None without a severity table."""
+    triage = resources.get('triage')
+    if triage is None:
+        return None
+    with timed('triage'):
+        return triage.assess(symptoms_text)
+
+def assess_urgency_batch(texts):
+    """assess_urgency() for many texts, scored together."""
+    triage = resources.get('triage')
+    if triage is None:
+        return [None] * len(texts)
+    with timed('batch_triage'):
+        return triage.records(triage.assess_batch(texts))
+
+# Memoized text -> TF-IDF rows for the loaded model, typos corrected (see text_pipeline.py)
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 8192))
+
+def _build_token_encoder():
+    vectorizer = _vocabulary_vectorizer()
+    if vectorizer is None:
+        return None
+    corrector = resources.get('spelling_corrector') if SPELL_CORRECTION else None
+    return TokenEncoder(vectorizer, correct=corrector.correct if corrector is not None else None,
+                        cache_size=TOKEN_CACHE_SIZE)
+
+resources.register('token_encoder', _build_token_encoder)
+
+def _is_served_model(model_pipeline):
+    """Whether ``model_pipeline`` is the app's loaded model; never loads it."""
+    return resources.is_loaded('model') and resources.get('model') is model_pipeline
+
+def vectorize_symptoms(cleaned_texts, model_pipeline):
+    """
+    TF-IDF matrix of cleaned symptom texts.
+
+    Rows of the app's loaded model come from the token encoder's cache, with
+    typos corrected against its vocabulary. Any other pipeline (tests,
+    benchmarks) is vectorized directly with its own vectorizer, so the served
+    model is never loaded on its behalf.
+    """
+    if not _is_served_model(model_pipeline):
+        return model_pipeline['vectorizer'].transform(cleaned_texts)
+    encoder = resources.get('token_encoder')
+    if encoder is None:
+        return model_pipeline['vectorizer'].transform([correct_spelling(text) for text in cleaned_texts])
+    rows = [encoder.encode(text) for text in cleaned_texts]
+    corrected = sum(row.corrected for row in rows)
+    if corrected:
+        metrics.increment('medi_spelling_corrections_total', corrected)
+    return encoder.matrix(rows)
+
+def _build_symptom_suggester():
+    """Autocomplete index over the symptom tables, the Training.csv symptoms and the TF-IDF words (if any)."""
+    training_columns = pd.read_csv(os.path.join(BASE_DIR, 'Training.csv'), nrows=0).columns
+    return SymptomSuggester(symptom_phrases(
+        pd.read_csv(os.path.join(BASE_DIR, 'Symptom-severity.csv')),
+        pd.read_csv(os.path.join(BASE_DIR, 'symtoms_df.csv')),
+        _vocabulary_vectorizer(),
+        known_symptoms=[c for c in training_columns if c != LABEL_COLUMN],
+    ))
+
+resources.register('symptom_suggester', _build_symptom_suggester)
+
+def _build_recommendation_index():
+    """Build the disease -> recommendation index once instead of scanning every table per request"""
+    model_pipeline = resources.get('model') if resources.is_loaded('model') else None
+    return build_recommendation_index(
+        resources.get('description'), resources.get('precautions'), resources.get('medications'),
+        resources.get('diets'), resources.get('workout'), resources.get('causes'),
+        resources.get('treatment_lookup'),
+        diseases=[str(c).title() for c in model_pipeline['model'].classes_] if model_pipeline is not None else None,
+    )
+
+resources.register('recommendation_index', _build_recommendation_index)
+
+# disease -> compact JSON of its recommendations, filled on first use by /api/predict;
+# a resource so it is dropped together with the tables when they change
+resources.register('recommendation_json', dict)
+
+# Doctor/pharmacy search backend (PLACES_BACKEND=local|overpass); closed on reset so
+# the Overpass backend's event loop and HTTP session are not leaked
+resources.register('places', create_places_provider, close=lambda provider: provider.close())
+
+# Location search results per ~1 km cell; cleared (and the provider reloaded) when the places file changes
+geo_cache = GeoCache(
+    cell_deg=float(os.environ.get('GEO_CACHE_CELL_DEG', 0.01)),
+    maxsize=int(os.environ.get('GEO_CACHE_SIZE', 4096)),
+    ttl=float(os.environ.get('GEO_CACHE_TTL', 600)),
+    watcher=FileWatcher([os.environ.get('PLACES_FIXTURE', DEFAULT_FIXTURE)],
+                        check_interval=float(os.environ.get('GEO_CACHE_CHECK_INTERVAL', 5))),
+    on_invalidate=lambda: resources.reset(['places']),
+)
+
+# Set once warmup() has loaded everything; /ready reports 503 until then
+_warmup_complete = False
+
+def warmup():
+    """Eagerly load the model, datasets and recommendation index; returns per-resource load times (ms)."""
+    global _warmup_complete
+    timings = resources.warmup(['model'] + [name for name in resources.names() if name != 'model'])
+    _warmup_complete = True
+    logger.info("✅ Warmup complete: %s", ", ".join(f"{name} {ms:.1f} ms" for name, ms in timings.items()))
+    return timings
+
+def is_ready():
+    return _warmup_complete
 
 
 #============================================================
@@ -78,65 +446,34 @@ except (FileNotFoundError, ImportError, Exception) as e:
 #==========================helper funtions================
 def helper(dis):
     """Enhanced helper function with better disease matching"""
-    # Normalize disease name for better matching
-    dis_normalized = dis.lower().strip()
-    
-    # Try exact match first
-    desc_match = description[description['Disease'].str.lower() == dis_normalized]
-    if desc_match.empty:
-        # Try partial match
-        desc_match = description[description['Disease'].str.lower().str.contains(dis_normalized, regex=False, na=False)]
-    
-    if not desc_match.empty:
-        desc = desc_match['Description'].iloc[0]
-    else:
-        desc = f"Information about {dis} is being updated in our database."
-    
-    # Similar approach for other data
-    def safe_lookup(df, disease_col, disease_name, data_cols):
-        """Safely lookup data with fallback"""
-        exact_match = df[df[disease_col].str.lower() == disease_name.lower()]
-        if exact_match.empty:
-            partial_match = df[df[disease_col].str.lower().str.contains(disease_name.lower(), regex=False, na=False)]
-            if not partial_match.empty:
-                return partial_match[data_cols].iloc[0].dropna().tolist()
-            else:
-                return ["Consult a healthcare professional for specific guidance."]
-        return exact_match[data_cols].iloc[0].dropna().tolist()
-    
-    # Get precautions
-    pre = safe_lookup(precautions, 'Disease', dis, ['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4'])
-    
-    # Get medications
-    med = safe_lookup(medications, 'Disease', dis, ['Medication'])
-    
-    # Get diet
-    die = safe_lookup(diets, 'Disease', dis, ['Diet'])
-    
-    # Get workout
-    wrkout = safe_lookup(workout, 'disease', dis, ['workout'])
-    
-    # Get causes
-    causelist = safe_lookup(causes, 'Disease', dis, ['Cause_1', 'Cause_2', 'Cause_3', 'Cause_4', 'Cause_5'])
-    
-    # Try to get enhanced treatment info if available
-    if treatment_lookup is not None:
-        enhanced_match = treatment_lookup[treatment_lookup['Name'].str.lower().str.contains(dis.lower(), regex=False, na=False)]
-        if not enhanced_match.empty:
-            treatment_info = enhanced_match['Treatments'].iloc[0]
-            if pd.notna(treatment_info) and treatment_info.strip():
-                # Add enhanced treatment to medications if available
-                med.insert(0, f"Enhanced Treatment: {treatment_info}")
+    with timed('helper'):
+        return resources.get('recommendation_index').lookup(dis)
+
+def get_recommendations(disease):
+    """Cleaned recommendation lists for a disease, ready for the template or JSON."""
+    dis_des, precautions, medications, rec_diet, workout, disease_causes = helper(disease)
 
-    return desc, [pre], med, die, wrkout, causelist
+    def clean(values):
+        return [value for value in values if value and str(value).strip() and str(value) != 'nan']
+
+    return {
+        'description': dis_des,
+        'precautions': clean(precautions[0]) if precautions else [],
+        'medications': clean(medications),
+        'diet': clean(rec_diet),
+        'workout': clean(workout),
+        'causes': clean(disease_causes),
+    }
 
 # Model Prediction function - Updated for new ML model
 def get_predicted_value(patient_symptoms):
     """
     New prediction function using your trained joblib model
     """
+    model_pipeline = get_model_pipeline()
     if model_pipeline is None:
         # Fallback: return a sample disease for demonstration
+        metrics.increment('medi_fallback_predictions_total')
         if 'fever' in str(patient_symptoms).lower() or 'headache' in str(patient_symptoms).lower():
             return "Common Cold"
         elif 'stomach' in str(patient_symptoms).lower() or 'nausea' in str(patient_symptoms).lower():
@@ -149,12 +486,104 @@ def get_predicted_value(patient_symptoms):
     
     # Use the new model for prediction
     try:
-        predicted_disease = predict_disease_from_symptoms(symptoms_text, model_pipeline)
+        predicted_disease = predict_disease_from_symptoms(symptoms_text, model_pipeline, cascade=True)
         return predicted_disease
-    except Exception as e:
-        print(f"Prediction error: {e}")
+    except Exception:
+        metrics.increment('medi_errors_total', stage='predict')
+        logger.exception("Prediction error")
         return "Unable to predict. Please check your symptoms."
 
+# Ranked predictions with confidence scores
+TOP_K_CANDIDATES = int(os.environ.get('TOP_K_CANDIDATES', 5))
+# Calibrated confidence below which the recommendation lookup is skipped (0 disables)
+MIN_PREDICTION_CONFIDENCE = float(os.environ.get('MIN_PREDICTION_CONFIDENCE', 0.0))
+
+def get_ranked_predictions(symptoms_text, k=TOP_K_CANDIDATES):
+    """Top-k candidate diseases, or an empty list when the model is unavailable."""
+    model_pipeline = get_model_pipeline()
+    if model_pipeline is None:
+        return []
+    try:
+        return rank_diseases_from_symptoms(symptoms_text, model_pipeline, k, cascade=True)
+    except Exception:
+        metrics.increment('medi_errors_total', stage='rank')
+        logger.exception("Ranking error")
+        return []
+
+def is_low_confidence(candidates):
+    """True if the best candidate's calibrated confidence is below MIN_PREDICTION_CONFIDENCE."""
+    if not candidates or candidates[0]['confidence'] is None:
+        return False
+    return candidates[0]['confidence'] < MIN_PREDICTION_CONFIDENCE
+
+# Prediction cache ==========================================
+# Files whose changes invalidate cached predictions
+MODEL_FILES = [os.path.join(BASE_DIR, 'disease_model.joblib'), os.path.join(MODEL_ARTIFACT_DIR, 'meta.json')]
+DATA_FILES = [os.path.join(BASE_DIR, name) for name in (
+    'precautions_df.csv', 'workout_df.csv', 'description.csv',
+    'medications.csv', 'diets.csv', 'causes.csv', 'treatment_lookup.csv',
+    'Training.csv', 'Symptom-severity.csv', 'symtoms_df.csv',
+)]
+
+prediction_cache = LRUCache(
+    maxsize=int(os.environ.get('PREDICTION_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('PREDICTION_CACHE_TTL', 3600)),
+    watcher=FileWatcher(MODEL_FILES + DATA_FILES,
+                        check_interval=float(os.environ.get('PREDICTION_CACHE_CHECK_INTERVAL', 5))),
+    # Changed files also mean stale datasets/model: reload them on next use
+    on_invalidate=resources.reset,
+)
+
+_SYMPTOM_SEPARATORS = re.compile(r'\s*[,;]\s*')
+
+def canonical_symptoms(symptoms_text):
+    """
+    Canonical form of a symptom description, used as the prediction cache key.
+
+    The text is cleaned with preprocess_text, split into comma/semicolon separated
+    symptoms, and the symptoms are deduplicated and sorted, so "Headache, fever"
+    and "fever,headache, fever" share one entry.
+    """
+    symptoms = {symptom for symptom in _SYMPTOM_SEPARATORS.split(preprocess_text(symptoms_text)) if symptom}
+    return ', '.join(sorted(symptoms))
+
+def compute_prediction_payload(symptoms_text):
+    """
+    Everything /predict renders for a symptom description.
+
+    Returns a dict with 'predicted_disease', 'candidates', 'low_confidence',
+    'recommendations' (None for low-confidence predictions) and 'urgency'
+    (see assess_urgency), or a dict with only
+    an 'error' message if no prediction could be made.
+    """
+    candidates = get_ranked_predictions(symptoms_text)
+    if candidates:
+        predicted_disease = candidates[0]['disease']
+    else:
+        predicted_disease = get_predicted_value([symptoms_text])  # Pass as list for compatibility
+
+    if "not available" in predicted_disease.lower() or "unable to predict" in predicted_disease.lower():
+        return {'error': "Unable to predict disease. Please check your symptoms and try again."}
+
+    low_confidence = is_low_confidence(candidates)
+    return {
+        'predicted_disease': predicted_disease,
+        'candidates': candidates,
+        'low_confidence': low_confidence,
+        'recommendations': None if low_confidence else get_recommendations(predicted_disease),
+        'urgency': assess_urgency(symptoms_text),
+    }
+
+def get_prediction_payload(symptoms_text):
+    """compute_prediction_payload() for the canonical symptoms, served from the LRU cache."""
+    key = canonical_symptoms(symptoms_text)
+    payload = prediction_cache.get(key)
+    if payload is None:
+        payload = compute_prediction_payload(key)
+        if 'error' not in payload:
+            prediction_cache.set(key, payload)
+    return payload
+
 # Legacy function kept for compatibility (now uses new model)
 def get_predicted_value_legacy(patient_symptoms):
     """
@@ -169,12 +598,17 @@ def get_predicted_value_legacy(patient_symptoms):
 # creating routes========================================
 
 
+# Common symptoms shown as examples on the form
+COMMON_SYMPTOMS = ('itching', 'cough', 'high_fever', 'headache', 'stomach_pain', 'vomiting',
+                   'fatigue', 'chest_pain', 'nausea', 'dizziness', 'back_pain', 'joint_pain')
+
+def render_index(**context):
+    """index.html with the example symptoms."""
+    return render_template('index.html', common_symptoms=COMMON_SYMPTOMS, **context)
+
 @app.route("/")
 def index():
-    # Get some common symptoms to show as examples
-    common_symptoms = ['itching', 'cough', 'high_fever', 'headache', 'stomach_pain', 'vomiting', 
-                      'fatigue', 'chest_pain', 'nausea', 'dizziness', 'back_pain', 'joint_pain']
-    return render_template("index.html", common_symptoms=common_symptoms)
+    return render_index()
 
 @app.route('/symptoms')
 def show_symptoms():
@@ -182,70 +616,246 @@ def show_symptoms():
     return render_template("symptoms.html", 
                          info="Our new AI model can understand natural language symptom descriptions. Just describe how you feel!")
 
+@app.route('/symptoms/suggest')
+def suggest_symptoms():
+    """Typeahead: ``?q=<prefix>&limit=N`` returns known symptoms ranked by severity and frequency."""
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(1, int(request.args.get('limit', DEFAULT_LIMIT))), MAX_LIMIT)
+    except ValueError:
+        return jsonify({'success': False, 'error': 'limit must be a positive integer'}), 400
+    with timed('suggest'):
+        suggestions = resources.get('symptom_suggester').suggest(query, limit)
+    return jsonify({'query': query, 'suggestions': suggestions})
+
 # Define a route for the prediction
 @app.route('/predict', methods=['GET', 'POST'])
+@timed_function('request')
 def home():
     if request.method == 'POST':
         symptoms = request.form.get('symptoms')
-        print(f"Raw symptoms input: '{symptoms}'")
+        logger.debug("Raw symptoms input: %r", symptoms)
         
         if not symptoms or symptoms.strip() == "" or symptoms == "Symptoms":
             message = "Please enter your symptoms to get a medical prediction."
-            common_symptoms = ['itching', 'cough', 'high_fever', 'headache', 'stomach_pain', 'vomiting', 
-                              'fatigue', 'chest_pain', 'nausea', 'dizziness', 'back_pain', 'joint_pain']
-            return render_template('index.html', message=message, common_symptoms=common_symptoms)
+            return render_index(message=message)
 
         try:
             # Use the new model for prediction - it handles natural language input
-            predicted_disease = get_predicted_value([symptoms])  # Pass as list for compatibility
-            
-            if "not available" in predicted_disease.lower() or "unable to predict" in predicted_disease.lower():
-                message = "Unable to predict disease. Please check your symptoms and try again."
-                common_symptoms = ['itching', 'cough', 'high_fever', 'headache', 'stomach_pain', 'vomiting', 
-                                  'fatigue', 'chest_pain', 'nausea', 'dizziness', 'back_pain', 'joint_pain']
-                return render_template('index.html', message=message, common_symptoms=common_symptoms)
-            
-            print(f"✅ Predicted disease: {predicted_disease}")
+            payload = get_prediction_payload(symptoms)
+
+            if 'error' in payload:
+                message = payload['error']
+                return render_index(message=message)
+
+            predicted_disease = payload['predicted_disease']
+            candidates = payload['candidates']
+            logger.debug("✅ Predicted disease: %s", predicted_disease)
+
+            if payload['low_confidence']:
+                # Not confident enough to recommend anything; show the candidates instead
+                message = "We could not confidently identify a condition from these symptoms. Possible matches are listed below; please consult a doctor."
+                return render_index(message=message, candidates=candidates, user_symptoms=symptoms,
+                                    urgency=payload['urgency'])
             
-            # Get additional information about the disease
-            dis_des, precautions, medications, rec_diet, workout, disease_causes = helper(predicted_disease)
-
-            my_precautions = []
-            if precautions and len(precautions) > 0:
-                for i in precautions[0]:
-                    if i and str(i).strip() and str(i) != 'nan':  # Only add non-empty precautions
-                        my_precautions.append(i)
-
-            # Prepare clean data for template
-            clean_medications = [med for med in medications if med and str(med).strip() and str(med) != 'nan']
-            clean_diet = [diet for diet in rec_diet if diet and str(diet).strip() and str(diet) != 'nan']
-            clean_workout = [work for work in workout if work and str(work).strip() and str(work) != 'nan']
-            clean_causes = [cause for cause in disease_causes if cause and str(cause).strip() and str(cause) != 'nan']
-
-            return render_template('index.html', 
-                                   predicted_disease=predicted_disease, 
-                                   dis_des=dis_des,
-                                   my_precautions=my_precautions, 
-                                   medications=clean_medications, 
-                                   my_diet=clean_diet,
-                                   workout=clean_workout,
-                                   disease_causes=clean_causes,
-                                   user_symptoms=symptoms)
-
-        except Exception as e:
-            print(f"❌ Prediction error: {e}")
+            # Additional information about the disease
+            recommendations = payload['recommendations']
+
+            with timed('render'):
+                return render_template('index.html', 
+                                       predicted_disease=predicted_disease, 
+                                       dis_des=recommendations['description'],
+                                       my_precautions=recommendations['precautions'], 
+                                       medications=recommendations['medications'], 
+                                       my_diet=recommendations['diet'],
+                                       workout=recommendations['workout'],
+                                       disease_causes=recommendations['causes'],
+                                       candidates=candidates,
+                                       urgency=payload['urgency'],
+                                       user_symptoms=symptoms)
+
+        except Exception:
+            metrics.increment('medi_errors_total', stage='request')
+            logger.exception("❌ Prediction error")
             message = f"An error occurred during prediction. Please try again with different symptoms."
-            common_symptoms = ['itching', 'cough', 'high_fever', 'headache', 'stomach_pain', 'vomiting', 
-                              'fatigue', 'chest_pain', 'nausea', 'dizziness', 'back_pain', 'joint_pain']
-            return render_template('index.html', message=message, common_symptoms=common_symptoms)
+            return render_index(message=message)
 
     # GET request - show the form
-    common_symptoms = ['itching', 'cough', 'high_fever', 'headache', 'stomach_pain', 'vomiting', 
-                      'fatigue', 'chest_pain', 'nausea', 'dizziness', 'back_pain', 'joint_pain']
-    return render_template('index.html', common_symptoms=common_symptoms)
+    return render_index()
 
 
 
+# Ranked candidates as JSON
+@app.route('/predict/candidates', methods=['POST'])
+def predict_candidates():
+    """
+    Return the top-k candidate diseases with scores for a symptom description.
+
+    Accepts JSON ``{"symptoms": "...", "k": 5}`` (or the same fields as form data).
+    """
+    data = request.get_json(silent=True) or request.form
+    symptoms = data.get('symptoms')
+    if not isinstance(symptoms, str) or not symptoms.strip():
+        return jsonify({'success': False, 'error': 'Symptoms are required'}), 400
+    if get_model_pipeline() is None:
+        return jsonify({'success': False, 'error': 'The prediction model is not available'}), 503
+
+    try:
+        k = max(1, int(data.get('k', TOP_K_CANDIDATES)))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'k must be a positive integer'}), 400
+
+    candidates = get_ranked_predictions(symptoms, k)
+    if not candidates:
+        return jsonify({'success': False, 'error': 'An error occurred during prediction.'}), 500
+
+    return jsonify({
+        'success': True,
+        'symptoms': symptoms,
+        'calibrated': candidates[0]['confidence'] is not None,
+        'low_confidence': is_low_confidence(candidates),
+        'candidates': candidates,
+    })
+
+def _compact_json(value):
+    return app.json.dumps(value, separators=(',', ':'))
+
+def recommendations_json(disease):
+    """get_recommendations() serialized once per disease."""
+    serialized = resources.get('recommendation_json')
+    try:
+        return serialized[disease]
+    except KeyError:
+        fragment = serialized[disease] = _compact_json(get_recommendations(disease))
+        return fragment
+
+# Prediction as compact JSON, without template rendering
+@app.route('/api/predict', methods=['POST'])
+@timed_function('request')
+def api_predict():
+    """
+    Predict a disease for a symptom description and return it as JSON.
+
+    Accepts JSON ``{"symptoms": "..."}`` (or form data) and returns the predicted
+    disease, the ranked candidates, the low-confidence flag, the urgency and the
+    recommendations (null for low-confidence predictions).
+    """
+    data = request.get_json(silent=True) or request.form
+    symptoms = data.get('symptoms')
+    if not isinstance(symptoms, str) or not symptoms.strip():
+        return jsonify({'success': False, 'error': 'Symptoms are required'}), 400
+
+    try:
+        payload = get_prediction_payload(symptoms)
+    except Exception:
+        metrics.increment('medi_errors_total', stage='request')
+        logger.exception("❌ Prediction error")
+        return jsonify({'success': False, 'error': 'An error occurred during prediction.'}), 500
+    if 'error' in payload:
+        return jsonify({'success': False, 'error': payload['error']}), 500
+
+    disease = payload['predicted_disease']
+    recommendations = 'null' if payload['low_confidence'] else recommendations_json(disease)
+    body = (f'{{"success":true,"predicted_disease":{_compact_json(disease)},'
+            f'"low_confidence":{_compact_json(payload["low_confidence"])},'
+            f'"candidates":{_compact_json(payload["candidates"])},'
+            f'"urgency":{_compact_json(payload["urgency"])},'
+            f'"recommendations":{recommendations}}}')
+    return Response(body, mimetype='application/json')
+
+# Prediction cache statistics
+@app.route('/cache/stats')
+def cache_stats():
+    """Hit, miss and eviction counters of the prediction cache."""
+    return jsonify(prediction_cache.stats())
+
+@app.route('/cache/geo/stats')
+def geo_cache_stats():
+    """Hit ratio and upstream calls saved by the location search cache."""
+    return jsonify(geo_cache.stats())
+
+@app.route('/cascade/stats')
+def cascade_stats_endpoint():
+    """Hit rate and latency of the structured first stage and the TF-IDF fallback."""
+    return jsonify(cascade_stats())
+
+# Readiness probe for load balancers and serve.py
+@app.route('/ready')
+def ready():
+    """200 once warmup() has loaded every resource, 503 before that."""
+    body = {'ready': is_ready(), 'pid': os.getpid(),
+            'resources': {name: round(ms, 1) for name, ms in resources.timings().items()}}
+    return jsonify(body), 200 if body['ready'] else 503
+
+# Prometheus-style metrics
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage latencies, error counters, cache and resource stats in text exposition format."""
+    cache = prediction_cache.stats()
+    gauges = [
+        ('medi_prediction_cache_hits', {}, cache['hits']),
+        ('medi_prediction_cache_misses', {}, cache['misses']),
+        ('medi_prediction_cache_evictions', {}, cache['evictions']),
+        ('medi_prediction_cache_size', {}, cache['size']),
+    ]
+    geo = geo_cache.stats()
+    gauges += [
+        ('medi_geo_cache_hits', {}, geo['results']['hits']),
+        ('medi_geo_cache_misses', {}, geo['results']['misses']),
+        ('medi_geo_cache_size', {}, geo['results']['size']),
+    ]
+    gauges += [('medi_resource_load_seconds', {'resource': name}, round(ms / 1000, 6))
+               for name, ms in resources.timings().items()]
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+# Batch prediction route for intake systems
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """
+    Predict diseases for a JSON batch of symptom descriptions.
+
+    Expects ``{"symptoms": ["fever, headache", ...]}`` and returns one result per
+    entry, in order, with its urgency and the recommendations for the predicted disease.
+    """
+    data = request.get_json(silent=True) or {}
+    texts = data.get('symptoms')
+
+    if not isinstance(texts, list) or not texts:
+        return jsonify({'success': False, 'error': 'A non-empty "symptoms" list is required'}), 400
+    if len(texts) > MAX_BATCH_SIZE:
+        return jsonify({'success': False, 'error': f'Batch size is limited to {MAX_BATCH_SIZE} entries'}), 413
+
+    valid_rows = [i for i, text in enumerate(texts) if isinstance(text, str) and text.strip()]
+    valid_texts = [texts[i] for i in valid_rows]
+
+    try:
+        model_pipeline = get_model_pipeline()
+        if model_pipeline is not None:
+            predicted = predict_diseases_batch(valid_texts, model_pipeline, cascade=True)
+        else:
+            predicted = [get_predicted_value([text]) for text in valid_texts]
+        urgency = assess_urgency_batch(valid_texts)
+    except Exception:
+        metrics.increment('medi_errors_total', stage='batch')
+        logger.exception("❌ Batch prediction error")
+        return jsonify({'success': False, 'error': 'An error occurred during batch prediction.'}), 500
+
+    # Each distinct disease is looked up once per batch
+    recommendations = {disease: get_recommendations(disease) for disease in set(predicted)}
+
+    results = [{'symptoms': text, 'error': 'Symptoms are required'} for text in texts]
+    for row, disease, row_urgency in zip(valid_rows, predicted, urgency):
+        results[row] = {'symptoms': texts[row], 'predicted_disease': disease, 'urgency': row_urgency,
+                        **recommendations[disease]}
+
+    return jsonify({
+        'success': True,
+        'count': len(results),
+        'predictions': results,
+    })
+
 # about view funtion and path
 @app.route('/about')
 def about():
@@ -265,12 +875,25 @@ def developer():
 def blog():
     return render_template("blog.html")
 
+MAX_PLACES_RADIUS_KM = 50
+
+def place_filters(data):
+    """Optional place search parameters of a request: radius_km, type (str or list) and open_now."""
+    filters = {}
+    if data.get('radius_km') is not None:
+        filters['radius_m'] = min(float(data['radius_km']), MAX_PLACES_RADIUS_KM) * 1000
+    if data.get('type'):
+        filters['types'] = data['type'] if isinstance(data['type'], str) else list(data['type'])
+    if data.get('open_now') is not None:
+        filters['open_now'] = bool(data['open_now'])
+    return filters
+
 # Find nearby doctors/clinics route
 @app.route('/find-doctors', methods=['POST'])
 def find_doctors():
     """
     Endpoint to find nearby doctors/clinics based on user's location
-    Uses Google Places API
+    Uses the configured places provider (see places_provider.py)
     """
     try:
         data = request.get_json()
@@ -280,82 +903,21 @@ def find_doctors():
         if not latitude or not longitude:
             return jsonify({'error': 'Location coordinates are required'}), 400
         
-        # In a production environment, you would use Google Places API here
-        # For now, we'll return mock data that you can replace with actual API calls
-        
-        # Example of what the Google Places API call would look like:
-        # import requests
-        # API_KEY = 'YOUR_GOOGLE_MAPS_API_KEY'
-        # url = f'https://maps.googleapis.com/maps/api/place/nearbysearch/json'
-        # params = {
-        #     'location': f'{latitude},{longitude}',
-        #     'radius': 5000,  # 5km radius
-        #     'type': 'doctor|hospital|health',
-        #     'key': API_KEY
-        # }
-        # response = requests.get(url, params=params)
-        # places = response.json().get('results', [])
-        
-        # Mock data for demonstration (replace with actual API call)
-        mock_doctors = [
-            {
-                'name': 'City Medical Center',
-                'address': '123 Main Street',
-                'phone': '+1 (555) 123-4567',
-                'rating': 4.5,
-                'distance': '0.8 km',
-                'type': 'Hospital',
-                'open_now': True
-            },
-            {
-                'name': 'Dr. Sarah Johnson - General Physician',
-                'address': '456 Oak Avenue',
-                'phone': '+1 (555) 234-5678',
-                'rating': 4.8,
-                'distance': '1.2 km',
-                'type': 'Clinic',
-                'open_now': True
-            },
-            {
-                'name': 'HealthCare Plus Clinic',
-                'address': '789 Pine Road',
-                'phone': '+1 (555) 345-6789',
-                'rating': 4.3,
-                'distance': '1.5 km',
-                'type': 'Clinic',
-                'open_now': False
-            },
-            {
-                'name': 'Emergency Medical Services',
-                'address': '321 Elm Street',
-                'phone': '+1 (555) 456-7890',
-                'rating': 4.6,
-                'distance': '2.1 km',
-                'type': 'Hospital',
-                'open_now': True
-            },
-            {
-                'name': 'Dr. Michael Chen - Specialist',
-                'address': '654 Maple Drive',
-                'phone': '+1 (555) 567-8901',
-                'rating': 4.9,
-                'distance': '2.8 km',
-                'type': 'Clinic',
-                'open_now': True
-            }
-        ]
+        with timed('places'):
+            doctors = geo_cache.nearby(resources.get('places'), latitude, longitude, 'doctor', **place_filters(data))
         
         return jsonify({
             'success': True,
-            'doctors': mock_doctors,
+            'doctors': doctors,
             'location': {
                 'latitude': latitude,
                 'longitude': longitude
             }
         })
         
-    except Exception as e:
-        print(f"Error finding doctors: {e}")
+    except Exception:
+        metrics.increment('medi_errors_total', stage='find_doctors')
+        logger.exception("Error finding doctors")
         return jsonify({'error': 'An error occurred while searching for doctors'}), 500
 
 # Pharmacy search route
@@ -375,7 +937,7 @@ def pharmacy_search():
             if not latitude or not longitude:
                 return jsonify({'success': False, 'error': 'Invalid coordinates'})
             
-            pharmacies = search_pharmacies_by_coordinates(latitude, longitude)
+            pharmacies = search_pharmacies_by_coordinates(latitude, longitude, **place_filters(data))
             
         elif search_type == 'city':
             city = data.get('city')
@@ -383,7 +945,9 @@ def pharmacy_search():
             if not city:
                 return jsonify({'success': False, 'error': 'City name is required'})
             
-            pharmacies = search_pharmacies_by_city(city)
+            filters = place_filters(data)
+            filters.pop('radius_m', None)
+            pharmacies = search_pharmacies_by_city(city, **filters)
             
         else:
             return jsonify({'success': False, 'error': 'Invalid search type'})
@@ -394,101 +958,32 @@ def pharmacy_search():
             'count': len(pharmacies)
         })
         
-    except Exception as e:
-        print(f"❌ Pharmacy search error: {e}")
+    except Exception:
+        metrics.increment('medi_errors_total', stage='pharmacy_search')
+        logger.exception("❌ Pharmacy search error")
         return jsonify({
             'success': False,
             'error': 'Failed to search pharmacies. Please try again.'
         })
 
-def search_pharmacies_by_coordinates(lat, lng):
-    """
-    Search for pharmacies using coordinates
-    For now, this returns sample data. In production, you would use Google Places API or similar.
-    """
-    # Sample data for demonstration
-    sample_pharmacies = [
-        {
-            'name': 'HealthPlus Pharmacy',
-            'address': f'123 Main St, Near ({lat:.4f}, {lng:.4f})',
-            'phone': '+1-555-0123',
-            'rating': 4.5,
-            'distance': '0.2 miles'
-        },
-        {
-            'name': 'MediCare Drugstore',
-            'address': f'456 Oak Ave, Near ({lat:.4f}, {lng:.4f})',
-            'phone': '+1-555-0456',
-            'rating': 4.2,
-            'distance': '0.5 miles'
-        },
-        {
-            'name': 'Quick Pharmacy',
-            'address': f'789 Pine Rd, Near ({lat:.4f}, {lng:.4f})',
-            'phone': '+1-555-0789',
-            'rating': 4.0,
-            'distance': '0.8 miles'
-        }
-    ]
-    
-    # TODO: Replace with actual API call
-    # Example: Google Places API, Yelp API, or OpenStreetMap Overpass API
-    # places_url = f"https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-    # params = {
-    #     'location': f'{lat},{lng}',
-    #     'radius': 5000,
-    #     'type': 'pharmacy',
-    #     'key': 'YOUR_GOOGLE_PLACES_API_KEY'
-    # }
-    
-    return sample_pharmacies
-
-def search_pharmacies_by_city(city):
-    """
-    Search for pharmacies using city name
-    For now, this returns sample data. In production, you would geocode the city first.
-    """
-    # Sample data for demonstration
-    sample_pharmacies = [
-        {
-            'name': f'{city} Central Pharmacy',
-            'address': f'100 Central St, {city}',
-            'phone': '+1-555-1000',
-            'rating': 4.3,
-            'distance': '1.2 miles'
-        },
-        {
-            'name': f'{city} Family Drugstore',
-            'address': f'250 Market St, {city}',
-            'phone': '+1-555-2500',
-            'rating': 4.1,
-            'distance': '1.8 miles'
-        },
-        {
-            'name': f'Express Pharmacy - {city}',
-            'address': f'380 Broadway, {city}',
-            'phone': '+1-555-3800',
-            'rating': 4.4,
-            'distance': '2.1 miles'
-        },
-        {
-            'name': f'{city} Medical Pharmacy',
-            'address': f'500 Health Plaza, {city}',
-            'phone': '+1-555-5000',
-            'rating': 4.6,
-            'distance': '2.5 miles'
-        }
-    ]
-    
-    # TODO: Replace with actual API implementation
-    # 1. Geocode city name to get coordinates
-    # 2. Use coordinates to search for nearby pharmacies
-    # geocoding_url = f"https://maps.googleapis.com/maps/api/geocode/json"
-    # places_url = f"https://maps.googleapis.com/maps/api/place/nearbysearch/json"
-    
-    return sample_pharmacies
+@timed_function('places')
+def search_pharmacies_by_coordinates(lat, lng, **filters):
+    """
+    Search for pharmacies around the given coordinates, nearest first.
+    """
+    return geo_cache.nearby(resources.get('places'), lat, lng, 'pharmacy', **filters)
 
+@timed_function('places')
+def search_pharmacies_by_city(city, **filters):
+    """
+    Search for pharmacies in the named city (geocoded by network backends).
+    """
+    return geo_cache.in_city(resources.get('places'), city, 'pharmacy', **filters)
+
+if os.environ.get('MEDI_WARMUP') == '1':
+    warmup()
 
-if __name__ == '__main__':
 
+if __name__ == '__main__':
+    # Development server only; use serve.py in production
     app.run(debug=True)
\ No newline at end of file
@@ -1,15 +1,7 @@
 import joblib
-import re
 import pandas as pd
 
-def preprocess_text(text):
-    """Cleans and standardizes text for prediction."""
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
+from text_pipeline import preprocess_text
 
 def predict_disease_from_symptoms(symptoms_text, model_pipeline):
     """
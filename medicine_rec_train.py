@@ -1,40 +1,112 @@
 import pandas as pd
-import re
+import os
+import hashlib
 import joblib
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.svm import LinearSVC
-from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
-from imblearn.over_sampling import SMOTE
+from sklearn.metrics import accuracy_score, classification_report
+import argparse
 import warnings
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+
+from balancing import BALANCING_STRATEGIES, DEFAULT_F1_TOLERANCE, compare_strategies, fit_balanced, format_comparison
+from calibration import fit_temperature
+from error_analysis import DEFAULT_REPORT_PATH, DEFAULT_TOP_N, error_report, write_error_report
+from model_artifact import export_model_artifact
+from text_pipeline import normalize_series, preprocess_text
 
 warnings.filterwarnings('ignore')
 
 # --- 1. Data Loading and Preprocessing ---
 
-def preprocess_text(text):
-    """Cleans and standardizes text for modeling."""
-    if not isinstance(text, str):
-        return ""
-    text = text.lower()
-    text = re.sub(r'\[.*?\]', '', text)
-    text = re.sub(r'\s+', ' ', text).strip()
-    return text
-
-def load_training_data():
-    """Loads, merges, and cleans the training data from multiple sources."""
-    print("--- Loading Training Data ---")
-    
+LARGE_TRAIN_FILE = 'train-00000-of-00001.csv'
+TEST_FILE = 'test-00000-of-00001.csv'
+TRAINING_SOURCES = [LARGE_TRAIN_FILE, 'Diseases_Symptoms.csv', 'disease_diagnosis.csv']
+
+# Bump when the cleaning/merging logic changes so stale caches are not reused
+PIPELINE_VERSION = 1
+TRAINING_CACHE_DIR = os.path.join('.cache', 'training')
+# Below this many rows, process start-up costs more than parallel cleaning saves
+PARALLEL_MIN_ROWS = 50000
+
+def preprocess_series(series, n_jobs=1):
+    """
+    Vectorized preprocess_text over a Series, split across ``n_jobs`` processes for large inputs.
+    """
+    series = series.astype(object)
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1 or len(series) < PARALLEL_MIN_ROWS:
+        return normalize_series(series)
+
+    bounds = np.linspace(0, len(series), n_jobs + 1, dtype=int)
+    chunks = [series.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])]
+    with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+        return pd.concat(list(pool.map(normalize_series, chunks)))
+
+def join_symptom_columns(df, columns):
+    """Vectorized ``', '.join(row.dropna())`` over ``columns``."""
+    joined = pd.Series('', index=df.index, dtype=object)
+    started = pd.Series(False, index=df.index)
+    for col in columns:
+        values = df[col]
+        present = values.notna()
+        separator = np.where(started & present, ', ', '')
+        joined = joined + separator + values.where(present, '').astype(str)
+        started |= present
+    return joined
+
+def _file_digest(paths):
+    """Content hash of the given files (missing files hash as absent)."""
+    digest = hashlib.blake2b(f'v{PIPELINE_VERSION}'.encode(), digest_size=16)
+    for path in paths:
+        digest.update(path.encode())
+        if not os.path.exists(path):
+            digest.update(b'<missing>')
+            continue
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _frame_digest(*parts):
+    """Content hash of Series/DataFrames and plain values."""
+    digest = hashlib.blake2b(f'v{PIPELINE_VERSION}'.encode(), digest_size=16)
+    for part in parts:
+        if isinstance(part, (pd.Series, pd.DataFrame)):
+            digest.update(pd.util.hash_pandas_object(part, index=False).values.tobytes())
+        else:
+            digest.update(repr(part).encode())
+    return digest.hexdigest()
+
+def cached_stage(name, key, compute, cache_dir):
+    """Return ``compute()``, reusing the result stored for ``key`` under ``cache_dir`` if present."""
+    if not cache_dir:
+        return compute()
+    path = os.path.join(cache_dir, f'{name}-{key}.joblib')
+    if os.path.exists(path):
+        print(f"Using cached {name} ({os.path.basename(path)})")
+        return joblib.load(path)
+    value = compute()
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    joblib.dump(value, tmp_path)
+    os.replace(tmp_path, path)
+    return value
+
+def _extract_symptoms(df):
+    """Pull the symptom phrase out of the 'text' column of the HF-style CSVs."""
+    df['symptoms'] = df['text'].str.extract(r'symptoms: (.*?)\s*may indicate', expand=False)
+    df = df[['symptoms', 'diagnosis']].dropna()
+    return df.rename(columns={'diagnosis': 'disease'})
+
+def _load_training_corpus(n_jobs):
     # Load the large training dataset
-    large_train_file = 'train-00000-of-00001.csv'
     try:
-        print(f"Loading {large_train_file}...")
-        df1 = pd.read_csv(large_train_file)
-        df1['symptoms'] = df1['text'].str.extract(r'symptoms: (.*?)\s*may indicate', expand=False)
-        df1 = df1[['symptoms', 'diagnosis']].dropna()
-        df1.rename(columns={'diagnosis': 'disease'}, inplace=True)
+        print(f"Loading {LARGE_TRAIN_FILE}...")
+        df1 = _extract_symptoms(pd.read_csv(LARGE_TRAIN_FILE))
     except FileNotFoundError:
-        print(f"Warning: '{large_train_file}' not found. Skipping.")
+        print(f"Warning: '{LARGE_TRAIN_FILE}' not found. Skipping.")
         df1 = pd.DataFrame(columns=['symptoms', 'disease'])
 
     # Load second dataset
@@ -49,8 +121,7 @@ def load_training_data():
     # Load third dataset
     try:
         df3 = pd.read_csv('disease_diagnosis.csv')
-        symptom_cols = ['Symptom_1', 'Symptom_2', 'Symptom_3']
-        df3['symptoms'] = df3[symptom_cols].apply(lambda row: ', '.join(row.dropna()), axis=1)
+        df3['symptoms'] = join_symptom_columns(df3, ['Symptom_1', 'Symptom_2', 'Symptom_3'])
         df3 = df3[['symptoms', 'Diagnosis']].dropna()
         df3.rename(columns={'Diagnosis': 'disease'}, inplace=True)
     except FileNotFoundError:
@@ -61,8 +132,8 @@ def load_training_data():
     train_df = pd.concat([df1, df2, df3], ignore_index=True)
     
     # Preprocess text
-    train_df['symptoms'] = train_df['symptoms'].apply(preprocess_text)
-    train_df['disease'] = train_df['disease'].apply(preprocess_text)
+    train_df['symptoms'] = preprocess_series(train_df['symptoms'], n_jobs)
+    train_df['disease'] = preprocess_series(train_df['disease'], n_jobs)
     train_df = train_df[train_df['symptoms'] != '']
 
     # Filter rare diseases based *only* on training data
@@ -72,64 +143,131 @@ def load_training_data():
     original_rows = len(train_df)
     train_df = train_df[train_df['disease'].isin(diseases_to_keep)]
     print(f"Removed {original_rows - len(train_df)} rows belonging to rare diseases from training data.")
-    
+    return train_df, diseases_to_keep
+
+def load_training_data(n_jobs=1, cache_dir=None):
+    """
+    Loads, merges, and cleans the training data from multiple sources.
+
+    Args:
+        n_jobs (int): Processes used for text cleaning (-1 for all cores).
+        cache_dir (str, optional): Reuse the cleaned corpus cached here while
+            the source files are unchanged.
+    """
+    print("--- Loading Training Data ---")
+    key = _file_digest(TRAINING_SOURCES)
+    train_df, diseases_to_keep = cached_stage('training-corpus', key, lambda: _load_training_corpus(n_jobs), cache_dir)
     print(f"Total training data records: {len(train_df)}")
     return train_df, diseases_to_keep
 
-def load_testing_data(diseases_to_keep):
+def _load_testing_corpus(diseases_to_keep, n_jobs):
+    test_df = _extract_symptoms(pd.read_csv(TEST_FILE))
+
+    # Preprocess text
+    test_df['symptoms'] = preprocess_series(test_df['symptoms'], n_jobs)
+    test_df['disease'] = preprocess_series(test_df['disease'], n_jobs)
+
+    # Filter test data to only include diseases present in the training set
+    original_rows = len(test_df)
+    test_df = test_df[test_df['disease'].isin(diseases_to_keep)]
+    print(f"Removed {original_rows - len(test_df)} rows from test data for diseases not in the training set.")
+    return test_df
+
+def load_testing_data(diseases_to_keep, n_jobs=1, cache_dir=None):
     """Loads and cleans the testing data, ensuring it aligns with training data."""
     print("\n--- Loading Testing Data ---")
-    test_file = 'test-00000-of-00001.csv'
     try:
-        test_df = pd.read_csv(test_file)
-        test_df['symptoms'] = test_df['text'].str.extract(r'symptoms: (.*?)\s*may indicate', expand=False)
-        test_df = test_df[['symptoms', 'diagnosis']].dropna()
-        test_df.rename(columns={'diagnosis': 'disease'}, inplace=True)
-        
-        # Preprocess text
-        test_df['symptoms'] = test_df['symptoms'].apply(preprocess_text)
-        test_df['disease'] = test_df['disease'].apply(preprocess_text)
-        
-        # Filter test data to only include diseases present in the training set
-        original_rows = len(test_df)
-        test_df = test_df[test_df['disease'].isin(diseases_to_keep)]
-        print(f"Removed {original_rows - len(test_df)} rows from test data for diseases not in the training set.")
-
+        key = _file_digest([TEST_FILE]) + _frame_digest(pd.Series(sorted(diseases_to_keep)))
+        test_df = cached_stage('testing-corpus', key, lambda: _load_testing_corpus(diseases_to_keep, n_jobs), cache_dir)
         print(f"Total testing data records: {len(test_df)}")
         return test_df
     except FileNotFoundError:
-        print(f"Error: Test file '{test_file}' not found. Cannot proceed with evaluation.")
+        print(f"Error: Test file '{TEST_FILE}' not found. Cannot proceed with evaluation.")
         return pd.DataFrame()
 
 # --- 2. Model Training ---
 
-def train_and_evaluate(X_train, y_train, X_test, y_test):
-    """Trains the model, evaluates it, and saves it."""
+VECTORIZER_PARAMS = {'stop_words': 'english', 'max_features': 5000, 'ngram_range': (1, 2)}
+# Share of every class held out of training for calibration and the balancing comparison
+DEFAULT_VALIDATION_FRACTION = 0.2
+
+def vectorize(X_train, X_test, cache_dir=None, params=None):
+    """
+    Fit the TF-IDF vectorizer; the fitted vectorizer and both matrices are cached per corpus.
+
+    Args:
+        params (dict, optional): TfidfVectorizer settings (default VECTORIZER_PARAMS).
+    """
+    params = VECTORIZER_PARAMS if params is None else params
+
+    def fit():
+        vectorizer = TfidfVectorizer(**params)
+        X_train_tfidf = vectorizer.fit_transform(X_train)
+        return vectorizer, X_train_tfidf, vectorizer.transform(X_test)
+
+    key = _frame_digest(X_train, X_test, sorted(params.items()))
+    return cached_stage('tfidf', key, fit, cache_dir)
+
+def validation_split(y, fraction=DEFAULT_VALIDATION_FRACTION, seed=42):
+    """
+    Stratified boolean mask of the training rows held out for validation.
+
+    About ``fraction`` of every class is held out, but each class keeps at least
+    one training row, so a model fitted on the rest knows every held-out label.
+    """
+    rng = np.random.default_rng(seed)
+    _, positions, counts = np.unique(np.asarray(y), return_inverse=True, return_counts=True)
+    held_per_class = np.minimum(np.round(counts * fraction).astype(int), counts - 1)
+    # Rank of each row inside its class after a random shuffle
+    order = np.lexsort((rng.random(len(positions)), positions))
+    ranks = np.empty(len(positions), dtype=int)
+    ranks[order] = np.arange(len(positions)) - np.repeat(np.cumsum(counts) - counts, counts)
+    return ranks < held_per_class[positions]
+
+def fit_calibration(X_train, y_train, balancing='smote', seed=42):
+    """
+    Fit the softmax temperature on a validation split of the training data.
+
+    A second model is trained like the final one on the remaining rows and the
+    temperature is fitted on its scores for the held-out rows, so the test set
+    stays untouched for evaluation.
+    """
+    y_train = np.asarray(y_train)
+    holdout = validation_split(y_train, seed=seed)
+    model, _ = fit_balanced(X_train[~holdout], y_train[~holdout], balancing, seed)
+    class_index = {label: i for i, label in enumerate(model.classes_)}
+    true_indices = np.array([class_index[label] for label in y_train[holdout]])
+    return fit_temperature(model.decision_function(X_train[holdout]), true_indices)
+
+def train_and_evaluate(X_train, y_train, X_test, y_test, calibrate=True, cache_dir=None, balancing='smote',
+                       compare_balancing=False, f1_tolerance=DEFAULT_F1_TOLERANCE,
+                       error_report_path=DEFAULT_REPORT_PATH):
+    """
+    Trains the model, evaluates it, and saves it.
+
+    Args:
+        balancing (str): Class-balancing strategy (see balancing.py).
+        compare_balancing (bool): Measure every strategy on a validation split first and train
+            with the fastest one whose macro-F1 is within ``f1_tolerance`` of the best.
+        error_report_path (str): Where the JSON error analysis is written (None to skip).
+    """
     
     print("\n--- Model Training and Evaluation ---")
     print("Vectorizing text data...")
-    vectorizer = TfidfVectorizer(stop_words='english', max_features=5000, ngram_range=(1, 2))
-    X_train_tfidf = vectorizer.fit_transform(X_train)
-    X_test_tfidf = vectorizer.transform(X_test)
-
-    print("Applying SMOTE to handle data imbalance...")
-    class_counts = y_train.value_counts()
-    min_class_count = class_counts.min()
-
-    if min_class_count > 1:
-        k_neighbors_dynamic = min_class_count - 1
-        print(f"Smallest class has {min_class_count} samples. Setting SMOTE k_neighbors to {k_neighbors_dynamic}.")
-        smote = SMOTE(random_state=42, k_neighbors=k_neighbors_dynamic)
-        X_train_resampled, y_train_resampled = smote.fit_resample(X_train_tfidf, y_train)
-        print(f"Data resampled. Original train size: {X_train_tfidf.shape[0]}, Resampled train size: {X_train_resampled.shape[0]}")
-    else:
-        print("Skipping SMOTE: The smallest class has only 1 sample, not enough for resampling.")
-        X_train_resampled, y_train_resampled = X_train_tfidf, y_train
+    vectorizer, X_train_tfidf, X_test_tfidf = vectorize(X_train, X_test, cache_dir)
+
+    if compare_balancing:
+        print("\n--- Balancing Strategy Comparison ---")
+        # Chosen on a validation split; the test set is only scored below, for the chosen strategy
+        comparison = compare_strategies(X_train_tfidf, y_train, validation_split(y_train), tolerance=f1_tolerance)
+        print(format_comparison(comparison))
+        balancing = comparison['chosen']
 
     # Using our best performing model: LinearSVC
-    print("Training the LinearSVC model...")
-    model = LinearSVC(random_state=42)
-    model.fit(X_train_resampled, y_train_resampled)
+    print(f"Training the LinearSVC model with '{balancing}' class balancing...")
+    model, stats = fit_balanced(X_train_tfidf, y_train, balancing)
+    print(f"Balanced in {stats['balance_seconds']:.2f}s ({X_train_tfidf.shape[0]} -> {stats['train_rows']} rows), "
+          f"fitted in {stats['fit_seconds']:.2f}s")
 
     # Evaluation
     print("\n--- Model Evaluation ---")
@@ -141,33 +279,85 @@ def train_and_evaluate(X_train, y_train, X_test, y_test):
     print(classification_report(y_test, y_pred, zero_division=0))
 
     # Confusion Matrix Analysis
-    print("\n--- Confusion Matrix Analysis (Top 15 Errors) ---")
-    labels = sorted(list(set(y_test) | set(y_pred)))
-    cm = confusion_matrix(y_test, y_pred, labels=labels)
-    errors = []
-    for i, true_label in enumerate(labels):
-        for j, predicted_label in enumerate(labels):
-            if i != j and cm[i, j] > 0:
-                errors.append((true_label, predicted_label, cm[i, j]))
-    errors.sort(key=lambda x: x[2], reverse=True)
-    
-    if not errors:
+    print(f"\n--- Confusion Matrix Analysis (Top {DEFAULT_TOP_N} Errors) ---")
+    report = error_report(y_test, y_pred)
+    if not report['top_confusions']:
         print("No misclassifications found on the test set!")
     else:
         print("Actual Disease -> Predicted Disease (Count of Errors)")
         print("-" * 50)
-        for true, pred, count in errors[:15]:
-            print(f"{true} -> {pred} ({count})")
+        for error in report['top_confusions']:
+            print(f"{error['true']} -> {error['predicted']} ({error['count']})")
+        print(f"{len(report['clusters'])} confusion clusters (diseases mixed up at least twice)")
+    if error_report_path:
+        write_error_report(report, error_report_path)
+        print(f"Error report written to '{error_report_path}'")
 
     # Save the Model and Vectorizer
     model_pipeline = { 'model': model, 'vectorizer': vectorizer }
+
+    if calibrate:
+        # Fit a softmax temperature on validation scores so serving can report confidences
+        print("\n--- Confidence Calibration ---")
+        calibration = fit_calibration(X_train_tfidf, y_train, balancing)
+        model_pipeline['calibration'] = calibration
+        print(f"Softmax temperature: {calibration['temperature']:.4f} (validation NLL {calibration['nll']:.4f})")
     joblib.dump(model_pipeline, 'disease_model.joblib')
     print("\nModel and vectorizer saved to 'disease_model.joblib'")
 
+    # Memory-mappable copy for fast, shared loading in the web workers
+    export_model_artifact(model_pipeline, 'disease_model_arrays', source='disease_model.joblib')
+    print("Model arrays exported to 'disease_model_arrays/'")
+
 
 if __name__ == '__main__':
-    train_df, diseases_to_keep = load_training_data()
-    test_df = load_testing_data(diseases_to_keep)
+    parser = argparse.ArgumentParser(description="Train the disease prediction model.")
+    parser.add_argument('--no-calibration', action='store_true',
+                        help="Skip fitting the confidence calibration used for top-k scores.")
+    parser.add_argument('--n-jobs', type=int, default=-1,
+                        help="Processes used to clean large corpora (-1: all cores).")
+    parser.add_argument('--cache-dir', default=TRAINING_CACHE_DIR,
+                        help="Where cleaned corpora and TF-IDF matrices are cached.")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="Recompute every stage instead of reusing cached results.")
+    parser.add_argument('--balancing', choices=BALANCING_STRATEGIES, default=None,
+                        help="Class-balancing strategy for the in-memory LinearSVC "
+                             "(default: smote, or class_weight with --sweep).")
+    parser.add_argument('--compare-balancing', action='store_true',
+                        help="Time every balancing strategy and train with the fastest one within --f1-tolerance.")
+    parser.add_argument('--f1-tolerance', type=float, default=DEFAULT_F1_TOLERANCE,
+                        help="Allowed macro-F1 drop from the best strategy when comparing.")
+    parser.add_argument('--error-report', default=DEFAULT_REPORT_PATH,
+                        help="JSON file for the confusion/per-class error analysis.")
+    sweep = parser.add_argument_group('hyperparameter / model-family sweep')
+    sweep.add_argument('--sweep', action='store_true',
+                       help="Evaluate a grid of vectorizer settings and linear models and print a leaderboard.")
+    sweep.add_argument('--sweep-models', nargs='+', default=None, metavar='MODEL',
+                       help="Model families to sweep (default: all of linear_svc, logistic_regression, sgd, complement_nb).")
+    sweep.add_argument('--sweep-output', default='sweep_results.csv', help="Where the leaderboard CSV is written.")
+    streaming = parser.add_argument_group('streaming (out-of-core) training')
+    streaming.add_argument('--streaming', action='store_true',
+                           help="Stream the CSVs in chunks and train an SGD linear SVM with partial_fit.")
+    streaming.add_argument('--chunksize', type=int, default=50000, help="Rows per chunk.")
+    streaming.add_argument('--epochs', type=int, default=5, help="Passes over the training stream.")
+    streaming.add_argument('--vectorizer', choices=['vocabulary', 'hashing'], default='vocabulary',
+                           help="Two-pass TF-IDF vocabulary (exportable) or hashing trick.")
+    streaming.add_argument('--baseline', choices=['fit', 'saved', 'none'], default='fit',
+                           help="LinearSVC baseline to report accuracy against.")
+    args = parser.parse_args()
+    cache_dir = None if args.no_cache else args.cache_dir
+
+    if args.streaming:
+        import json
+        from streaming_train import train_streaming
+
+        report = train_streaming(chunksize=args.chunksize, epochs=args.epochs, vectorizer_kind=args.vectorizer,
+                                 baseline=args.baseline, calibrate=not args.no_calibration)
+        print(json.dumps(report, indent=2))
+        raise SystemExit(0)
+
+    train_df, diseases_to_keep = load_training_data(args.n_jobs, cache_dir)
+    test_df = load_testing_data(diseases_to_keep, args.n_jobs, cache_dir)
 
     if not train_df.empty and not test_df.empty:
         # Ensure test set doesn't have labels the training set has never seen
@@ -179,7 +369,22 @@ if __name__ == '__main__':
         X_test = test_df['symptoms']
         y_test = test_df['disease']
         
-        train_and_evaluate(X_train, y_train, X_test, y_test)
+        if args.sweep:
+            from sweep import MODEL_FAMILIES, format_leaderboard, run_sweep, write_leaderboard
+
+            # SMOTE would be paid once per vectorizer setting; weight rows unless asked otherwise
+            results = run_sweep(X_train, y_train, X_test, y_test, models=args.sweep_models or tuple(MODEL_FAMILIES),
+                                balancing=args.balancing or 'class_weight', n_jobs=args.n_jobs, cache_dir=cache_dir)
+            print("\n--- Sweep Leaderboard ---")
+            print(format_leaderboard(results))
+            write_leaderboard(results, args.sweep_output)
+            print(f"\nLeaderboard written to '{args.sweep_output}'")
+            raise SystemExit(0)
+
+        train_and_evaluate(X_train, y_train, X_test, y_test, calibrate=not args.no_calibration,
+                           cache_dir=cache_dir, balancing=args.balancing or 'smote',
+                           compare_balancing=args.compare_balancing, f1_tolerance=args.f1_tolerance,
+                           error_report_path=args.error_report)
     else:
         print("Training or testing data is empty. Halting execution.")
 
@@ -0,0 +1,167 @@
+"""
+Lightweight latency and error metrics with Prometheus text exposition.
+
+Stages of the request path are wrapped in ``timed('stage')``. Each stage keeps
+a count, a running sum and a bounded window of recent samples, from which
+p50/p95/p99 are computed when ``/metrics`` is scraped. Counters track errors
+and fallback-mode predictions. A sampled fraction of timings is also written
+as one-line JSON records to the ``medi_recommend.timing`` logger.
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+timing_logger = logging.getLogger('medi_recommend.timing')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+class LatencySummary:
+    """Count, sum and a sliding window of recent observations (seconds)."""
+
+    def __init__(self, window=2048):
+        self.count = 0
+        self.total = 0.0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self._samples.append(seconds)
+
+    def quantiles(self, quantiles=QUANTILES):
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64, count=len(self._samples))
+        if not len(samples):
+            return {q: float('nan') for q in quantiles}
+        return dict(zip(quantiles, np.quantile(samples, quantiles).tolist()))
+
+
+class MetricsRegistry:
+    """Named counters and latency summaries, keyed by (name, labels)."""
+
+    def __init__(self, window=2048, log_sample_rate=0.0):
+        self.window = window
+        self.log_sample_rate = log_sample_rate
+        self._counters = {}
+        self._summaries = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name, help_text):
+        self._help[name] = help_text
+
+    def increment(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        summary = self._summaries.get(key)
+        if summary is None:
+            with self._lock:
+                summary = self._summaries.setdefault(key, LatencySummary(self.window))
+        summary.observe(seconds)
+
+        if self.log_sample_rate and random.random() < self.log_sample_rate:
+            timing_logger.info(json.dumps({'event': 'timing', 'metric': name, **labels,
+                                           'ms': round(seconds * 1000, 3)}))
+
+    def counter_value(self, name, **labels):
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def summary(self, name, **labels):
+        return self._summaries.get((name, tuple(sorted(labels.items()))))
+
+    def render(self, gauges=()):
+        """
+        Prometheus text exposition of all metrics.
+
+        Args:
+            gauges (iterable): Extra ``(name, labels_dict, value)`` samples computed at scrape time.
+        """
+        lines = []
+
+        def header(name, kind):
+            if name in self._help:
+                lines.append(f'# HELP {name} {self._help[name]}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        seen = set()
+        for (name, labels), value in sorted(self._counters.items()):
+            if name not in seen:
+                header(name, 'counter')
+                seen.add(name)
+            lines.append(f'{name}{_format_labels(labels)} {value}')
+
+        for (name, labels), summary in sorted(self._summaries.items(), key=lambda item: item[0]):
+            if name not in seen:
+                header(name, 'summary')
+                seen.add(name)
+            for quantile, value in summary.quantiles().items():
+                lines.append(f'{name}{_format_labels(labels + (("quantile", quantile),))} {value:.6g}')
+            lines.append(f'{name}_sum{_format_labels(labels)} {summary.total:.6g}')
+            lines.append(f'{name}_count{_format_labels(labels)} {summary.count}')
+
+        for name, labels, value in gauges:
+            if name not in seen:
+                header(name, 'gauge')
+                seen.add(name)
+            lines.append(f'{name}{_format_labels(tuple(sorted(labels.items())))} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry(
+    window=int(os.environ.get('METRICS_WINDOW', 2048)),
+    log_sample_rate=float(os.environ.get('TIMING_LOG_SAMPLE_RATE', 0.01)),
+)
+metrics.describe('medi_stage_latency_seconds', 'Latency of each stage of the prediction path.')
+metrics.describe('medi_errors_total', 'Errors by stage.')
+metrics.describe('medi_fallback_predictions_total', 'Predictions answered by the keyword fallback (no model).')
+metrics.describe('medi_cascade_total', 'Predictions by cascade stage (structured first stage or TF-IDF) and reason.')
+metrics.describe('medi_spelling_corrections_total', 'Inputs changed by typo correction before vectorizing.')
+
+
+@contextmanager
+def timed(stage):
+    """Record the duration of the ``with`` block as ``medi_stage_latency_seconds{stage=...}``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe('medi_stage_latency_seconds', time.perf_counter() - start, stage=stage)
+
+
+def timed_function(stage):
+    """Decorator form of ``timed``."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
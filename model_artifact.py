@@ -0,0 +1,239 @@
+"""
+Memory-mappable model artifact.
+
+``disease_model.joblib`` pickles the whole TfidfVectorizer (vocabulary dict,
+idf vector) and the LinearSVC weights, so every worker unpickles and owns a
+private copy. ``export_model_artifact`` writes the same information as plain
+``.npy`` arrays plus a small JSON file:
+
+    disease_model_arrays/
+        meta.json      vectorizer settings, stop words, classes, calibration
+        terms.npy      vocabulary terms (UTF-8, fixed width) in feature order
+        idf.npy        idf weights, (n_features,)
+        coef_t.npy     model weights transposed, (n_features, n_classes)
+        intercept.npy  (n_classes,)
+
+``load_model_artifact`` opens the arrays with ``np.load(mmap_mode='r')``: they
+are not copied into the process, and forked workers share the same page-cache
+pages. ``to_sklearn_pipeline`` wraps the mapped arrays back into the
+``{'model', 'vectorizer'}`` dict the app already uses.
+
+When exported next to a joblib file, ``meta.json`` records that file's SHA-256
+so ``artifact_matches_source`` can tell a stale artifact (the joblib was
+retrained or updated without re-exporting) from a current one.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+
+ARTIFACT_FORMAT_VERSION = 1
+
+# TfidfVectorizer settings that are needed to reproduce its transform
+_VECTORIZER_PARAMS = (
+    'analyzer', 'binary', 'lowercase', 'max_df', 'max_features', 'min_df', 'ngram_range', 'norm',
+    'smooth_idf', 'stop_words', 'strip_accents', 'sublinear_tf', 'token_pattern', 'use_idf',
+)
+
+
+class ModelArtifact:
+    """Memory-mapped model arrays and their metadata."""
+
+    def __init__(self, directory, meta, terms, idf, coef_t, intercept):
+        self.directory = directory
+        self.meta = meta
+        self.terms = terms
+        self.idf = idf
+        self.coef_t = coef_t
+        self.intercept = intercept
+
+    @property
+    def classes(self):
+        return self.meta['classes']
+
+    @property
+    def calibration(self):
+        return self.meta.get('calibration')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _vectorizer_meta(vectorizer):
+    params = vectorizer.get_params()
+    if params.get('tokenizer') is not None or params.get('preprocessor') is not None:
+        raise ValueError("Vectorizers with a custom tokenizer or preprocessor cannot be exported.")
+    if params.get('analyzer') != 'word':
+        raise ValueError("Only word analyzers can be exported.")
+
+    meta = {name: params[name] for name in _VECTORIZER_PARAMS}
+    meta['ngram_range'] = list(meta['ngram_range'])
+    if meta['stop_words'] is not None and not isinstance(meta['stop_words'], str):
+        meta['stop_words'] = sorted(meta['stop_words'])
+    meta['dtype'] = np.dtype(params['dtype']).name
+    stop_words = vectorizer.get_stop_words()
+    meta['stop_words_list'] = sorted(stop_words) if stop_words else []
+    return meta
+
+
+def export_model_artifact(model_pipeline, directory, source=None):
+    """
+    Write the vectorizer and linear model of ``model_pipeline`` as a memory-mappable artifact.
+
+    Args:
+        model_pipeline (dict): The pipeline saved to disease_model.joblib.
+        directory (str): Output directory; replaced atomically if it exists.
+        source (str, optional): The joblib file ``model_pipeline`` was saved to;
+            its hash is recorded so a stale artifact can be detected.
+
+    Raises:
+        ValueError: If the vectorizer has no vocabulary (e.g. HashingVectorizer)
+            or the model is not a linear classifier.
+    """
+    vectorizer = model_pipeline['vectorizer']
+    model = model_pipeline['model']
+    if not hasattr(vectorizer, 'vocabulary_') or not hasattr(vectorizer, 'idf_'):
+        raise ValueError("Only fitted TfidfVectorizer pipelines can be exported.")
+    if not hasattr(model, 'coef_') or not hasattr(model, 'intercept_'):
+        raise ValueError("Only linear models with coef_ and intercept_ can be exported.")
+
+    terms = vectorizer.get_feature_names_out()
+    encoded = [term.encode('utf-8') for term in terms]
+    coef = np.asarray(model.coef_, dtype=np.float64)
+    intercept = np.atleast_1d(np.asarray(model.intercept_, dtype=np.float64))
+
+    meta = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'n_features': len(terms),
+        'n_classes': len(model.classes_),
+        'classes': [str(label) for label in model.classes_],
+        'vectorizer': _vectorizer_meta(vectorizer),
+        'calibration': model_pipeline.get('calibration'),
+        'lineage': model_pipeline.get('lineage', []),
+    }
+    if source is not None:
+        meta['source'] = {'path': os.path.basename(source), 'sha256': file_sha256(source)}
+
+    directory = os.path.abspath(directory)
+    parent = os.path.dirname(directory)
+    staging = tempfile.mkdtemp(prefix='.artifact-', dir=parent)
+    try:
+        np.save(os.path.join(staging, 'terms.npy'), np.array(encoded, dtype=f'S{max(map(len, encoded), default=1)}'))
+        np.save(os.path.join(staging, 'idf.npy'), np.asarray(vectorizer.idf_, dtype=np.float64))
+        # Transposed so a row gather by feature id yields all class weights at once
+        np.save(os.path.join(staging, 'coef_t.npy'), np.ascontiguousarray(coef.T))
+        np.save(os.path.join(staging, 'intercept.npy'), intercept)
+        with open(os.path.join(staging, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=2)
+
+        if os.path.exists(directory):
+            retired = directory + '.old'
+            shutil.rmtree(retired, ignore_errors=True)
+            os.replace(directory, retired)
+            os.replace(staging, directory)
+            shutil.rmtree(retired, ignore_errors=True)
+        else:
+            os.replace(staging, directory)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+    return directory
+
+
+def remove_model_artifact(directory):
+    """
+    Delete an artifact that no longer matches its joblib. Returns whether one existed.
+
+    The directory is renamed first, so a loader never sees it half deleted.
+    """
+    if not os.path.isdir(directory):
+        return False
+    retired = os.path.abspath(directory) + '.old'
+    shutil.rmtree(retired, ignore_errors=True)
+    os.replace(directory, retired)
+    shutil.rmtree(retired, ignore_errors=True)
+    return True
+
+
+def artifact_matches_source(directory, source):
+    """
+    Whether the artifact in ``directory`` was exported from the current ``source`` joblib.
+
+    Compares the recorded SHA-256 when there is one; artifacts exported without
+    a source must be at least as new as the joblib. Always true when the joblib
+    does not exist, and false when the artifact has no readable meta.json.
+    """
+    if not os.path.exists(source):
+        return True
+    meta_path = os.path.join(directory, 'meta.json')
+    try:
+        with open(meta_path) as f:
+            recorded = json.load(f).get('source')
+    except (OSError, ValueError):
+        return False
+    if recorded and recorded.get('sha256'):
+        return recorded['sha256'] == file_sha256(source)
+    return os.path.getmtime(meta_path) >= os.path.getmtime(source)
+
+
+def load_model_artifact(directory, mmap_mode='r'):
+    """
+    Open an exported artifact. Arrays are memory-mapped read-only by default.
+
+    Raises:
+        FileNotFoundError: If the directory or one of its files is missing.
+        ValueError: If the artifact was written by an unknown format version.
+    """
+    with open(os.path.join(directory, 'meta.json')) as f:
+        meta = json.load(f)
+    if meta.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported model artifact version: {meta.get('format_version')}")
+
+    def load(name):
+        return np.load(os.path.join(directory, name), mmap_mode=mmap_mode, allow_pickle=False)
+
+    return ModelArtifact(directory, meta, load('terms.npy'), load('idf.npy'),
+                         load('coef_t.npy'), load('intercept.npy'))
+
+
+def to_sklearn_pipeline(artifact):
+    """
+    Rebuild the ``{'model', 'vectorizer'}`` pipeline around the mapped arrays.
+
+    The model weights stay memory-mapped (``coef_`` is a transposed view);
+    only the vocabulary dict is materialized per process.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.svm import LinearSVC
+
+    params = dict(artifact.meta['vectorizer'])
+    params.pop('stop_words_list')
+    params['ngram_range'] = tuple(params['ngram_range'])
+    params['dtype'] = np.dtype(params['dtype']).type
+
+    vectorizer = TfidfVectorizer(**params)
+    vectorizer.vocabulary_ = {term.decode('utf-8'): i for i, term in enumerate(artifact.terms.tolist())}
+    vectorizer.idf_ = artifact.idf
+
+    model = LinearSVC()
+    model.coef_ = artifact.coef_t.T
+    model.intercept_ = artifact.intercept
+    model.classes_ = np.array(artifact.classes, dtype=object)
+    model.n_features_in_ = artifact.meta['n_features']
+
+    pipeline = {'model': model, 'vectorizer': vectorizer}
+    if artifact.calibration is not None:
+        pipeline['calibration'] = artifact.calibration
+    return pipeline
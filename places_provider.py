@@ -0,0 +1,452 @@
+"""
+Place search (doctors, clinics, pharmacies) behind a pluggable provider.
+
+``/find-doctors`` and ``/pharmacy_search`` ask a provider instead of building
+results themselves. The backend is chosen with ``PLACES_BACKEND``:
+
+    local     (default) serves a local places file (``places.csv`` fixture,
+              or any CSV/Parquet such as an OSM extract) from an in-memory
+              spatial index; no network.
+    overpass  queries OpenStreetMap's Overpass API (and Nominatim to geocode
+              city names) with aiohttp.
+
+Every provider returns plain dicts in the shape the templates already render:
+
+    {'name', 'address', 'phone', 'rating', 'distance', 'distance_km', 'type', 'open_now',
+     'latitude', 'longitude'}
+
+Network backends run on one asyncio event loop in a background thread and
+share a pooled HTTP session with per-request timeouts. Concurrent identical
+queries are coalesced: the first caller starts the upstream request, later
+callers with the same (rounded) query await the same future, so a burst of
+users in one area costs a single upstream call.
+"""
+
+import abc
+import asyncio
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from spatial_index import SpatialIndex, haversine_km
+
+
+logger = logging.getLogger('medi_recommend.places')
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_FIXTURE = os.path.join(BASE_DIR, 'places.csv')
+
+CATEGORIES = ('doctor', 'pharmacy')
+DEFAULT_RADIUS_M = 15000
+DEFAULT_LIMIT = 20
+
+# Coordinates are rounded to this many decimals (~110 m) before coalescing
+COALESCE_DECIMALS = 3
+
+
+def format_distance(km):
+    return f'{km:.1f} km'
+
+
+def _check_category(category):
+    if category not in CATEGORIES:
+        raise ValueError(f"Unknown place category: {category!r}")
+
+
+def _match(value, wanted):
+    if wanted is None:
+        return True
+    if isinstance(wanted, (list, tuple, set, frozenset)):
+        return value in wanted
+    return value == wanted
+
+
+def filter_places(places, types=None, open_now=None):
+    """Keep the place records matching ``types`` (a type or collection of types) and ``open_now``."""
+    if types is None and open_now is None:
+        return places
+    return [place for place in places
+            if _match(place['type'], types) and _match(place['open_now'], open_now)]
+
+
+class PlacesProvider(abc.ABC):
+    """Interface of a place search backend."""
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def nearby(self, latitude, longitude, category, radius_m=DEFAULT_RADIUS_M, limit=DEFAULT_LIMIT,
+               types=None, open_now=None):
+        """
+        Places of ``category`` within ``radius_m`` of a point, nearest first.
+
+        Args:
+            category (str): 'doctor' (doctors, clinics, hospitals) or 'pharmacy'.
+            types (str or list, optional): Only these place types (e.g. 'Hospital').
+            open_now (bool, optional): Only places that are (or are not) open now.
+
+        Returns:
+            list of dict: Place records (see module docstring).
+        """
+
+    @abc.abstractmethod
+    def in_city(self, city, category, limit=DEFAULT_LIMIT, types=None, open_now=None):
+        """Places of ``category`` in the named city."""
+
+    def close(self):
+        pass
+
+
+PLACE_COLUMNS = ('name', 'category', 'latitude', 'longitude')
+
+# Former and colloquial names, keyed by normalized spelling
+CITY_ALIASES = {
+    'bangalore': 'bengaluru',
+    'bombay': 'mumbai',
+    'new delhi': 'delhi',
+    'nyc': 'new york',
+    'new york city': 'new york',
+    'calcutta': 'kolkata',
+    'madras': 'chennai',
+}
+
+
+def normalize_city(name):
+    """Case-, accent-, punctuation- and whitespace-insensitive city key, with aliases resolved."""
+    text = unicodedata.normalize('NFKD', name)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).casefold()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return CITY_ALIASES.get(text, text)
+
+
+def load_places(path):
+    """
+    Read a places file (CSV, or Parquet if the name ends in .parquet).
+
+    Required columns are name, category ('doctor' or 'pharmacy'), latitude and
+    longitude; type, address, city, phone, rating and open_now are optional.
+
+    Raises:
+        ValueError: If a required column is missing.
+    """
+    df = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    missing = [column for column in PLACE_COLUMNS if column not in df.columns]
+    if missing:
+        raise ValueError(f"{path} is missing column(s): {', '.join(missing)}")
+
+    df = df.dropna(subset=['latitude', 'longitude']).reset_index(drop=True)
+    df['category'] = df['category'].str.strip().str.lower()
+    if 'type' not in df.columns:
+        df['type'] = np.where(df['category'] == 'pharmacy', 'Pharmacy', 'Doctor')
+    for column in ('address', 'city', 'phone'):
+        df[column] = df[column].fillna('') if column in df.columns else ''
+    if 'rating' not in df.columns:
+        df['rating'] = np.nan
+    if 'open_now' in df.columns:
+        # True/False, or None when the file has no information
+        flags = df['open_now'].astype(str).str.strip().str.lower()
+        df['open_now'] = flags.map({'true': True, '1': True, 'yes': True,
+                                    'false': False, '0': False, 'no': False}).astype(object)
+        df['open_now'] = df['open_now'].where(df['open_now'].notna(), None)
+    else:
+        df['open_now'] = None
+    df['city_key'] = df['city'].astype(str).map(normalize_city)
+    return df
+
+
+class LocalPlacesProvider(PlacesProvider):
+    """Serves places from a local file through a SpatialIndex."""
+
+    name = 'local'
+
+    def __init__(self, path=DEFAULT_FIXTURE, cell_deg=0.05):
+        df = load_places(path)
+        self.places = df
+        self.index = SpatialIndex(df['latitude'], df['longitude'], cell_deg=cell_deg, attributes={
+            'category': df['category'], 'type': df['type'], 'open_now': df['open_now'],
+        })
+
+    def _records(self, positions, distances):
+        rows = self.places.iloc[positions]
+        records = []
+        for row, km in zip(rows.itertuples(index=False), distances):
+            records.append({
+                'name': row.name,
+                'address': row.address,
+                'phone': row.phone,
+                'rating': None if pd.isna(row.rating) else float(row.rating),
+                'distance': format_distance(km),
+                'distance_km': round(float(km), 3),
+                'type': row.type,
+                'open_now': row.open_now,
+                'latitude': float(row.latitude),
+                'longitude': float(row.longitude),
+            })
+        return records
+
+    def nearby(self, latitude, longitude, category, radius_m=DEFAULT_RADIUS_M, limit=DEFAULT_LIMIT,
+               types=None, open_now=None):
+        _check_category(category)
+        positions, distances = self.index.radius(float(latitude), float(longitude), radius_m / 1000.0,
+                                                 limit=limit, category=category, type=types,
+                                                 open_now=open_now)
+        return self._records(positions, distances)
+
+    def in_city(self, city, category, limit=DEFAULT_LIMIT, types=None, open_now=None):
+        _check_category(category)
+        df = self.places
+        matches = df[(df['city_key'] == normalize_city(city)) & (df['category'] == category)]
+        if matches.empty:
+            return []
+        # Distances from the city's centroid so results are still ordered sensibly
+        distances = haversine_km(matches['latitude'].mean(), matches['longitude'].mean(),
+                                 matches['latitude'].to_numpy(), matches['longitude'].to_numpy())
+        order = np.argsort(distances, kind='stable')
+        places = self._records(matches.index.to_numpy()[order], distances[order])
+        return filter_places(places, types, open_now)[:limit]
+
+
+class AsyncPlacesProvider(PlacesProvider):
+    """
+    Base for network backends: a background event loop plus request coalescing.
+
+    Subclasses implement the coroutines ``fetch_nearby`` and ``geocode``; the
+    synchronous ``nearby``/``in_city`` called from Flask threads submit work to
+    the loop and wait for it with ``timeout`` seconds.
+    """
+
+    def __init__(self, timeout=10.0):
+        self.timeout = timeout
+        self._loop = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._inflight = {}
+        self.upstream_calls = 0
+        self.coalesced_calls = 0
+
+    # --- event loop -------------------------------------------------------
+
+    def _ensure_loop(self):
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name=f'places-{self.name}', daemon=True)
+                thread.start()
+                self._thread = thread
+                self._loop = loop
+        return self._loop
+
+    def _run(self, coroutine):
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop())
+        try:
+            return future.result(self.timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    async def coalesce(self, key, factory):
+        """
+        Await ``factory()`` once per ``key`` among concurrent callers.
+
+        Runs on the event loop thread, so ``_inflight`` needs no lock.
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            self.upstream_calls += 1
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced_calls += 1
+        # shield: one caller timing out must not cancel the shared request
+        return await asyncio.shield(task)
+
+    # --- to implement -----------------------------------------------------
+
+    @abc.abstractmethod
+    async def fetch_nearby(self, latitude, longitude, category, radius_m):
+        """All places of ``category`` around a point, as place records with ``distance_km``."""
+
+    @abc.abstractmethod
+    async def geocode(self, city):
+        """``(latitude, longitude)`` of a city name, or None."""
+
+    # --- public API -------------------------------------------------------
+
+    async def _nearby(self, latitude, longitude, category, radius_m):
+        latitude = round(float(latitude), COALESCE_DECIMALS)
+        longitude = round(float(longitude), COALESCE_DECIMALS)
+        key = ('nearby', category, latitude, longitude, radius_m)
+        return await self.coalesce(key, lambda: self.fetch_nearby(latitude, longitude, category, radius_m))
+
+    async def _in_city(self, city, category, radius_m):
+        location = await self.coalesce(('geocode', normalize_city(city)), lambda: self.geocode(city.strip()))
+        if location is None:
+            return []
+        return await self._nearby(location[0], location[1], category, radius_m)
+
+    def nearby(self, latitude, longitude, category, radius_m=DEFAULT_RADIUS_M, limit=DEFAULT_LIMIT,
+               types=None, open_now=None):
+        _check_category(category)
+        # Filters are applied after the shared upstream query, so they don't split coalescing
+        places = self._run(self._nearby(latitude, longitude, category, radius_m))
+        return filter_places(places, types, open_now)[:limit]
+
+    def in_city(self, city, category, limit=DEFAULT_LIMIT, types=None, open_now=None):
+        _check_category(category)
+        places = self._run(self._in_city(city, category, DEFAULT_RADIUS_M))
+        return filter_places(places, types, open_now)[:limit]
+
+    async def aclose(self):
+        pass
+
+    def close(self):
+        if self._loop is None:
+            return
+        try:
+            self._run(self.aclose())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join(timeout=self.timeout)
+            self._loop = None
+
+    def stats(self):
+        return {
+            'backend': self.name,
+            'upstream_calls': self.upstream_calls,
+            'coalesced_calls': self.coalesced_calls,
+            'inflight': len(self._inflight),
+        }
+
+
+# OSM amenity tags searched for each category
+OVERPASS_AMENITIES = {
+    'doctor': 'doctors|clinic|hospital',
+    'pharmacy': 'pharmacy|chemist|drug_store',
+}
+OVERPASS_TYPES = {'hospital': 'Hospital', 'clinic': 'Clinic', 'doctors': 'Doctor'}
+
+
+def _overpass_query(latitude, longitude, category, radius_m):
+    around = f'around:{int(radius_m)},{latitude},{longitude}'
+    amenity = OVERPASS_AMENITIES[category]
+    return (f'[out:json][timeout:25];('
+            f'node["amenity"~"{amenity}"]({around});'
+            f'way["amenity"~"{amenity}"]({around});'
+            f'relation["amenity"~"{amenity}"]({around});'
+            f');out center;')
+
+
+def overpass_elements_to_places(elements, latitude, longitude, category):
+    """Convert Overpass elements to place records sorted by distance."""
+    places = []
+    for element in elements:
+        tags = element.get('tags') or {}
+        lat = element.get('lat', (element.get('center') or {}).get('lat'))
+        lng = element.get('lon', (element.get('center') or {}).get('lon'))
+        if lat is None or lng is None:
+            continue
+        address = ', '.join(filter(None, [tags.get('addr:street'), tags.get('addr:housenumber'),
+                                          tags.get('addr:city')])) or tags.get('addr:full', '')
+        km = float(haversine_km(latitude, longitude, lat, lng))
+        places.append({
+            'name': tags.get('name') or tags.get('operator') or ('Pharmacy' if category == 'pharmacy' else 'Unknown'),
+            'address': address or 'No address available',
+            'phone': tags.get('contact:phone') or tags.get('phone') or '',
+            'rating': None,
+            'distance': format_distance(km),
+            'distance_km': round(km, 3),
+            'type': 'Pharmacy' if category == 'pharmacy' else OVERPASS_TYPES.get(tags.get('amenity'), 'Doctor'),
+            # OSM has opening_hours strings but no live status
+            'open_now': None,
+            'latitude': float(lat),
+            'longitude': float(lng),
+        })
+    places.sort(key=lambda place: place['distance_km'])
+    return places
+
+
+class OverpassPlacesProvider(AsyncPlacesProvider):
+    """OpenStreetMap backend: Overpass for places, Nominatim for city names."""
+
+    name = 'overpass'
+
+    def __init__(self, overpass_url='https://overpass-api.de/api/interpreter',
+                 geocode_url='https://nominatim.openstreetmap.org/search',
+                 timeout=10.0, max_connections=20, user_agent='medi-recommend/1.0'):
+        try:
+            import aiohttp
+        except ImportError as e:
+            raise ImportError("PLACES_BACKEND=overpass requires aiohttp (pip install aiohttp)") from e
+        super().__init__(timeout=timeout)
+        self._aiohttp = aiohttp
+        self.overpass_url = overpass_url
+        self.geocode_url = geocode_url
+        self.max_connections = max_connections
+        self.user_agent = user_agent
+        self._session = None
+
+    def _get_session(self):
+        # Created on the loop thread; reused for every request (connection pool)
+        if self._session is None:
+            aiohttp = self._aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': self.user_agent},
+            )
+        return self._session
+
+    async def fetch_nearby(self, latitude, longitude, category, radius_m):
+        query = _overpass_query(latitude, longitude, category, radius_m)
+        async with self._get_session().post(self.overpass_url, data={'data': query}) as response:
+            response.raise_for_status()
+            payload = await response.json(content_type=None)
+        places = overpass_elements_to_places(payload.get('elements', []), latitude, longitude, category)
+        logger.info("🌍 Overpass returned %d %s places near (%s, %s)", len(places), category, latitude, longitude)
+        return places
+
+    async def geocode(self, city):
+        params = {'q': city, 'format': 'json', 'limit': 1}
+        async with self._get_session().get(self.geocode_url, params=params) as response:
+            response.raise_for_status()
+            results = await response.json(content_type=None)
+        if not results:
+            return None
+        return float(results[0]['lat']), float(results[0]['lon'])
+
+    async def aclose(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+def create_places_provider(backend=None):
+    """
+    Build the provider selected by ``backend`` or the ``PLACES_BACKEND`` env var.
+
+    Raises:
+        ValueError: For an unknown backend name.
+    """
+    backend = (backend or os.environ.get('PLACES_BACKEND', 'local')).lower()
+    if backend == 'local':
+        return LocalPlacesProvider(os.environ.get('PLACES_FIXTURE', DEFAULT_FIXTURE))
+    if backend == 'overpass':
+        kwargs = {
+            'timeout': float(os.environ.get('PLACES_TIMEOUT', 10)),
+            'max_connections': int(os.environ.get('PLACES_MAX_CONNECTIONS', 20)),
+        }
+        if os.environ.get('OVERPASS_URL'):
+            kwargs['overpass_url'] = os.environ['OVERPASS_URL']
+        if os.environ.get('GEOCODE_URL'):
+            kwargs['geocode_url'] = os.environ['GEOCODE_URL']
+        return OverpassPlacesProvider(**kwargs)
+    raise ValueError(f"Unknown PLACES_BACKEND: {backend!r}")
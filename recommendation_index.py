@@ -0,0 +1,205 @@
+"""
+Precomputed disease -> recommendation index.
+
+The Flask app used to answer every /predict call by scanning the description,
+precautions, medications, diets, workout, causes and treatment lookup
+DataFrames with ``str.lower()`` / ``str.contains``. This module does that work
+once at startup: every table is reduced to an ordered list of
+``(normalized disease, values)`` pairs plus a dict for exact matches, so a
+lookup is a dict hit and partial matches are resolved once and memoized.
+
+``lookup_recommendations_scan`` keeps the original DataFrame-scan logic. It is
+the reference the index is checked against and what the benchmark compares to.
+"""
+
+import pandas as pd
+
+
+FALLBACK_ADVICE = "Consult a healthcare professional for specific guidance."
+
+PRECAUTION_COLUMNS = ['Precaution_1', 'Precaution_2', 'Precaution_3', 'Precaution_4']
+CAUSE_COLUMNS = ['Cause_1', 'Cause_2', 'Cause_3', 'Cause_4', 'Cause_5']
+
+
+# Marks "no row matched"; descriptions can legitimately be NaN, so None won't do
+_MISSING = object()
+
+
+def _missing_description(dis):
+    return f"Information about {dis} is being updated in our database."
+
+
+class _Table:
+    """Ordered (key, value) pairs of one table with an exact-match dict and a partial-match memo."""
+
+    __slots__ = ('keys', 'values', 'exact', 'partial')
+
+    def __init__(self, df, disease_col, extract):
+        keys = []
+        values = []
+        exact = {}
+        for disease, row in zip(df[disease_col].tolist(), df.itertuples(index=False)):
+            if not isinstance(disease, str):
+                # str.lower() yields NaN here, which never matches
+                continue
+            key = disease.lower()
+            value = extract(row)
+            keys.append(key)
+            values.append(value)
+            exact.setdefault(key, value)
+        self.keys = tuple(keys)
+        self.values = tuple(values)
+        self.exact = exact
+        self.partial = {}
+
+    def find_partial(self, key):
+        """First row (in file order) whose disease contains ``key``, or _MISSING."""
+        try:
+            return self.partial[key]
+        except KeyError:
+            pass
+        found = _MISSING
+        for candidate, value in zip(self.keys, self.values):
+            if key in candidate:
+                found = value
+                break
+        self.partial[key] = found
+        return found
+
+    def find(self, key):
+        value = self.exact.get(key, _MISSING)
+        if value is _MISSING:
+            value = self.find_partial(key)
+        return value
+
+
+def _column_extractor(df, columns):
+    """Return a function turning an itertuples() row into the non-null values of ``columns``."""
+    positions = [df.columns.get_loc(col) for col in columns]
+
+    def extract(row):
+        return tuple(row[pos] for pos in positions if not pd.isna(row[pos]))
+
+    return extract
+
+
+class RecommendationIndex:
+    """
+    Immutable disease -> recommendation lookup built once from the CSV tables.
+
+    ``lookup(dis)`` returns exactly what the old ``helper(dis)`` returned:
+    ``(description, [precautions], medications, diet, workout, causes)``.
+    Lists are fresh copies, so callers may mutate them.
+    """
+
+    def __init__(self, description, precautions, medications, diets, workout, causes,
+                 treatment_lookup=None):
+        desc_pos = description.columns.get_loc('Description')
+        self._description = _Table(description, 'Disease', lambda row: row[desc_pos])
+        self._precautions = _Table(precautions, 'Disease', _column_extractor(precautions, PRECAUTION_COLUMNS))
+        self._medications = _Table(medications, 'Disease', _column_extractor(medications, ['Medication']))
+        self._diets = _Table(diets, 'Disease', _column_extractor(diets, ['Diet']))
+        self._workout = _Table(workout, 'disease', _column_extractor(workout, ['workout']))
+        self._causes = _Table(causes, 'Disease', _column_extractor(causes, CAUSE_COLUMNS))
+
+        if treatment_lookup is not None:
+            treat_pos = treatment_lookup.columns.get_loc('Treatments')
+            self._treatments = _Table(treatment_lookup, 'Name', lambda row: row[treat_pos])
+        else:
+            self._treatments = None
+
+    def _values(self, table, key):
+        value = table.find(key)
+        if value is _MISSING:
+            return [FALLBACK_ADVICE]
+        return list(value)
+
+    def _treatment(self, key):
+        if self._treatments is None:
+            return None
+        # The treatment table is only ever matched with "contains"
+        treatment_info = self._treatments.find_partial(key)
+        if isinstance(treatment_info, str) and treatment_info.strip():
+            return treatment_info
+        return None
+
+    def warm(self, diseases):
+        """Precompute the partial-match fallback entries for ``diseases`` (e.g. the model classes)."""
+        for dis in diseases:
+            self.lookup(dis)
+
+    def lookup(self, dis):
+        """Return ``(desc, [precautions], medications, diet, workout, causes)`` for ``dis``."""
+        desc = self._description.find(dis.lower().strip())
+        if desc is _MISSING:
+            desc = _missing_description(dis)
+
+        # helper() matched the remaining tables on the unstripped name
+        key = dis.lower()
+        pre = self._values(self._precautions, key)
+        med = self._values(self._medications, key)
+        die = self._values(self._diets, key)
+        wrkout = self._values(self._workout, key)
+        causelist = self._values(self._causes, key)
+
+        treatment_info = self._treatment(key)
+        if treatment_info is not None:
+            med.insert(0, f"Enhanced Treatment: {treatment_info}")
+
+        return desc, [pre], med, die, wrkout, causelist
+
+
+def build_recommendation_index(description, precautions, medications, diets, workout, causes,
+                               treatment_lookup=None, diseases=None):
+    """
+    Build a RecommendationIndex from the loaded DataFrames.
+
+    Args:
+        diseases (iterable, optional): Disease names to precompute partial-match
+            fallbacks for, typically the classes of the loaded model.
+    """
+    index = RecommendationIndex(description, precautions, medications, diets, workout, causes,
+                                treatment_lookup)
+    if diseases is not None:
+        index.warm(diseases)
+    return index
+
+
+def lookup_recommendations_scan(dis, description, precautions, medications, diets, workout, causes,
+                                treatment_lookup=None):
+    """Reference DataFrame-scan implementation (the original helper() body)."""
+    dis_normalized = dis.lower().strip()
+
+    desc_match = description[description['Disease'].str.lower() == dis_normalized]
+    if desc_match.empty:
+        desc_match = description[description['Disease'].str.lower().str.contains(dis_normalized, regex=False, na=False)]
+
+    if not desc_match.empty:
+        desc = desc_match['Description'].iloc[0]
+    else:
+        desc = _missing_description(dis)
+
+    def safe_lookup(df, disease_col, disease_name, data_cols):
+        exact_match = df[df[disease_col].str.lower() == disease_name.lower()]
+        if exact_match.empty:
+            partial_match = df[df[disease_col].str.lower().str.contains(disease_name.lower(), regex=False, na=False)]
+            if not partial_match.empty:
+                return partial_match[data_cols].iloc[0].dropna().tolist()
+            else:
+                return [FALLBACK_ADVICE]
+        return exact_match[data_cols].iloc[0].dropna().tolist()
+
+    pre = safe_lookup(precautions, 'Disease', dis, PRECAUTION_COLUMNS)
+    med = safe_lookup(medications, 'Disease', dis, ['Medication'])
+    die = safe_lookup(diets, 'Disease', dis, ['Diet'])
+    wrkout = safe_lookup(workout, 'disease', dis, ['workout'])
+    causelist = safe_lookup(causes, 'Disease', dis, CAUSE_COLUMNS)
+
+    if treatment_lookup is not None:
+        enhanced_match = treatment_lookup[treatment_lookup['Name'].str.lower().str.contains(dis.lower(), regex=False, na=False)]
+        if not enhanced_match.empty:
+            treatment_info = enhanced_match['Treatments'].iloc[0]
+            if pd.notna(treatment_info) and treatment_info.strip():
+                med.insert(0, f"Enhanced Treatment: {treatment_info}")
+
+    return desc, [pre], med, die, wrkout, causelist
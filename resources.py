@@ -0,0 +1,96 @@
+"""
+Lazy, thread-safe registry for the app's datasets and model.
+
+Each resource is registered with a loader function and is only loaded the
+first time it is requested, so routes that never touch the model (``/about``,
+``/blog``, ...) and test processes don't pay for it. Loading is guarded by a
+per-resource lock: concurrent first requests load a resource once. ``warmup``
+loads everything eagerly for production, and the time each load took is kept
+in ``timings()``. A resource holding connections or threads can register a
+``close`` function, which is called with the old value when it is reset.
+"""
+
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger('medi_recommend.resources')
+
+
+class ResourceRegistry:
+    """Named resources loaded on first access."""
+
+    def __init__(self):
+        self._loaders = {}
+        self._closers = {}
+        self._values = {}
+        self._locks = {}
+        self._timings = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name, loader, close=None):
+        """
+        Register ``loader`` (a zero-argument callable) under ``name``.
+
+        ``close``, if given, is called with a loaded value when ``reset`` drops it.
+        """
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._closers[name] = close
+            self._locks[name] = threading.Lock()
+            self._values.pop(name, None)
+
+    def get(self, name):
+        """Return the resource, loading it on first access."""
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+
+        lock = self._locks[name]
+        with lock:
+            # Another thread may have finished loading while we waited
+            if name in self._values:
+                return self._values[name]
+            start = time.perf_counter()
+            value = self._loaders[name]()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._timings[name] = elapsed_ms
+            self._values[name] = value
+            logger.info("✅ Loaded %s in %.1f ms", name, elapsed_ms)
+            return value
+
+    def is_loaded(self, name):
+        return name in self._values
+
+    def override(self, name, value):
+        """Replace a resource with ``value`` without calling its loader (used by tests)."""
+        with self._locks[name]:
+            self._values[name] = value
+
+    def reset(self, names=None):
+        """Forget loaded values so they are reloaded on next access."""
+        for name in (names if names is not None else list(self._loaders)):
+            with self._locks[name]:
+                value = self._values.pop(name, None)
+                self._timings.pop(name, None)
+            close = self._closers[name]
+            if close is not None and value is not None:
+                try:
+                    close(value)
+                except Exception as e:
+                    logger.warning("⚠️ Could not close %s (%s)", name, e)
+
+    def warmup(self, names=None):
+        """Load ``names`` (default: every registered resource) now and return their load times."""
+        for name in (names if names is not None else list(self._loaders)):
+            self.get(name)
+        return self.timings()
+
+    def timings(self):
+        """Load time in milliseconds of every resource loaded so far."""
+        return dict(self._timings)
+
+    def names(self):
+        return list(self._loaders)
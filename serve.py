@@ -0,0 +1,94 @@
+"""
+Production entry point: gunicorn workers forked from a warmed-up master.
+
+    python serve.py [--bind 0.0.0.0:8000] [--workers N] [--threads N] [--timeout 30]
+    python serve.py --dev [--bind 127.0.0.1:5000]    # what ``python main.py`` runs
+
+The master imports ``main`` and runs ``warmup()`` before forking, so the model,
+the recommendation tables and the recommendation index are loaded once and the
+workers share those pages copy-on-write. ``gc.freeze()`` then moves the loaded
+objects out of the garbage collector's reach, so collections in the workers
+don't write to (and so copy) the shared pages. ``GET /ready`` answers 200 once
+warmup has completed; in a worker that is immediately after the fork.
+
+Defaults come from the environment: ``BIND`` (0.0.0.0:8000),
+``WEB_CONCURRENCY`` (workers, default: CPU count), ``WEB_THREADS`` (threads
+per worker, default 1; more than 1 uses gunicorn's gthread workers) and
+``WEB_TIMEOUT`` (seconds, default 30). Counters on ``/metrics`` and the
+caches are per worker.
+
+Requires gunicorn (``pip install gunicorn``), which runs on Linux and macOS.
+"""
+
+import argparse
+import gc
+import os
+
+
+def load_app():
+    """Import the app and load every resource; called in the master before forking."""
+    import main
+
+    main.warmup()
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def gunicorn_options(bind, workers, threads, timeout):
+    return {
+        'bind': bind,
+        'workers': workers,
+        'threads': threads,
+        'worker_class': 'gthread' if threads > 1 else 'sync',
+        'timeout': timeout,
+        'preload_app': True,
+    }
+
+
+def run_gunicorn(options):
+    """
+    Serve the preloaded app with gunicorn.
+
+    Raises:
+        ImportError: If gunicorn is not installed.
+    """
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError as e:
+        raise ImportError("serve.py requires gunicorn (pip install gunicorn)") from e
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return load_app()
+
+    PreloadedApplication().run()
+
+
+def run_dev_server(bind):
+    """The Flask development server, as started by ``python main.py`` (without the reloader)."""
+    from main import app
+
+    host, _, port = bind.rpartition(':')
+    app.run(host=host or '127.0.0.1', port=int(port), debug=True, use_reloader=False)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--bind', default=os.environ.get('BIND', '0.0.0.0:8000'), help="host:port to listen on.")
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1)))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('WEB_THREADS', 1)),
+                        help="Threads per worker.")
+    parser.add_argument('--timeout', type=int, default=int(os.environ.get('WEB_TIMEOUT', 30)),
+                        help="Seconds before a silent worker is restarted.")
+    parser.add_argument('--dev', action='store_true', help="Run the Flask development server instead.")
+    args = parser.parse_args()
+
+    if args.dev:
+        run_dev_server(args.bind)
+    else:
+        run_gunicorn(gunicorn_options(args.bind, args.workers, args.threads, args.timeout))
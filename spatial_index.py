@@ -0,0 +1,185 @@
+"""
+In-memory spatial index for nearest-place queries.
+
+Points are bucketed into a regular latitude/longitude grid (``cell_deg``
+degrees per cell) and stored sorted by cell id, so the points of a run of
+adjacent cells are one contiguous slice found with ``np.searchsorted``. A
+query computes the bounding box of its search circle, gathers the slices of
+the covered cells (one per grid row), filters them by attribute, and computes
+exact haversine distances for the remaining candidates in one vectorized
+pass. k-nearest queries widen the radius until ``k`` matches are found.
+
+    index = SpatialIndex(df['latitude'], df['longitude'],
+                         attributes={'type': df['type'], 'open_now': df['open_now']})
+    rows, km = index.radius(40.71, -74.0, 5.0, type=['Clinic', 'Hospital'], open_now=True)
+    rows, km = index.nearest(40.71, -74.0, k=10)
+
+Returned ``rows`` are positions in the input arrays, nearest first.
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = EARTH_RADIUS_KM * math.pi / 180
+# Half the circumference: every point on Earth is within this distance
+MAX_DISTANCE_KM = EARTH_RADIUS_KM * math.pi
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Great-circle distance in km from one point to arrays of points (degrees)."""
+    lat1, lng1 = np.radians(lat), np.radians(lng)
+    lat2, lng2 = np.radians(lats), np.radians(lngs)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _concat_ranges(starts, ends):
+    """Concatenation of ``arange(s, e)`` for each pair, without a Python loop."""
+    lengths = ends - starts
+    keep = lengths > 0
+    starts, lengths = starts[keep], lengths[keep]
+    if not len(lengths):
+        return np.empty(0, dtype=np.int64)
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(lengths.sum(), dtype=np.int64) - np.repeat(offsets - starts, lengths)
+
+
+class SpatialIndex:
+    """
+    Grid index over points given in degrees.
+
+    Args:
+        latitudes, longitudes (array-like): Point coordinates.
+        cell_deg (float): Grid cell size in degrees; about the typical query
+            radius works well (0.05° ≈ 5.5 km).
+        attributes (dict, optional): ``name -> array`` of per-point values
+            (e.g. type, open_now) that queries can filter on.
+    """
+
+    def __init__(self, latitudes, longitudes, cell_deg=0.05, attributes=None):
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        if latitudes.shape != longitudes.shape or latitudes.ndim != 1:
+            raise ValueError("latitudes and longitudes must be 1-d arrays of the same length")
+        if len(latitudes) and (np.abs(latitudes).max() > 90 or np.abs(longitudes).max() > 180):
+            raise ValueError("coordinates must be in degrees (|lat| <= 90, |lng| <= 180)")
+
+        self.cell_deg = float(cell_deg)
+        self.n_rows = int(math.ceil(180 / self.cell_deg))
+        self.n_cols = int(math.ceil(360 / self.cell_deg))
+
+        keys = self._cell_rows(latitudes) * self.n_cols + self._cell_cols(longitudes)
+        order = np.argsort(keys, kind='stable')
+        self._keys = keys[order]
+        self._positions = order
+        self._lat = latitudes[order]
+        self._lng = longitudes[order]
+
+        # Attributes are stored as integer codes so filters are integer compares
+        self._codes = {}
+        self._categories = {}
+        for name, values in (attributes or {}).items():
+            values = np.asarray(values, dtype=object)
+            if values.shape != latitudes.shape:
+                raise ValueError(f"attribute {name!r} has the wrong length")
+            codes, uniques = pd.factorize(values, use_na_sentinel=True)
+            self._codes[name] = codes[order]
+            self._categories[name] = {value: code for code, value in enumerate(uniques)}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _cell_rows(self, latitudes):
+        return np.clip(np.floor((latitudes + 90) / self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+
+    def _cell_cols(self, longitudes):
+        return np.floor((longitudes + 180) / self.cell_deg).astype(np.int64) % self.n_cols
+
+    def _candidates(self, lat, lng, radius_km):
+        """Sorted-order positions of the points in the cells covering the search circle."""
+        delta = min(radius_km / EARTH_RADIUS_KM, math.pi)
+        lat_lo = max(lat - math.degrees(delta), -90.0)
+        lat_hi = min(lat + math.degrees(delta), 90.0)
+        rows = np.arange(self._cell_rows(np.float64(lat_lo)), self._cell_rows(np.float64(lat_hi)) + 1)
+
+        # Longitude half-width of the circle's bounding box; the whole band if a pole is inside
+        cos_lat = math.cos(math.radians(lat))
+        if lat_lo <= -90 or lat_hi >= 90 or math.sin(delta) >= cos_lat:
+            col_ranges = [(0, self.n_cols - 1)]
+        else:
+            dlng = math.degrees(math.asin(math.sin(delta) / cos_lat))
+            col_lo = int(self._cell_cols(np.float64(lng - dlng)))
+            col_hi = int(self._cell_cols(np.float64(lng + dlng)))
+            if 2 * dlng + self.cell_deg >= 360:
+                col_ranges = [(0, self.n_cols - 1)]
+            elif col_lo <= col_hi:
+                col_ranges = [(col_lo, col_hi)]
+            else:  # crosses the antimeridian
+                col_ranges = [(col_lo, self.n_cols - 1), (0, col_hi)]
+
+        starts, ends = [], []
+        for col_lo, col_hi in col_ranges:
+            starts.append(np.searchsorted(self._keys, rows * self.n_cols + col_lo, side='left'))
+            ends.append(np.searchsorted(self._keys, rows * self.n_cols + col_hi, side='right'))
+        return _concat_ranges(np.concatenate(starts), np.concatenate(ends))
+
+    def _filter(self, candidates, where):
+        for name, wanted in where.items():
+            if wanted is None:
+                continue
+            categories = self._categories[name]
+            if isinstance(wanted, (list, tuple, set, frozenset, np.ndarray)):
+                codes = [categories[value] for value in wanted if value in categories]
+            else:
+                codes = [categories[wanted]] if wanted in categories else []
+            column = self._codes[name][candidates]
+            candidates = candidates[column == codes[0]] if len(codes) == 1 else candidates[np.isin(column, codes)]
+        return candidates
+
+    def radius(self, lat, lng, radius_km, limit=None, **where):
+        """
+        Points within ``radius_km`` of (lat, lng), nearest first.
+
+        Args:
+            limit (int, optional): Return at most this many points.
+            **where: Attribute filters; a value or a collection of accepted values
+                (``None`` means no filter).
+
+        Returns:
+            tuple: (positions in the input arrays, distances in km).
+        """
+        unknown = set(where) - set(self._codes)
+        if unknown:
+            raise KeyError(f"Unknown attribute(s): {', '.join(sorted(unknown))}")
+        candidates = self._filter(self._candidates(float(lat), float(lng), radius_km), where)
+        distances = haversine_km(lat, lng, self._lat[candidates], self._lng[candidates])
+        inside = distances <= radius_km
+        candidates, distances = candidates[inside], distances[inside]
+
+        if limit is not None and limit < len(distances):
+            part = np.argpartition(distances, limit - 1)[:limit]
+            candidates, distances = candidates[part], distances[part]
+        order = np.argsort(distances, kind='stable')
+        return self._positions[candidates[order]], distances[order]
+
+    def nearest(self, lat, lng, k=10, max_radius_km=MAX_DISTANCE_KM, **where):
+        """
+        The ``k`` points nearest to (lat, lng) within ``max_radius_km``.
+
+        The search radius starts at one grid cell and doubles until ``k``
+        matching points are inside it; because a radius query returns every
+        point in the circle, the first ``k`` are the true nearest neighbours.
+
+        Returns:
+            tuple: (positions in the input arrays, distances in km).
+        """
+        radius_km = min(self.cell_deg * KM_PER_DEGREE, max_radius_km)
+        while True:
+            positions, distances = self.radius(lat, lng, radius_km, limit=k, **where)
+            if len(positions) >= k or radius_km >= max_radius_km:
+                return positions, distances
+            radius_km = min(radius_km * 2, max_radius_km)
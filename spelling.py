@@ -0,0 +1,175 @@
+"""
+Typo correction for symptom text before it reaches the TF-IDF vectorizer.
+
+A token the vectorizer has never seen ("hedache", "stomache") is dropped by
+``transform`` and the prediction silently loses that symptom. The corrector
+replaces such tokens with the closest word of the vocabulary, using a
+SymSpell-style deletion dictionary built once from the fitted vectorizer:
+every vocabulary word is indexed under each string obtained by deleting up to
+``max_distance`` characters from its first ``prefix_length`` characters. A
+misspelled token generates its own deletions, and any word sharing one of them
+is a candidate; the candidates are verified with the restricted
+Damerau-Levenshtein distance (adjacent transpositions count as one edit).
+
+The closest candidate wins, ties going to the word with the higher document
+frequency (from the vectorizer's idf). Tokens that are known, stop words, too
+short or contain digits are left alone. Corrections are memoized in a bounded
+``cache.LRUCache``, so repeated typos cost one dictionary lookup.
+"""
+
+import re
+
+import numpy as np
+
+from cache import LRUCache
+
+
+DEFAULT_MAX_DISTANCE = 2
+DEFAULT_PREFIX_LENGTH = 7
+DEFAULT_CACHE_SIZE = 4096
+# Shorter tokens have too many neighbours to correct reliably
+MIN_TOKEN_LENGTH = 4
+# Tokens shorter than this get at most one edit
+TWO_EDIT_MIN_LENGTH = 6
+
+_TOKEN = re.compile(r'(?u)\b\w\w+\b')
+_HAS_DIGIT = re.compile(r'\d')
+
+
+def _deletes(word, max_distance):
+    """Every string obtained by deleting up to ``max_distance`` characters, ``word`` included."""
+    found = {word}
+    frontier = [word]
+    for _ in range(max_distance):
+        next_frontier = []
+        for item in frontier:
+            if len(item) <= 1:
+                continue
+            for i in range(len(item)):
+                shorter = item[:i] + item[i + 1:]
+                if shorter not in found:
+                    found.add(shorter)
+                    next_frontier.append(shorter)
+        frontier = next_frontier
+    return found
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Restricted Damerau-Levenshtein distance, or ``max_distance + 1`` once it is exceeded.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if (previous_previous is not None and j > 1 and a[i - 1] == b[j - 2]
+                    and a[i - 2] == b[j - 1]):
+                value = min(value, previous_previous[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        previous_previous, previous = previous, current
+    return min(previous[-1], max_distance + 1)
+
+
+class SpellingCorrector:
+    """
+    Maps unknown tokens to the closest vocabulary word.
+
+    Args:
+        frequencies (dict): Vocabulary word -> document frequency (ties go to the higher).
+        ignore (iterable): Known words that are never corrected nor suggested (stop words).
+        max_distance (int): Most edits a correction may need.
+        prefix_length (int): Characters of each word that are indexed.
+        cache_size (int): Corrections remembered; 0 disables the cache.
+    """
+
+    def __init__(self, frequencies, ignore=(), max_distance=DEFAULT_MAX_DISTANCE,
+                 prefix_length=DEFAULT_PREFIX_LENGTH, cache_size=DEFAULT_CACHE_SIZE):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.frequencies = dict(frequencies)
+        self.known = frozenset(self.frequencies) | frozenset(ignore)
+        self.cache = LRUCache(maxsize=cache_size)
+
+        index = {}
+        for word in self.frequencies:
+            if len(word) < MIN_TOKEN_LENGTH - max_distance or _HAS_DIGIT.search(word):
+                continue
+            for key in _deletes(word[:prefix_length], max_distance):
+                index.setdefault(key, []).append(word)
+        # Tuples take less memory than the lists they were built in
+        self._index = {key: tuple(words) for key, words in index.items()}
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer, **kwargs):
+        """
+        Index the words of a fitted ``TfidfVectorizer`` (or ``NumpyTfidfVectorizer``).
+
+        Words only seen inside n-grams count as known; their document frequency is
+        that of the most frequent term containing them.
+        """
+        idf = np.asarray(vectorizer.idf_)
+        frequencies = {}
+        for term, index in vectorizer.vocabulary_.items():
+            # idf = ln((1 + n) / (1 + df)) + 1, so exp(1 - idf) is proportional to the document frequency
+            frequency = float(np.exp(1.0 - idf[index]))
+            for word in term.split(' '):
+                if frequency > frequencies.get(word, 0.0):
+                    frequencies[word] = frequency
+        if hasattr(vectorizer, 'get_stop_words'):
+            stop_words = vectorizer.get_stop_words() or ()
+        else:
+            stop_words = getattr(vectorizer, 'stop_words_', ())
+        return cls(frequencies, ignore=stop_words, **kwargs)
+
+    def __len__(self):
+        return len(self.frequencies)
+
+    def _lookup(self, token):
+        max_distance = self.max_distance if len(token) >= TWO_EDIT_MIN_LENGTH else min(self.max_distance, 1)
+        seen = set()
+        best = None
+        best_key = None
+        for key in _deletes(token[:self.prefix_length], max_distance):
+            for word in self._index.get(key, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                distance = edit_distance(token, word, max_distance)
+                if distance > max_distance:
+                    continue
+                rank = (distance, -self.frequencies[word], word)
+                if best_key is None or rank < best_key:
+                    best, best_key = word, rank
+        return best
+
+    def correct_token(self, token):
+        """The closest vocabulary word to ``token``, or ``token`` itself if none is close enough."""
+        if token in self.known or len(token) < MIN_TOKEN_LENGTH or _HAS_DIGIT.search(token):
+            return token
+        correction = self.cache.get(token)
+        if correction is None:
+            correction = self._lookup(token) or token
+            self.cache.set(token, correction)
+        return correction
+
+    def correct(self, text):
+        """``text`` with every correctable token replaced; the rest of the string is unchanged."""
+        return _TOKEN.sub(lambda match: self.correct_token(match.group(0)), text)
+
+    def corrections(self, text):
+        """The (token, correction) pairs ``correct`` would apply to ``text``, in order."""
+        pairs = []
+        for token in _TOKEN.findall(text):
+            correction = self.correct_token(token)
+            if correction != token:
+                pairs.append((token, correction))
+        return pairs
@@ -0,0 +1,391 @@
+"""
+Out-of-core training: stream the corpora in chunks and fit with ``partial_fit``.
+
+``medicine_rec_train.py --streaming`` uses this instead of loading every CSV
+into one DataFrame. Memory is bounded by the chunk size, the vocabulary and
+the model weights, not by the number of rows:
+
+1. Pass 1 streams all rows once, counting labels (for the rare-disease
+   filter and class weights) and term/document frequencies (for the
+   vocabulary and idf).
+2. Each epoch streams the rows again, vectorizes a chunk at a time with the
+   fixed vocabulary and updates an ``SGDClassifier`` (hinge loss, i.e. a
+   linear SVM) with ``partial_fit``.
+3. The held-out rows are streamed once more to report accuracy and macro-F1
+   next to the LinearSVC baseline.
+
+Two vectorizers are available:
+
+``vocabulary`` (default)
+    Two-pass TF-IDF: pass 1 builds the same top-``max_features`` vocabulary
+    and smoothed idf that ``TfidfVectorizer`` would. The result is a regular
+    fitted ``TfidfVectorizer``, so the model can be exported as a
+    memory-mapped artifact.
+``hashing``
+    ``HashingVectorizer`` with an idf from pass 1; needs no vocabulary, so
+    memory stays flat even for an unbounded vocabulary, but the model cannot
+    be exported as an artifact. It has ``HASHING_FEATURES`` (2**18) columns.
+
+The vocabulary bounds the vectorizer, not the model: ``SGDClassifier`` with
+``average=True`` keeps three dense (n_classes, n_features) float64 matrices
+(the weights, their running average and a working copy), about 6 MB per class
+with the hashing vectorizer and 0.12 MB per class with a 5000-term vocabulary.
+The estimate is printed before training (``weight_memory_mb``).
+
+Without the test CSV, every tenth row (chosen by a hash of its content, so
+the split is stable across passes) is held out for evaluation. With
+calibration on, another tenth is kept out of training and the softmax
+temperature is fitted on those rows, never on the evaluation rows.
+"""
+
+import os
+import resource
+import time
+from collections import Counter
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfTransformer, TfidfVectorizer
+from sklearn.linear_model import SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.svm import LinearSVC
+
+from calibration import fit_temperature
+from medicine_rec_train import (LARGE_TRAIN_FILE, TEST_FILE, VECTORIZER_PARAMS, _extract_symptoms,
+                                join_symptom_columns, preprocess_series)
+from model_artifact import export_model_artifact, remove_model_artifact
+
+
+DEFAULT_CHUNKSIZE = 50000
+HASHING_FEATURES = 2 ** 18
+# Rows with hash % HOLDOUT_MODULUS == 0 are held out when there is no test file
+HOLDOUT_MODULUS = 10
+# Rows with hash % HOLDOUT_MODULUS == CALIBRATION_BUCKET are held out to fit the calibration
+CALIBRATION_BUCKET = 1
+# coef_, average_coef_ and standard_coef_ of an averaged SGDClassifier
+AVERAGED_WEIGHT_COPIES = 3
+# Term candidates kept during pass 1 before rare terms are pruned
+MAX_TERM_CANDIDATES = 2_000_000
+CALIBRATION_ROWS = 20000
+
+
+class HashingTfidfVectorizer:
+    """``HashingVectorizer`` followed by a fixed idf weighting and L2 normalization."""
+
+    def __init__(self, idf, n_features=HASHING_FEATURES):
+        self.hashing = _hashing_vectorizer(n_features)
+        self.tfidf = TfidfTransformer()
+        self.tfidf.idf_ = idf
+
+    def transform(self, raw_documents):
+        return self.tfidf.transform(self.hashing.transform(raw_documents))
+
+
+def _hashing_vectorizer(n_features):
+    return HashingVectorizer(stop_words=VECTORIZER_PARAMS['stop_words'], ngram_range=VECTORIZER_PARAMS['ngram_range'],
+                             n_features=n_features, alternate_sign=False, norm=None)
+
+
+def weight_memory_mb(n_classes, n_features, copies=AVERAGED_WEIGHT_COPIES):
+    """Memory of the dense float64 weight matrices the averaged SGD model keeps, in MB."""
+    return copies * n_classes * n_features * 8 / 2 ** 20
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process so far, in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# --- Streaming the corpora -------------------------------------------------
+
+def _stream_sources(chunksize):
+    """Raw (symptoms, disease) chunks from every training source that exists."""
+    if os.path.exists(LARGE_TRAIN_FILE):
+        for chunk in pd.read_csv(LARGE_TRAIN_FILE, chunksize=chunksize):
+            yield _extract_symptoms(chunk)
+
+    if os.path.exists('Diseases_Symptoms.csv'):
+        for chunk in pd.read_csv('Diseases_Symptoms.csv', chunksize=chunksize):
+            yield chunk[['Symptoms', 'Name']].dropna().rename(columns={'Symptoms': 'symptoms', 'Name': 'disease'})
+
+    if os.path.exists('disease_diagnosis.csv'):
+        for chunk in pd.read_csv('disease_diagnosis.csv', chunksize=chunksize):
+            chunk['symptoms'] = join_symptom_columns(chunk, ['Symptom_1', 'Symptom_2', 'Symptom_3'])
+            yield chunk[['symptoms', 'Diagnosis']].dropna().rename(columns={'Diagnosis': 'disease'})
+
+
+def _clean(chunk):
+    chunk = chunk.assign(symptoms=preprocess_series(chunk['symptoms']),
+                         disease=preprocess_series(chunk['disease']))
+    return chunk[chunk['symptoms'] != '']
+
+
+def _buckets(chunk):
+    hashes = pd.util.hash_pandas_object(chunk[['symptoms', 'disease']], index=False).to_numpy()
+    return hashes % HOLDOUT_MODULUS
+
+
+def _is_holdout(chunk):
+    return _buckets(chunk) == 0
+
+
+def stream_training_chunks(chunksize, holdout, calibration=False):
+    """
+    Cleaned training chunks. Without a test file the held-out rows are removed,
+    and with ``calibration`` the calibration rows as well.
+    """
+    for chunk in _stream_sources(chunksize):
+        chunk = _clean(chunk)
+        buckets = _buckets(chunk)
+        keep = np.ones(len(chunk), dtype=bool)
+        if holdout:
+            keep &= buckets != 0
+        if calibration:
+            keep &= buckets != CALIBRATION_BUCKET
+        chunk = chunk[keep]
+        if len(chunk):
+            yield chunk
+
+
+def stream_calibration_chunks(chunksize):
+    """Cleaned training rows kept out of training to fit the calibration."""
+    for chunk in _stream_sources(chunksize):
+        chunk = _clean(chunk)
+        chunk = chunk[_buckets(chunk) == CALIBRATION_BUCKET]
+        if len(chunk):
+            yield chunk
+
+
+def stream_evaluation_chunks(chunksize, holdout):
+    """Cleaned evaluation chunks: the test file, or the held-out training rows."""
+    if holdout:
+        for chunk in _stream_sources(chunksize):
+            chunk = _clean(chunk)
+            chunk = chunk[_is_holdout(chunk)]
+            if len(chunk):
+                yield chunk
+    else:
+        for chunk in pd.read_csv(TEST_FILE, chunksize=chunksize):
+            chunk = _clean(_extract_symptoms(chunk))
+            if len(chunk):
+                yield chunk
+
+
+# --- Pass 1: labels, vocabulary and idf --------------------------------------
+
+def scan_corpus(chunks, vectorizer_kind):
+    """
+    Count labels and term/document frequencies over the training stream.
+
+    Returns:
+        dict: 'labels' (Series of counts), 'n_documents' and, for the
+        vocabulary vectorizer, 'term_counts'/'document_counts' dicts, or for
+        the hashing vectorizer a 'document_counts' array.
+    """
+    labels = Counter()
+    n_documents = 0
+    if vectorizer_kind == 'hashing':
+        hashing = _hashing_vectorizer(HASHING_FEATURES)
+        document_counts = np.zeros(HASHING_FEATURES, dtype=np.int64)
+    else:
+        counter = CountVectorizer(stop_words=VECTORIZER_PARAMS['stop_words'],
+                                  ngram_range=VECTORIZER_PARAMS['ngram_range'])
+        term_counts = Counter()
+        document_counts = Counter()
+
+    for chunk in chunks:
+        labels.update(chunk['disease'].value_counts().to_dict())
+        n_documents += len(chunk)
+        if vectorizer_kind == 'hashing':
+            counts = hashing.transform(chunk['symptoms'])
+            document_counts += np.bincount(counts.indices, minlength=HASHING_FEATURES)
+        else:
+            try:
+                counts = counter.fit_transform(chunk['symptoms'])
+            except ValueError:  # chunk has only stop words
+                continue
+            terms = counter.get_feature_names_out()
+            term_counts.update(dict(zip(terms, np.asarray(counts.sum(axis=0)).ravel().tolist())))
+            document_counts.update(dict(zip(terms, np.bincount(counts.indices, minlength=len(terms)).tolist())))
+            if len(term_counts) > MAX_TERM_CANDIDATES:
+                # Keep the vocabulary candidates bounded: drop the rarest half
+                keep = dict(term_counts.most_common(MAX_TERM_CANDIDATES // 2))
+                term_counts = Counter(keep)
+                document_counts = Counter({term: document_counts[term] for term in keep})
+
+    scan = {'labels': pd.Series(labels, dtype=np.int64), 'n_documents': n_documents,
+            'document_counts': document_counts}
+    if vectorizer_kind != 'hashing':
+        scan['term_counts'] = term_counts
+    return scan
+
+
+def _smooth_idf(document_counts, n_documents):
+    return np.log((1 + n_documents) / (1 + np.asarray(document_counts, dtype=np.float64))) + 1
+
+
+def build_vectorizer(scan, vectorizer_kind, max_features=VECTORIZER_PARAMS['max_features']):
+    """A fitted vectorizer from the pass-1 statistics."""
+    if vectorizer_kind == 'hashing':
+        return HashingTfidfVectorizer(_smooth_idf(scan['document_counts'], scan['n_documents']))
+
+    # Most frequent terms, ties broken alphabetically; features are numbered alphabetically like sklearn
+    ranked = sorted(scan['term_counts'].items(), key=lambda item: (-item[1], item[0]))[:max_features]
+    terms = sorted(term for term, _ in ranked)
+    vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(terms)}
+    vectorizer.idf_ = _smooth_idf([scan['document_counts'][term] for term in terms], scan['n_documents'])
+    return vectorizer
+
+
+# --- Pass 2: partial_fit -------------------------------------------------------
+
+def train_streaming(chunksize=DEFAULT_CHUNKSIZE, epochs=5, vectorizer_kind='vocabulary', alpha=1e-4,
+                    balanced=True, baseline='fit', calibrate=True, output='disease_model.joblib',
+                    artifact_dir='disease_model_arrays', seed=42):
+    """
+    Train out of core and save the model pipeline.
+
+    Args:
+        epochs (int): Passes of ``partial_fit`` over the training stream.
+        vectorizer_kind (str): 'vocabulary' (two-pass TF-IDF) or 'hashing'.
+        balanced (bool): Weight samples inversely to their class frequency.
+        baseline (str): 'fit' trains TF-IDF + LinearSVC in memory on the same
+            rows for comparison, 'saved' evaluates the existing model file,
+            'none' skips it.
+
+    Returns:
+        dict: Evaluation report (accuracy, macro-F1, timings, peak memory).
+    """
+    for path in (LARGE_TRAIN_FILE, 'Diseases_Symptoms.csv', 'disease_diagnosis.csv'):
+        if not os.path.exists(path):
+            print(f"Warning: '{path}' not found. Skipping.")
+    holdout = not os.path.exists(TEST_FILE)
+    if holdout:
+        print(f"'{TEST_FILE}' not found: holding out 1 in {HOLDOUT_MODULUS} rows for evaluation.")
+
+    start = time.perf_counter()
+    print("--- Pass 1: scanning labels and vocabulary ---")
+    scan = scan_corpus(stream_training_chunks(chunksize, holdout, calibrate), vectorizer_kind)
+    labels = scan['labels']
+    classes = np.array(sorted(labels[labels >= 2].index))
+    print(f"{scan['n_documents']} training rows, {len(classes)} diseases with at least 2 rows.")
+    vectorizer = build_vectorizer(scan, vectorizer_kind)
+    n_features = HASHING_FEATURES if vectorizer_kind == 'hashing' else len(vectorizer.vocabulary_)
+    print(f"Model weights: {len(classes)} classes x {n_features} features, "
+          f"about {weight_memory_mb(len(classes), n_features):.0f} MB.")
+
+    # Same weighting as class_weight='balanced', from the pass-1 counts
+    kept_counts = labels.loc[classes]
+    class_weights = (kept_counts.sum() / (len(classes) * kept_counts)).to_dict()
+
+    model = SGDClassifier(loss='hinge', alpha=alpha, average=True, random_state=seed)
+    rng = np.random.default_rng(seed)
+    for epoch in range(epochs):
+        seen = 0
+        for chunk in stream_training_chunks(chunksize, holdout, calibrate):
+            chunk = chunk[chunk['disease'].isin(classes)]
+            if chunk.empty:
+                continue
+            chunk = chunk.iloc[rng.permutation(len(chunk))]
+            weights = chunk['disease'].map(class_weights).to_numpy() if balanced else None
+            model.partial_fit(vectorizer.transform(chunk['symptoms']), chunk['disease'].to_numpy(),
+                              classes=classes, sample_weight=weights)
+            seen += len(chunk)
+        print(f"Epoch {epoch + 1}/{epochs}: {seen} rows")
+    train_seconds = time.perf_counter() - start
+
+    print("\n--- Evaluation ---")
+    y_true, y_pred = [], []
+    for chunk in stream_evaluation_chunks(chunksize, holdout):
+        chunk = chunk[chunk['disease'].isin(classes)]
+        if chunk.empty:
+            continue
+        X = vectorizer.transform(chunk['symptoms'])
+        y_true.extend(chunk['disease'])
+        y_pred.extend(model.predict(X))
+
+    report = {
+        'mode': f'streaming/{vectorizer_kind}',
+        'train_rows': int(scan['n_documents']),
+        'eval_rows': len(y_true),
+        'classes': len(classes),
+        'epochs': epochs,
+        'chunksize': chunksize,
+        'train_seconds': round(train_seconds, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+    if y_true:
+        report['accuracy'] = round(accuracy_score(y_true, y_pred), 4)
+        report['macro_f1'] = round(f1_score(y_true, y_pred, average='macro', zero_division=0), 4)
+        print(f"Streaming model accuracy: {report['accuracy'] * 100:.2f}% (macro-F1 {report['macro_f1']:.4f})")
+
+    if baseline != 'none' and y_true:
+        report['baseline'] = evaluate_baseline(baseline, chunksize, holdout, classes, y_true, calibrate)
+
+    model_pipeline = {'model': model, 'vectorizer': vectorizer}
+    if calibrate:
+        calibration = fit_streaming_calibration(model, vectorizer, chunksize)
+        if calibration is not None:
+            model_pipeline['calibration'] = calibration
+
+    joblib.dump(model_pipeline, output)
+    print(f"\nModel and vectorizer saved to '{output}'")
+    if vectorizer_kind == 'vocabulary':
+        export_model_artifact(model_pipeline, artifact_dir, source=output)
+        print(f"Model arrays exported to '{artifact_dir}/'")
+    else:
+        print("Hashing models have no vocabulary; skipping the memory-mapped artifact export.")
+        # The app would otherwise keep serving the previous model from the old arrays
+        if remove_model_artifact(artifact_dir):
+            print(f"Removed the stale '{artifact_dir}/'")
+    return report
+
+
+def fit_streaming_calibration(model, vectorizer, chunksize, max_rows=CALIBRATION_ROWS):
+    """Softmax temperature fitted on up to ``max_rows`` calibration rows, or None if there are none."""
+    class_index = {label: i for i, label in enumerate(model.classes_)}
+    scores, true_indices = [], []
+    for chunk in stream_calibration_chunks(chunksize):
+        chunk = chunk[chunk['disease'].isin(class_index)].head(max_rows - len(true_indices))
+        if chunk.empty:
+            continue
+        scores.append(model.decision_function(vectorizer.transform(chunk['symptoms'])))
+        true_indices.extend(chunk['disease'].map(class_index))
+        if len(true_indices) >= max_rows:
+            break
+    if not scores:
+        return None
+    return fit_temperature(np.vstack(scores), np.array(true_indices))
+
+
+def evaluate_baseline(baseline, chunksize, holdout, classes, y_true, calibration=False):
+    """Accuracy and macro-F1 of the LinearSVC baseline on the same evaluation rows."""
+    if baseline == 'saved':
+        print("Evaluating the saved model as the baseline...")
+        pipeline = joblib.load('disease_model.joblib')
+        vectorizer, model = pipeline['vectorizer'], pipeline['model']
+        name = 'saved disease_model.joblib'
+    else:
+        # Needs the whole training set in memory; that is the point of comparison
+        print("Fitting the in-memory TF-IDF + LinearSVC baseline...")
+        train = pd.concat(stream_training_chunks(chunksize, holdout, calibration), ignore_index=True)
+        train = train[train['disease'].isin(classes)]
+        vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS)
+        start = time.perf_counter()
+        model = LinearSVC(random_state=42).fit(vectorizer.fit_transform(train['symptoms']), train['disease'])
+        name = f'LinearSVC fitted in {time.perf_counter() - start:.2f}s'
+
+    predictions = []
+    for chunk in stream_evaluation_chunks(chunksize, holdout):
+        chunk = chunk[chunk['disease'].isin(classes)]
+        if len(chunk):
+            predictions.extend(model.predict(vectorizer.transform(chunk['symptoms'])))
+    result = {
+        'model': name,
+        'accuracy': round(accuracy_score(y_true, predictions), 4),
+        'macro_f1': round(f1_score(y_true, predictions, average='macro', zero_division=0), 4),
+    }
+    print(f"Baseline ({name}) accuracy: {result['accuracy'] * 100:.2f}% (macro-F1 {result['macro_f1']:.4f})")
+    return result
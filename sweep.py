@@ -0,0 +1,171 @@
+"""
+Hyperparameter and model-family sweep for the disease classifier.
+
+``medicine_rec_train.py --sweep`` evaluates every combination of a grid of
+TF-IDF settings and linear model families and prints a leaderboard of
+accuracy, macro-F1, train time, single-request inference latency and pickled
+model size, so the serving model can be chosen for speed as well as accuracy.
+
+Each vectorizer setting is fitted once, through the same on-disk stage cache
+as a normal training run, and balanced once. The model fits then run in
+worker processes that inherit the matrices on fork instead of receiving a
+pickled copy per task. Inference latency is timed afterwards in the parent,
+one configuration at a time, so it does not include contention between the
+workers.
+"""
+
+import csv
+import itertools
+import multiprocessing
+import os
+import pickle
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.metrics import accuracy_score, f1_score
+from sklearn.naive_bayes import ComplementNB
+from sklearn.svm import LinearSVC
+
+from balancing import balance
+
+
+MODEL_FAMILIES = {
+    'linear_svc': lambda: LinearSVC(random_state=42),
+    'logistic_regression': lambda: LogisticRegression(max_iter=1000, random_state=42),
+    'sgd': lambda: SGDClassifier(loss='hinge', alpha=1e-5, average=True, random_state=42),
+    'complement_nb': lambda: ComplementNB(alpha=0.3),
+}
+
+VECTORIZER_GRID = {
+    'max_features': [5000, 20000],
+    'ngram_range': [(1, 1), (1, 2)],
+}
+
+# Single requests timed per configuration for the latency column
+LATENCY_SAMPLES = 200
+
+# Filled in the parent before the pool forks: config name -> (vectorizer, X_train, y_train, weights, X_test, y_test)
+_MATRICES = {}
+
+
+def vectorizer_grid(base_params, grid=VECTORIZER_GRID):
+    """Every combination of ``grid`` applied on top of ``base_params``."""
+    keys = sorted(grid)
+    return [{**base_params, **dict(zip(keys, values))} for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def describe_params(params, base_params):
+    """Short label for the settings that differ from ``base_params``."""
+    changed = {k: v for k, v in sorted(params.items()) if base_params.get(k) != v}
+    return ','.join(f'{k}={v}' for k, v in changed.items()) or 'default'
+
+
+def _per_request_us(vectorizer, model, texts):
+    start = time.perf_counter()
+    for text in texts:
+        model.predict(vectorizer.transform([text]))
+    return (time.perf_counter() - start) / len(texts) * 1e6
+
+
+def evaluate_config(vectorizer_name, model_name):
+    """Fit and score one model family on one cached matrix; runs in a worker process.
+
+    Returns the leaderboard row (without ``latency_us``) and the fitted model.
+    """
+    vectorizer, X_train, y_train, weights, X_test, y_test = _MATRICES[vectorizer_name]
+    model = MODEL_FAMILIES[model_name]()
+    start = time.perf_counter()
+    model.fit(X_train, y_train, sample_weight=weights)
+    train_seconds = time.perf_counter() - start
+    y_pred = model.predict(X_test)
+    row = {
+        'vectorizer': vectorizer_name,
+        'model': model_name,
+        'features': len(vectorizer.vocabulary_),
+        'accuracy': round(accuracy_score(y_test, y_pred), 4),
+        'macro_f1': round(f1_score(y_test, y_pred, average='macro', zero_division=0), 4),
+        'train_seconds': round(train_seconds, 3),
+        'model_kb': round(len(pickle.dumps({'model': model, 'vectorizer': vectorizer})) / 1024, 1),
+    }
+    return row, model
+
+
+def run_sweep(X_train, y_train, X_test, y_test, models=tuple(MODEL_FAMILIES), vectorizer_params=None,
+              balancing='class_weight', n_jobs=-1, cache_dir=None):
+    """
+    Evaluate every (vectorizer settings, model family) pair.
+
+    Args:
+        models (iterable): Keys of ``MODEL_FAMILIES``.
+        vectorizer_params (list[dict], optional): TfidfVectorizer settings to try
+            (default: ``VECTORIZER_GRID`` over ``VECTORIZER_PARAMS``).
+        balancing (str): Balancing strategy applied once per vectorizer setting.
+        n_jobs (int): Worker processes for the model fits (-1: all cores).
+
+    Returns:
+        list[dict]: Leaderboard rows, best accuracy first.
+
+    Raises:
+        ValueError: For an unknown model family.
+    """
+    from medicine_rec_train import VECTORIZER_PARAMS, vectorize
+
+    unknown = set(models) - set(MODEL_FAMILIES)
+    if unknown:
+        raise ValueError(f"Unknown model families: {', '.join(sorted(unknown))}")
+    if vectorizer_params is None:
+        vectorizer_params = vectorizer_grid(VECTORIZER_PARAMS)
+
+    _MATRICES.clear()
+    for params in vectorizer_params:
+        name = describe_params(params, VECTORIZER_PARAMS)
+        print(f"Vectorizing with {name}...")
+        vectorizer, X_train_tfidf, X_test_tfidf = vectorize(X_train, X_test, cache_dir, params)
+        X_balanced, y_balanced, weights = balance(X_train_tfidf, np.asarray(y_train), balancing)
+        _MATRICES[name] = (vectorizer, X_balanced, y_balanced, weights, X_test_tfidf, np.asarray(y_test))
+
+    latency_texts = list(X_test)[:LATENCY_SAMPLES]
+    tasks = [(name, model) for name in _MATRICES for model in models]
+    if n_jobs is None or n_jobs < 0:
+        n_jobs = os.cpu_count() or 1
+    n_jobs = min(n_jobs, len(tasks))
+    print(f"Fitting {len(tasks)} configurations on {n_jobs} processes...")
+    if n_jobs <= 1:
+        fitted = [evaluate_config(name, model) for name, model in tasks]
+    else:
+        # fork, so the workers see _MATRICES without pickling it
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=multiprocessing.get_context('fork')) as pool:
+            futures = [pool.submit(evaluate_config, name, model) for name, model in tasks]
+            fitted = [future.result() for future in futures]
+
+    # Serially, with the pool shut down, so the latencies are comparable
+    results = []
+    for row, model in fitted:
+        vectorizer = _MATRICES[row['vectorizer']][0]
+        row['latency_us'] = round(_per_request_us(vectorizer, model, latency_texts), 1)
+        results.append(row)
+    return sorted(results, key=lambda r: (-r['accuracy'], r['latency_us']))
+
+
+LEADERBOARD_COLUMNS = ['vectorizer', 'model', 'features', 'accuracy', 'macro_f1', 'train_seconds',
+                       'latency_us', 'model_kb']
+
+
+def format_leaderboard(results):
+    """The leaderboard as a fixed-width table."""
+    width = max([len('vectorizer')] + [len(r['vectorizer']) for r in results]) + 2
+    lines = [f"{'vectorizer':<{width}}{'model':<21}{'features':>9}{'accuracy':>10}{'macro-F1':>10}"
+             f"{'train s':>9}{'latency us':>12}{'size KB':>10}"]
+    for r in results:
+        lines.append(f"{r['vectorizer']:<{width}}{r['model']:<21}{r['features']:>9}{r['accuracy']:>10.4f}"
+                     f"{r['macro_f1']:>10.4f}{r['train_seconds']:>9.2f}{r['latency_us']:>12.1f}{r['model_kb']:>10.1f}")
+    return '\n'.join(lines)
+
+
+def write_leaderboard(results, path):
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=LEADERBOARD_COLUMNS)
+        writer.writeheader()
+        writer.writerows(results)
@@ -0,0 +1,187 @@
+"""
+Structured first-stage classifier over the symptom IDs of ``Training.csv``.
+
+``Training.csv`` has one binary column per known symptom (``high_fever``,
+``skin_rash``, ...) and a ``prognosis`` label. When every comma-separated part
+of the input is one of those symptoms, the query is a handful of symptom IDs
+and a linear model over one-hot features answers it with a few array
+additions, without tokenizing or vectorizing anything.
+
+The model is multinomial naive Bayes, fitted in closed form from the symptom
+counts per disease, so it trains in milliseconds when the app starts and needs
+only NumPy. Its scores are log posteriors, which makes the softmax confidence
+the naive Bayes posterior. ``main.py`` uses it as the first stage of a cascade:
+confident answers are returned directly, while inputs with unknown symptoms or
+a low confidence fall through to the TF-IDF + LinearSVC pipeline.
+
+``Training.csv`` spells some labels differently from the recommendation tables
+and the TF-IDF model ("Peptic ulcer diseae", doubled spaces). ``relabel`` maps
+every class onto the label set the rest of the app uses, so a cascade answer
+finds its recommendations.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from calibration import top_k
+from spelling import edit_distance
+
+
+TRAINING_FILE = 'Training.csv'
+LABEL_COLUMN = 'prognosis'
+
+# Parts of an input are separated by commas or semicolons; a part that is not a
+# known symptom may still be several joined with "and" ("cold hands and feets" is one)
+_SEPARATORS = re.compile(r'\s*[,;]\s*')
+_AND = re.compile(r'\s+and\s+')
+_NON_WORD = re.compile(r'[_\s]+')
+
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalize_symptom(name):
+    """``'Spotting_ urination'`` -> ``'spotting urination'``."""
+    return _NON_WORD.sub(' ', str(name)).strip().lower()
+
+
+def label_key(label):
+    """``'(vertigo) Paroymsal  Positional Vertigo'`` -> ``'vertigo paroymsal positional vertigo'``."""
+    return _NON_ALNUM.sub(' ', str(label).lower()).strip()
+
+
+class StructuredSymptomClassifier:
+    """
+    Linear model over one-hot symptom IDs.
+
+    Args:
+        symptoms (list of str): Symptom names, in feature order.
+        classes (list of str): Disease labels.
+        weights (array): (n_symptoms, n_classes) per-symptom log likelihoods.
+        bias (array): (n_classes,) log priors.
+    """
+
+    def __init__(self, symptoms, classes, weights, bias):
+        self.symptom_ids = {}
+        for i, symptom in enumerate(symptoms):
+            self.symptom_ids.setdefault(normalize_symptom(symptom), i)
+        self.classes = np.asarray(classes, dtype=object)
+        # Symptom-major, so a query sums a few contiguous rows
+        self.weights = np.ascontiguousarray(weights, dtype=np.float64)
+        self.bias = np.asarray(bias, dtype=np.float64)
+
+    @classmethod
+    def fit(cls, X, y, symptoms, alpha=1.0):
+        """
+        Multinomial naive Bayes with Laplace smoothing ``alpha``.
+
+        Args:
+            X (array): (n_rows, n_symptoms) 0/1 matrix.
+            y (array): Disease label of each row.
+        """
+        classes, codes = np.unique(np.asarray(y, dtype=object), return_inverse=True)
+        X = np.asarray(X, dtype=np.float64)
+        counts = np.zeros((len(classes), X.shape[1]))
+        np.add.at(counts, codes, X)
+        counts += alpha
+        log_likelihood = np.log(counts) - np.log(counts.sum(axis=1, keepdims=True))
+        log_prior = np.log(np.bincount(codes, minlength=len(classes)) / len(codes))
+        return cls(symptoms, classes, log_likelihood.T, log_prior)
+
+    @classmethod
+    def from_csv(cls, path=TRAINING_FILE, alpha=1.0):
+        df = pd.read_csv(path)
+        symptoms = [column for column in df.columns if column != LABEL_COLUMN]
+        labels = df[LABEL_COLUMN].astype(str).str.strip()
+        return cls.fit(df[symptoms].to_numpy(), labels, symptoms, alpha)
+
+    def relabel(self, labels):
+        """
+        Rename the classes to the matching entries of ``labels``.
+
+        A class matches the first label with the same ``label_key``, else the
+        closest one within one edit per ten characters (typos). Classes without
+        a match keep their name.
+
+        Returns:
+            dict: Old -> new name of every renamed class.
+        """
+        by_key = {}
+        for label in labels:
+            by_key.setdefault(label_key(label), str(label))
+        renamed = {}
+        classes = []
+        for name in self.classes:
+            key = label_key(name)
+            match = by_key.get(key)
+            if match is None:
+                max_distance = max(1, len(key) // 10)
+                distances = [(edit_distance(key, other, max_distance), other) for other in by_key]
+                distance, other = min(distances, key=lambda pair: pair[0], default=(max_distance + 1, None))
+                if distance <= max_distance:
+                    match = by_key[other]
+            if match is not None and match != name:
+                renamed[name] = match
+            classes.append(match if match is not None else name)
+        self.classes = np.asarray(classes, dtype=object)
+        return renamed
+
+    def encode(self, cleaned_text):
+        """
+        Symptom IDs of a cleaned input, or None unless every part is a known symptom.
+
+        Returns:
+            array or None: Sorted, distinct feature indices.
+        """
+        ids = set()
+        for part in _SEPARATORS.split(cleaned_text):
+            if not part:
+                continue
+            symptom_id = self.symptom_ids.get(normalize_symptom(part))
+            if symptom_id is not None:
+                ids.add(symptom_id)
+                continue
+            for sub_part in _AND.split(part):
+                symptom_id = self.symptom_ids.get(normalize_symptom(sub_part))
+                if symptom_id is None:
+                    return None
+                ids.add(symptom_id)
+        if not ids:
+            return None
+        return np.fromiter(sorted(ids), dtype=np.intp, count=len(ids))
+
+    def scores(self, ids):
+        """Log posterior (up to a constant) of every class."""
+        return self.bias + self.weights[ids].sum(axis=0)
+
+    def best_batch(self, cleaned_texts):
+        """
+        Best class and its posterior for many cleaned inputs at once.
+
+        Only the parsing is per text; the scores of every encoded input come
+        from one gather of the weight rows and one ``np.add.reduceat``.
+
+        Returns:
+            tuple: (positions of the encoded texts, their best classes, the posteriors).
+        """
+        positions, encoded = [], []
+        for position, text in enumerate(cleaned_texts):
+            ids = self.encode(text)
+            if ids is not None:
+                positions.append(position)
+                encoded.append(ids)
+        if not encoded:
+            return np.zeros(0, dtype=np.intp), self.classes[:0], np.zeros(0)
+        starts = np.zeros(len(encoded), dtype=np.intp)
+        np.cumsum([len(ids) for ids in encoded[:-1]], out=starts[1:])
+        scores = np.add.reduceat(self.weights[np.concatenate(encoded)], starts, axis=0) + self.bias
+        best = scores.argmax(axis=1)
+        # Softmax posterior of the best class
+        confidence = 1.0 / np.exp(scores - scores[np.arange(len(best)), best][:, None]).sum(axis=1)
+        return np.asarray(positions, dtype=np.intp), self.classes[best], confidence
+
+    def rank(self, ids, k=5):
+        """Top-k candidates in the same format as ``calibration.top_k``; confidence is the posterior."""
+        return top_k(self.scores(ids)[None, :], self.classes, k, {'temperature': 1.0})[0]
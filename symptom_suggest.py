@@ -0,0 +1,136 @@
+"""
+Symptom autocomplete over a sorted array of prefix keys.
+
+The vocabulary is the union of the symptoms in ``Symptom-severity.csv``,
+``symtoms_df.csv`` and the ``Training.csv`` columns, plus the single words of
+the TF-IDF vocabulary; its n-grams (``"pain fever"``) are not symptoms and only
+rank the known phrases they match. Every phrase is
+indexed under itself and under each later word start, so ``"rash"`` finds
+``"skin rash"`` and ``"stomach p"`` finds ``"stomach pain"``. The keys are
+kept in one sorted list, so the keys starting with a query are the slice
+between two ``bisect`` calls.
+
+Ranking is fixed when the index is built: severity weight first, then how
+often the symptom appears in ``symtoms_df.csv``, then the TF-IDF document
+frequency (from its idf). Each key stores its phrase's rank, and a query keeps
+the best ranks of its slice with ``np.partition``. A query costs two bisects
+and a partition of at most a few thousand integers, a few microseconds for
+typical prefixes.
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+_NON_WORD = re.compile(r'[_\s]+')
+
+
+def normalize_phrase(text):
+    """``' Dischromic _patches'`` -> ``'dischromic patches'``."""
+    return _NON_WORD.sub(' ', str(text)).strip().lower()
+
+
+class SymptomSuggester:
+    """
+    Prefix search over symptom phrases.
+
+    Args:
+        phrases (dict): phrase -> ``{'severity': int, 'count': int, 'document_frequency': float}``;
+            missing fields count as 0.
+    """
+
+    def __init__(self, phrases):
+        def sort_key(item):
+            phrase, info = item
+            return (-info.get('severity', 0), -info.get('count', 0), -info.get('document_frequency', 0.0), phrase)
+
+        ranked = sorted(((normalize_phrase(p), info) for p, info in phrases.items() if normalize_phrase(p)),
+                        key=sort_key)
+        self.phrases = []
+        self.severity = []
+        seen = set()
+        for phrase, info in ranked:
+            if phrase in seen:
+                continue
+            seen.add(phrase)
+            self.phrases.append(phrase)
+            self.severity.append(int(info.get('severity', 0)))
+
+        keys = []
+        max_words = 1
+        for rank, phrase in enumerate(self.phrases):
+            words = phrase.split(' ')
+            max_words = max(max_words, len(words))
+            for start in range(len(words)):
+                keys.append((' '.join(words[start:]), rank))
+        keys.sort()
+        self._keys = [key for key, _ in keys]
+        self._ranks = np.array([rank for _, rank in keys], dtype=np.int32)
+        # A phrase can appear once per word start in a slice
+        self._max_duplicates = max_words
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def suggest(self, query, limit=DEFAULT_LIMIT):
+        """
+        The best-ranked phrases with a word starting with ``query``.
+
+        Returns:
+            list of dict: ``{'symptom', 'severity'}``, best first.
+        """
+        prefix = normalize_phrase(query)
+        if not prefix or limit <= 0:
+            return []
+        lo = bisect_left(self._keys, prefix)
+        hi = bisect_left(self._keys, prefix + '\uffff', lo)
+        window = self._ranks[lo:hi]
+        keep = limit * self._max_duplicates
+        if len(window) > keep:
+            window = np.partition(window, keep - 1)[:keep]
+        ranks = np.unique(window)[:limit]
+        return [{'symptom': self.phrases[rank], 'severity': self.severity[rank]} for rank in ranks.tolist()]
+
+
+def symptom_phrases(severity_df=None, symptoms_df=None, vectorizer=None, known_symptoms=None):
+    """
+    Phrase statistics from the severity table, the symptom table and a fitted vectorizer.
+
+    ``known_symptoms`` are further symptom names (the ``Training.csv`` columns).
+    Multi-word vectorizer terms are only kept if they are a known phrase. Any
+    source may be None.
+    """
+    phrases = {}
+
+    def entry(phrase):
+        return phrases.setdefault(normalize_phrase(phrase), {})
+
+    if severity_df is not None:
+        for symptom, weight in zip(severity_df['Symptom'], severity_df['weight']):
+            if isinstance(symptom, str) and pd.notna(weight):
+                info = entry(symptom)
+                info['severity'] = max(info.get('severity', 0), int(weight))
+    if symptoms_df is not None:
+        columns = [c for c in symptoms_df.columns if c.startswith('Symptom')]
+        counts = pd.Series(symptoms_df[columns].to_numpy().ravel()).dropna().map(normalize_phrase).value_counts()
+        for symptom, count in counts.items():
+            if symptom:
+                entry(symptom)['count'] = int(count)
+    if known_symptoms is not None:
+        for symptom in known_symptoms:
+            if normalize_phrase(symptom):
+                entry(symptom)
+    if vectorizer is not None:
+        idf = np.asarray(vectorizer.idf_)
+        # idf = ln((1 + n) / (1 + df)) + 1, so exp(1 - idf) is proportional to the document frequency
+        for term, index in vectorizer.vocabulary_.items():
+            if ' ' in term and normalize_phrase(term) not in phrases:
+                continue
+            entry(term)['document_frequency'] = float(np.exp(1.0 - idf[index]))
+    return phrases
@@ -0,0 +1,81 @@
+"""Tests for the class-balancing strategies (balancing.py)."""
+
+import numpy as np
+import pytest
+from scipy import sparse
+
+import balancing
+from medicine_rec_train import validation_split
+
+
+@pytest.fixture(scope='module')
+def matrices(training_corpus):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    from medicine_rec_train import VECTORIZER_PARAMS
+
+    texts, labels = training_corpus
+    labels = np.asarray(labels, dtype=object)
+    keep = np.isin(labels, [label for label, count in zip(*np.unique(labels, return_counts=True)) if count >= 4])
+    texts, labels = np.asarray(texts, dtype=object)[keep], labels[keep]
+    test = np.arange(len(labels)) % 4 == 0
+    vectorizer = TfidfVectorizer(**VECTORIZER_PARAMS).fit(texts[~test])
+    return (vectorizer.transform(texts[~test]), labels[~test], vectorizer.transform(texts[test]), labels[test])
+
+
+def test_class_weights_match_sklearn_balanced():
+    from sklearn.utils.class_weight import compute_class_weight
+
+    y = np.array(['a', 'b', 'b', 'c', 'c', 'c'])
+    expected = dict(zip(['a', 'b', 'c'], compute_class_weight('balanced', classes=np.array(['a', 'b', 'c']), y=y)))
+    np.testing.assert_allclose(balancing.balanced_class_weights(y), [expected[label] for label in y])
+
+
+def test_oversample_weights_equalize_classes_without_copying_rows():
+    y = np.array(['a'] * 2 + ['b'] * 5 + ['c'] * 1 + ['a'])
+    weights = balancing.oversample_weights(y, seed=0)
+    assert np.all(weights >= 1) and np.all(weights == weights.astype(int))
+    totals = {label: weights[y == label].sum() for label in 'abc'}
+    assert totals == {'a': 5, 'b': 5, 'c': 5}
+
+    X = sparse.random(len(y), 20, density=0.3, format='csr', random_state=0)
+    X_balanced, y_balanced, _ = balancing.balance(X, y, 'oversample')
+    assert X_balanced is X and y_balanced is y
+
+
+def test_unknown_strategy_raises():
+    with pytest.raises(ValueError):
+        balancing.balance(sparse.eye(2, format='csr'), np.array(['a', 'b']), 'undersample')
+
+
+def test_compare_strategies_picks_fastest_within_tolerance(matrices):
+    X_train, y_train, X_test, y_test = matrices
+    comparison = balancing.compare_strategies(X_train, y_train, validation_split(y_train), X_test, y_test,
+                                              strategies=('class_weight', 'oversample', 'smote'), tolerance=0.05)
+    results = {r['strategy']: r for r in comparison['results']}
+    assert set(results) == {'class_weight', 'oversample', 'smote'}
+    # Strategies are fitted without the validation rows
+    fit_rows = X_train.shape[0] - comparison['validation_rows']
+    assert results['smote']['train_rows'] > results['class_weight']['train_rows'] == fit_rows
+    assert all(r['peak_mb'] >= 0 and 0 < r['macro_f1'] <= 1 for r in results.values())
+
+    chosen = results[comparison['chosen']]
+    assert chosen['macro_f1'] >= comparison['best_macro_f1'] - 0.05
+    faster = [r for r in results.values() if r['seconds'] < chosen['seconds']]
+    assert all(r['macro_f1'] < comparison['best_macro_f1'] - 0.05 for r in faster)
+    assert comparison['test']['strategy'] == comparison['chosen']
+    assert 0 < comparison['test']['macro_f1'] <= 1
+    assert comparison['chosen'] in balancing.format_comparison(comparison)
+
+
+def test_compare_strategies_ignores_the_test_set(matrices):
+    X_train, y_train, X_test, y_test = matrices
+    holdout = validation_split(y_train)
+    with_test = balancing.compare_strategies(X_train, y_train, holdout, X_test, y_test,
+                                             strategies=('class_weight', 'none'))
+    without_test = balancing.compare_strategies(X_train, y_train, holdout, strategies=('class_weight', 'none'))
+    assert 'test' not in without_test
+    def scores(comparison):
+        return {r['strategy']: r['macro_f1'] for r in comparison['results']}
+
+    assert scores(with_test) == scores(without_test)
@@ -0,0 +1,59 @@
+"""Tests for the LRU prediction cache."""
+
+import os
+import time
+
+import main
+from cache import FileWatcher, LRUCache
+from main import canonical_symptoms
+
+
+def test_lru_eviction_and_counters():
+    cache = LRUCache(maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1       # 'a' becomes most recently used
+    cache.set('c', 3)                # evicts 'b'
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['evictions'], stats['size']) == (2, 1, 1, 2)
+
+
+def test_ttl_expiry():
+    cache = LRUCache(maxsize=10, ttl=0.05)
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+    time.sleep(0.06)
+    assert cache.get('a') is None
+    assert cache.stats()['expirations'] == 1
+
+
+def test_file_change_invalidates(tmp_path):
+    path = tmp_path / 'model.joblib'
+    path.write_text('v1')
+    invalidated = []
+    cache = LRUCache(maxsize=10, watcher=FileWatcher([str(path)], check_interval=0),
+                     on_invalidate=lambda: invalidated.append(True))
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    path.write_text('version 2')
+    os.utime(path, ns=(time.time_ns(), time.time_ns() + 1_000_000_000))
+    assert cache.get('a') is None
+    assert cache.stats()['invalidations'] == 1 and invalidated
+
+
+def test_canonical_symptoms():
+    assert canonical_symptoms('Headache, fever') == canonical_symptoms(' fever ,headache;  FEVER ')
+    assert canonical_symptoms('fever [noted], headache') == 'fever, headache'
+
+
+def test_predict_route_uses_cache(client):
+    before = main.prediction_cache.stats()
+    client.post('/predict', data={'symptoms': 'fever, headache'})
+    client.post('/predict', data={'symptoms': 'Headache,fever'})
+    after = client.get('/cache/stats').get_json()
+    assert after['misses'] - before['misses'] == 1
+    assert after['hits'] - before['hits'] == 1
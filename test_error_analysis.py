@@ -0,0 +1,61 @@
+"""Tests for the sparse error analysis (error_analysis.py)."""
+
+import json
+
+import numpy as np
+from sklearn.metrics import confusion_matrix, f1_score, precision_recall_fscore_support
+
+import error_analysis
+
+
+def _predictions(seed=0, n=2000, n_classes=40):
+    rng = np.random.default_rng(seed)
+    y_true = np.array([f'disease {i:02d}' for i in rng.integers(0, n_classes, n)], dtype=object)
+    y_pred = y_true.copy()
+    wrong = rng.random(n) < 0.3
+    y_pred[wrong] = [f'disease {i:02d}' for i in rng.integers(0, n_classes + 2, wrong.sum())]
+    return y_true, y_pred
+
+
+def test_matches_dense_confusion_matrix_and_sklearn_metrics():
+    y_true, y_pred = _predictions()
+    labels, cm = error_analysis.sparse_confusion(y_true, y_pred)
+    assert (cm.toarray() == confusion_matrix(y_true, y_pred, labels=labels)).all()
+
+    precision, recall, f1, support = precision_recall_fscore_support(y_true, y_pred, labels=labels, zero_division=0)
+    metrics = error_analysis.per_class_metrics(labels, cm)
+    np.testing.assert_allclose([metrics[l]['precision'] for l in labels], precision, atol=5e-5)
+    np.testing.assert_allclose([metrics[l]['recall'] for l in labels], recall, atol=5e-5)
+    assert [metrics[l]['support'] for l in labels] == list(support)
+
+    report = error_analysis.error_report(y_true, y_pred)
+    assert report['macro_f1'] == round(f1_score(y_true, y_pred, average='macro', zero_division=0), 4)
+
+
+def test_top_confusions_match_dense_scan():
+    y_true, y_pred = _predictions(seed=1)
+    labels, cm = error_analysis.sparse_confusion(y_true, y_pred)
+    dense = cm.toarray()
+    expected = sorted(((labels[i], labels[j], dense[i, j]) for i in range(len(labels)) for j in range(len(labels))
+                       if i != j and dense[i, j] > 0), key=lambda e: (-e[2], e[0], e[1]))
+    assert error_analysis.top_confusions(labels, cm, 10) == expected[:10]
+
+
+def test_confusion_clusters_and_report_file(tmp_path):
+    y_true = ['flu'] * 5 + ['cold'] * 5 + ['measles'] * 4 + ['rubella'] * 4 + ['gout'] * 3
+    y_pred = ['flu'] * 3 + ['cold'] * 2 + ['cold'] * 4 + ['flu'] + ['measles'] * 2 + ['rubella'] * 2 + \
+             ['rubella'] * 4 + ['gout'] * 2 + ['flu']
+    report = error_analysis.error_report(y_true, y_pred, top_n=2)
+    assert report['clusters'] == [{'labels': ['cold', 'flu'], 'errors': 3},
+                                  {'labels': ['measles', 'rubella'], 'errors': 2}]
+    assert report['top_confusions'][0] == {'true': 'flu', 'predicted': 'cold', 'count': 2}
+    assert report['errors'] == 6 and report['rows'] == len(y_true)
+
+    error_analysis.write_error_report(report, str(tmp_path / 'report.json'))
+    with open(tmp_path / 'report.json') as f:
+        assert json.load(f)['per_class']['gout']['recall'] == round(2 / 3, 4)
+
+
+def test_no_errors():
+    report = error_analysis.error_report(['a', 'b'], ['a', 'b'])
+    assert report['top_confusions'] == [] and report['clusters'] == [] and report['accuracy'] == 1.0
@@ -0,0 +1,89 @@
+"""Tests for the quantized location search cache."""
+
+import numpy as np
+
+from geo_cache import GeoCache, normalize_city
+from places_provider import LocalPlacesProvider
+
+
+class CountingProvider:
+    """Wraps a provider and counts the searches that reach it."""
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.calls = 0
+
+    def nearby(self, *args, **kwargs):
+        self.calls += 1
+        return self.provider.nearby(*args, **kwargs)
+
+    def in_city(self, *args, **kwargs):
+        self.calls += 1
+        return self.provider.in_city(*args, **kwargs)
+
+
+def _strip(places):
+    return [(place['name'], place['distance_km']) for place in places]
+
+
+def test_cached_results_match_direct_search():
+    local = LocalPlacesProvider()
+    provider = CountingProvider(local)
+    cache = GeoCache(cell_deg=0.01)
+    rng = np.random.default_rng(1)
+    for lat, lng in [(40.7128, -74.0060), (19.0760, 72.8777)]:
+        for dlat, dlng in rng.uniform(-0.004, 0.004, (20, 2)):
+            point = (lat + dlat, lng + dlng)
+            for category in ('doctor', 'pharmacy'):
+                expected = local.nearby(*point, category, radius_m=5000, limit=5)
+                assert _strip(cache.nearby(provider, *point, category, radius_m=5000, limit=5)) == _strip(expected)
+
+    stats = cache.stats()
+    assert stats['upstream_calls'] == provider.calls
+    assert stats['upstream_calls_saved'] > stats['upstream_calls']
+    assert stats['hit_ratio'] > 0.5
+
+
+def test_filters_are_part_of_the_key():
+    provider = CountingProvider(LocalPlacesProvider())
+    cache = GeoCache()
+    hospitals = cache.nearby(provider, 40.7128, -74.0060, 'doctor', types=['Hospital'])
+    assert all(place['type'] == 'Hospital' for place in hospitals)
+    cache.nearby(provider, 40.7128, -74.0060, 'doctor', types=('Hospital',))
+    cache.nearby(provider, 40.7128, -74.0060, 'doctor')
+    assert provider.calls == 2
+
+
+def test_city_names_are_normalized():
+    assert normalize_city('  Bombay ') == 'mumbai'
+    assert normalize_city('New  York, ') == 'new york'
+    assert normalize_city('Bengalūru') == 'bengaluru'
+
+    provider = CountingProvider(LocalPlacesProvider())
+    cache = GeoCache()
+    first = cache.in_city(provider, 'Bangalore', 'pharmacy')
+    assert first and cache.in_city(provider, 'bengaluru', 'pharmacy') == first
+    assert provider.calls == 1
+    assert cache.in_city(provider, 'bengaluru', 'pharmacy', limit=2) == first[:2]
+
+
+def test_city_search_through_cache_matches_spelling_variants(tmp_path):
+    path = tmp_path / 'places.csv'
+    path.write_text('name,category,latitude,longitude,city\n'
+                    'Gateway Pharmacy,pharmacy,38.627,-90.199,St. Louis\n'
+                    'Farmácia Paulista,pharmacy,-23.561,-46.656,São Paulo\n'
+                    'Connaught Chemist,pharmacy,28.632,77.219,New Delhi\n', encoding='utf-8')
+    local = LocalPlacesProvider(str(path))
+    cache = GeoCache()
+    for city, name in [('St. Louis', 'Gateway Pharmacy'), ('st louis', 'Gateway Pharmacy'),
+                       ('São Paulo', 'Farmácia Paulista'), ('Sao Paulo', 'Farmácia Paulista'),
+                       ('New Delhi', 'Connaught Chemist'), ('Delhi', 'Connaught Chemist')]:
+        assert [place['name'] for place in local.in_city(city, 'pharmacy')] == [name]
+        assert [place['name'] for place in cache.in_city(local, city, 'pharmacy')] == [name]
+
+
+def test_geo_cache_stats_endpoint(client):
+    for i in range(3):
+        client.post('/find-doctors', json={'latitude': 51.5074 + i * 1e-5, 'longitude': -0.1278})
+    stats = client.get('/cache/geo/stats').get_json()
+    assert stats['upstream_calls'] == 1 and stats['upstream_calls_saved'] == 2
@@ -0,0 +1,41 @@
+"""Parity tests: the NumPy inference engine must match the sklearn pipeline."""
+
+import numpy as np
+import pytest
+
+from inference_engine import load_inference_pipeline
+from model_artifact import export_model_artifact
+
+
+@pytest.fixture(scope='module')
+def engine(model_pipeline, tmp_path_factory):
+    directory = export_model_artifact(model_pipeline, str(tmp_path_factory.mktemp('engine') / 'arrays'))
+    return load_inference_pipeline(directory)
+
+
+@pytest.fixture(scope='module')
+def texts(training_corpus):
+    return training_corpus[0] + [
+        '', 'the and of', 'Fever!! Fever, HEADACHE and a   runny nose', 'café naïve résumé',
+        'chest pain; shortness of breath; chest pain', '12 34 x y z',
+    ]
+
+
+def test_tfidf_matches_sklearn(model_pipeline, engine, texts):
+    expected = model_pipeline['vectorizer'].transform(texts).toarray()
+    actual = engine['vectorizer'].transform(texts).toarray()
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_labels_and_scores_match_sklearn(model_pipeline, engine, texts):
+    sk_X = model_pipeline['vectorizer'].transform(texts)
+    np_X = engine['vectorizer'].transform(texts)
+    np.testing.assert_allclose(engine['model'].decision_function(np_X),
+                               model_pipeline['model'].decision_function(sk_X), rtol=1e-9, atol=1e-12)
+    assert list(engine['model'].predict(np_X)) == list(model_pipeline['model'].predict(sk_X))
+
+
+def test_single_document_rows(engine):
+    X = engine['vectorizer'].transform(['fever'])
+    assert X.shape[0] == 1
+    assert engine['model'].predict(X).shape == (1,)
@@ -0,0 +1,37 @@
+"""Smoke test for the load-testing harness."""
+
+from load_test import InProcessClient, read_requests, record_requests, run_load_test, write_requests
+
+
+def test_record_and_replay_in_process(client, tmp_path):
+    path = tmp_path / 'mix.jsonl'
+    write_requests(record_requests(count=40, seed=1), path)
+    records = read_requests(path)
+    assert len(records) == 40
+
+    results = run_load_test(records, InProcessClient(), concurrency=4, total=60, warmup=5)
+    assert results['requests'] == 60 and results['errors'] == 0
+    assert results['requests_per_s'] > 0
+    assert set(results['paths']) <= {'/predict', '/find-doctors', '/pharmacy_search'}
+    assert results['latency']['p50_ms'] <= results['latency']['p99_ms']
+
+
+class _ScriptedClient:
+    def __init__(self, responses):
+        self.responses = responses
+
+    def send(self, record):
+        return self.responses[record['path']]
+
+
+def test_client_errors_and_unsuccessful_bodies_count_as_errors():
+    records = [{'path': '/predict'}, {'path': '/find-doctors'}, {'path': '/pharmacy_search'}]
+    client = _ScriptedClient({
+        '/predict': (400, b'bad request'),
+        '/find-doctors': (200, b'{"success": false, "error": "no results"}'),
+        '/pharmacy_search': (200, b'{"success": true, "results": []}'),
+    })
+    results = run_load_test(records, client, concurrency=1, total=3, warmup=0)
+    assert results['paths']['/predict']['errors'] == 1
+    assert results['paths']['/find-doctors']['errors'] == 1
+    assert results['paths']['/pharmacy_search']['errors'] == 0
@@ -0,0 +1,28 @@
+"""Tests for stage timing metrics and the /metrics endpoint."""
+
+from metrics import MetricsRegistry
+
+
+def test_render_exposition_format():
+    registry = MetricsRegistry()
+    registry.describe('demo_latency_seconds', 'Demo latency.')
+    for ms in range(1, 101):
+        registry.observe('demo_latency_seconds', ms / 1000, stage='model')
+    registry.increment('demo_errors_total', stage='model')
+
+    text = registry.render(gauges=[('demo_cache_size', {}, 3)])
+    assert '# TYPE demo_latency_seconds summary' in text
+    assert 'demo_latency_seconds{stage="model",quantile="0.5"} 0.0505' in text
+    assert 'demo_latency_seconds_count{stage="model"} 100' in text
+    assert 'demo_errors_total{stage="model"} 1' in text
+    assert 'demo_cache_size 3' in text
+
+
+def test_metrics_endpoint_reports_stages(client):
+    client.post('/predict', data={'symptoms': 'fever, cough'})
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    text = response.get_data(as_text=True)
+    for stage in ('preprocess', 'vectorize', 'model', 'helper', 'render', 'request'):
+        assert f'medi_stage_latency_seconds_count{{stage="{stage}"}}' in text
+    assert 'medi_prediction_cache_misses' in text
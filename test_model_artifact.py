@@ -0,0 +1,68 @@
+"""Tests for the memory-mappable model artifact."""
+
+import json
+import os
+
+import joblib
+import numpy as np
+
+import main
+from inference_engine import NumpyLinearModel
+from model_artifact import (artifact_matches_source, export_model_artifact, load_model_artifact,
+                            to_sklearn_pipeline)
+
+
+def test_round_trip_predictions_match(model_pipeline, training_corpus, tmp_path):
+    pipeline = dict(model_pipeline, calibration={'method': 'temperature', 'temperature': 0.5})
+    directory = export_model_artifact(pipeline, str(tmp_path / 'arrays'))
+
+    artifact = load_model_artifact(directory)
+    assert isinstance(artifact.coef_t, np.memmap)
+    assert artifact.calibration['temperature'] == 0.5
+
+    restored = to_sklearn_pipeline(artifact)
+    texts = training_corpus[0][:500] + ['', 'chest pain and shortness of breath']
+    expected = model_pipeline['model'].decision_function(model_pipeline['vectorizer'].transform(texts))
+    actual = restored['model'].decision_function(restored['vectorizer'].transform(texts))
+    np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-12)
+    assert list(restored['model'].predict(restored['vectorizer'].transform(texts))) == \
+        list(model_pipeline['model'].predict(model_pipeline['vectorizer'].transform(texts)))
+
+
+def test_export_replaces_existing_directory(model_pipeline, tmp_path):
+    directory = str(tmp_path / 'arrays')
+    export_model_artifact(model_pipeline, directory)
+    export_model_artifact(model_pipeline, directory)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['arrays']
+
+
+def test_stale_artifact_is_detected(model_pipeline, tmp_path):
+    source, directory = str(tmp_path / 'model.joblib'), str(tmp_path / 'arrays')
+    joblib.dump(model_pipeline, source)
+    export_model_artifact(model_pipeline, directory, source=source)
+    with open(os.path.join(directory, 'meta.json')) as f:
+        assert json.load(f)['source']['path'] == 'model.joblib'
+    assert artifact_matches_source(directory, source)
+
+    joblib.dump(dict(model_pipeline, lineage=[{'type': 'incremental'}]), source)
+    assert not artifact_matches_source(directory, source)
+    assert artifact_matches_source(directory, str(tmp_path / 'missing.joblib'))
+
+    # Without a recorded hash the artifact must be at least as new as the joblib
+    export_model_artifact(model_pipeline, directory)
+    os.utime(source, (0, os.path.getmtime(os.path.join(directory, 'meta.json')) + 10))
+    assert not artifact_matches_source(directory, source)
+
+
+def test_app_falls_back_to_newer_joblib(model_pipeline, tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'BASE_DIR', str(tmp_path))
+    monkeypatch.setattr(main, 'MODEL_ARTIFACT_DIR', str(tmp_path / 'disease_model_arrays'))
+    source = str(tmp_path / 'disease_model.joblib')
+    joblib.dump(model_pipeline, source)
+    export_model_artifact(model_pipeline, main.MODEL_ARTIFACT_DIR, source=source)
+    assert isinstance(main.load_model_pipeline()['model'], NumpyLinearModel)
+
+    joblib.dump(dict(model_pipeline, lineage=[{'type': 'incremental'}]), source)
+    pipeline = main.load_model_pipeline()
+    assert not isinstance(pipeline['model'], NumpyLinearModel)
+    assert pipeline['lineage'] == [{'type': 'incremental'}]
@@ -0,0 +1,166 @@
+"""Tests for the place search providers behind /find-doctors and /pharmacy_search."""
+
+import asyncio
+import threading
+
+import pytest
+
+from places_provider import (AsyncPlacesProvider, LocalPlacesProvider, PlacesProvider, create_places_provider,
+                             overpass_elements_to_places)
+
+NEW_YORK = (40.7128, -74.0060)
+
+
+def test_local_nearby_is_sorted_and_within_radius():
+    provider = LocalPlacesProvider()
+    doctors = provider.nearby(*NEW_YORK, 'doctor', radius_m=15000)
+    assert doctors
+    distances = [place['distance_km'] for place in doctors]
+    assert distances == sorted(distances) and distances[-1] <= 15
+    assert {place['type'] for place in doctors} <= {'Hospital', 'Clinic', 'Doctor'}
+
+    pharmacies = provider.nearby(*NEW_YORK, 'pharmacy', limit=3)
+    assert len(pharmacies) == 3 and all(place['type'] == 'Pharmacy' for place in pharmacies)
+    # Nothing from the fixture is near the middle of the Atlantic
+    assert provider.nearby(30.0, -40.0, 'doctor') == []
+
+
+def test_local_in_city_and_bad_category():
+    provider = LocalPlacesProvider()
+    assert all(place['address'].endswith('London') for place in provider.in_city(' london ', 'pharmacy'))
+    assert provider.in_city('Atlantis', 'pharmacy') == []
+    with pytest.raises(ValueError):
+        provider.nearby(*NEW_YORK, 'dentist')
+    with pytest.raises(ValueError):
+        create_places_provider('carrier-pigeon')
+
+
+class SlowProvider(AsyncPlacesProvider):
+    name = 'slow'
+
+    def __init__(self):
+        super().__init__(timeout=5)
+        self.fetches = 0
+
+    async def fetch_nearby(self, latitude, longitude, category, radius_m):
+        self.fetches += 1
+        await asyncio.sleep(0.1)
+        return [{'name': f'{category} near {latitude},{longitude}', 'distance_km': 0.0}]
+
+    async def geocode(self, city):
+        await asyncio.sleep(0.05)
+        return NEW_YORK if city.lower() == 'new york' else None
+
+
+def test_providers_must_implement_the_interface():
+    class Partial(AsyncPlacesProvider):
+        async def geocode(self, city):
+            return None
+
+    with pytest.raises(TypeError):
+        PlacesProvider()
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_concurrent_identical_queries_are_coalesced():
+    provider = SlowProvider()
+    results = [None] * 30
+
+    def search(i):
+        # Same ~100 m cell: jitter below the coalescing precision
+        results[i] = provider.nearby(NEW_YORK[0] + i * 1e-6, NEW_YORK[1], 'pharmacy')
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in range(30)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert provider.fetches == 1
+        assert all(result == results[0] for result in results)
+        assert provider.stats()['coalesced_calls'] == 29
+
+        assert provider.in_city('New York', 'pharmacy') == results[0]
+        assert provider.in_city('Atlantis', 'pharmacy') == []
+    finally:
+        provider.close()
+
+
+def test_app_closes_the_provider_on_reset():
+    import main
+
+    provider = SlowProvider()
+    main.resources.override('places', provider)
+    provider.nearby(NEW_YORK[0], NEW_YORK[1], 'doctor')
+    thread = provider._thread
+    main.resources.reset(['places'])
+    assert provider._loop is None and not thread.is_alive()
+
+
+def test_overpass_elements_to_places():
+    elements = [
+        {'lat': 40.75, 'lon': -74.0, 'tags': {'amenity': 'hospital', 'name': 'Far Hospital'}},
+        {'center': {'lat': 40.713, 'lon': -74.006}, 'tags': {'amenity': 'clinic', 'addr:street': 'Main St'}},
+        {'tags': {'amenity': 'doctors'}},  # no coordinates
+    ]
+    places = overpass_elements_to_places(elements, *NEW_YORK, 'doctor')
+    assert [place['type'] for place in places] == ['Clinic', 'Hospital']
+    assert places[0]['address'] == 'Main St' and places[0]['name'] == 'Unknown'
+
+
+def test_find_doctors_and_pharmacy_routes(client):
+    response = client.post('/find-doctors', json={'latitude': NEW_YORK[0], 'longitude': NEW_YORK[1]})
+    assert response.status_code == 200
+    assert response.get_json()['doctors']
+
+    data = client.post('/pharmacy_search', json={'search_type': 'city', 'city': 'Mumbai'}).get_json()
+    assert data['success'] and data['count'] == len(data['pharmacies']) > 0
+    assert client.post('/find-doctors', json={}).status_code == 400
+
+
+def test_find_doctors_filters(client):
+    response = client.post('/find-doctors', json={'latitude': NEW_YORK[0], 'longitude': NEW_YORK[1],
+                                                  'type': ['Hospital'], 'open_now': True, 'radius_km': 20})
+    doctors = response.get_json()['doctors']
+    assert doctors and all(d['type'] == 'Hospital' and d['open_now'] is True for d in doctors)
+    assert all(d['distance_km'] <= 20 for d in doctors)
+
+
+def test_city_spellings_share_one_geocode():
+    class AnyCity(SlowProvider):
+        async def geocode(self, city):
+            await asyncio.sleep(0.05)
+            return NEW_YORK
+
+    provider = AnyCity()
+    spellings = ['New York', '  new york ', 'NEW-YORK', 'New  York.']
+    results = [None] * len(spellings)
+
+    def search(i):
+        results[i] = provider.in_city(spellings[i], 'doctor')
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in range(len(spellings))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    try:
+        assert all(result and result == results[0] for result in results)
+        # One geocode and one nearby fetch for all spellings
+        assert provider.stats()['upstream_calls'] == 2
+    finally:
+        provider.close()
+
+
+def test_close_stops_the_loop_when_aclose_fails():
+    class Failing(SlowProvider):
+        async def aclose(self):
+            raise RuntimeError('session already closed')
+
+    provider = Failing()
+    provider.nearby(NEW_YORK[0], NEW_YORK[1], 'doctor')
+    thread = provider._thread
+    with pytest.raises(RuntimeError):
+        provider.close()
+    assert provider._loop is None and not thread.is_alive()
@@ -0,0 +1,106 @@
+"""Tests for the prediction endpoints of the Flask app."""
+
+import numpy as np
+
+import main
+from calibration import fit_temperature, top_k
+from main import predict_disease_from_symptoms, predict_diseases_batch, rank_diseases_from_symptoms
+
+
+def test_batch_matches_single_predictions(model_pipeline, training_corpus):
+    texts = training_corpus[0][:200] + ['', 'Fever and a [note] headache', 'chest pain']
+    batch = predict_diseases_batch(texts, model_pipeline)
+    assert batch == [predict_disease_from_symptoms(t, model_pipeline) for t in texts]
+    assert predict_diseases_batch([], model_pipeline) == []
+
+
+def test_predict_batch_endpoint(client):
+    response = client.post('/predict/batch', json={'symptoms': ['fever, cough, fatigue', '', 'itchy skin']})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] and data['count'] == 3
+
+    first, empty, third = data['predictions']
+    assert first['symptoms'] == 'fever, cough, fatigue'
+    assert first['predicted_disease']
+    for key in ('description', 'precautions', 'medications', 'diet', 'workout', 'causes'):
+        assert key in first
+    assert 'error' in empty
+    assert third['predicted_disease']
+
+
+def test_predict_batch_rejects_bad_payload(client):
+    assert client.post('/predict/batch', json={}).status_code == 400
+    assert client.post('/predict/batch', json={'symptoms': 'fever'}).status_code == 400
+
+
+def test_top_candidate_matches_predict(model_pipeline, training_corpus):
+    for text in training_corpus[0][:100] + ['', 'chest pain']:
+        candidates = rank_diseases_from_symptoms(text, model_pipeline, k=5)
+        assert len(candidates) == 5
+        assert candidates[0]['disease'] == predict_disease_from_symptoms(text, model_pipeline)
+        scores = [c['score'] for c in candidates]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_top_k_agrees_with_full_sort():
+    rng = np.random.default_rng(0)
+    scores = rng.normal(size=(20, 50))
+    classes = np.array([f'disease {i}' for i in range(50)])
+    for row, ranked in zip(scores, top_k(scores, classes, k=7)):
+        expected = np.argsort(-row)[:7]
+        assert [c['disease'] for c in ranked] == [classes[i].title() for i in expected]
+
+
+def test_calibrated_confidences(model_pipeline, training_corpus):
+    texts, labels = training_corpus
+    model = model_pipeline['model']
+    scores = model.decision_function(model_pipeline['vectorizer'].transform(texts[:300]))
+    index = {label: i for i, label in enumerate(model.classes_)}
+    calibration = fit_temperature(scores, [index[label] for label in labels[:300]])
+    assert calibration['method'] == 'temperature' and calibration['temperature'] > 0
+
+    ranked = top_k(scores[:3], model.classes_, k=3, calibration=calibration)
+    for candidates in ranked:
+        confidences = [c['confidence'] for c in candidates]
+        assert all(0.0 <= c <= 1.0 for c in confidences)
+        assert confidences == sorted(confidences, reverse=True)
+
+
+def test_predict_candidates_endpoint(client):
+    response = client.post('/predict/candidates', json={'symptoms': 'fever, cough, fatigue', 'k': 3})
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['success'] and len(data['candidates']) == 3
+    assert data['calibrated'] is False
+    assert client.post('/predict/candidates', json={'symptoms': ''}).status_code == 400
+
+
+def test_low_confidence_skips_recommendations(client, model_pipeline, monkeypatch):
+    monkeypatch.setitem(model_pipeline, 'calibration', {'method': 'temperature', 'temperature': 1.0})
+    monkeypatch.setattr(main, 'MIN_PREDICTION_CONFIDENCE', 1.1)
+    monkeypatch.setattr(main, 'helper', lambda dis: (_ for _ in ()).throw(AssertionError('helper called')))
+
+    response = client.post('/predict', data={'symptoms': 'fever, cough'})
+    assert response.status_code == 200
+    assert b'Possible conditions' in response.data
+
+
+def test_api_predict_returns_compact_json(client):
+    response = client.post('/api/predict', json={'symptoms': 'fever, cough, fatigue'})
+    assert response.status_code == 200 and response.mimetype == 'application/json'
+    assert b': ' not in response.data.split(b'"candidates"')[0]
+
+    data = response.get_json()
+    assert data['success'] and data['predicted_disease'] == data['candidates'][0]['disease']
+    assert data['recommendations'] == main.get_recommendations(data['predicted_disease'])
+
+    # Form posts work too, and the serialized recommendations are reused
+    again = client.post('/api/predict', data={'symptoms': 'cough, fever, fatigue'}).get_json()
+    assert again == data
+    assert data['predicted_disease'] in main.resources.get('recommendation_json')
+
+
+def test_api_predict_requires_symptoms(client):
+    assert client.post('/api/predict', json={}).status_code == 400
+    assert client.post('/api/predict', json={'symptoms': '  '}).status_code == 400
@@ -0,0 +1,55 @@
+"""
+Parity tests for the precomputed recommendation index.
+The index must return exactly what the old per-request DataFrame scan returned.
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+from recommendation_index import build_recommendation_index, lookup_recommendations_scan
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def tables():
+    def load(name):
+        return pd.read_csv(os.path.join(BASE_DIR, name))
+
+    return (load('description.csv'), load('precautions_df.csv'), load('medications.csv'),
+            load('diets.csv'), load('workout_df.csv'), load('causes.csv'), load('treatment_lookup.csv'))
+
+
+def _same(got, want):
+    if isinstance(want, float) and pd.isna(want):  # NaN descriptions never equal themselves
+        return isinstance(got, float) and pd.isna(got)
+    return got == want
+
+
+def test_index_matches_dataframe_scan(tables):
+    index = build_recommendation_index(*tables)
+
+    names = set()
+    for df in tables:
+        col = 'disease' if 'disease' in df.columns else ('Name' if 'Name' in df.columns else 'Disease')
+        names.update(df[col].dropna().astype(str))
+    probes = sorted(names) + [n.title() for n in sorted(names)] + [
+        'Flu', 'Cold', 'Diabetes', 'itis', 'Common Cold ', '  malaria', 'General Health Checkup Recommended',
+        'Unknown Disease Xyz', '',
+    ]
+
+    for dis in probes:
+        expected = lookup_recommendations_scan(dis, *tables)
+        actual = index.lookup(dis)
+        assert len(actual) == len(expected)
+        for got, want in zip(actual, expected):
+            assert _same(got, want), dis
+
+
+def test_lookup_returns_fresh_lists(tables):
+    index = build_recommendation_index(*tables)
+    _, _, med, _, _, _ = index.lookup('Malaria')
+    med.append('mutated')
+    assert 'mutated' not in index.lookup('Malaria')[2]
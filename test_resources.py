@@ -0,0 +1,86 @@
+"""Tests for the lazy resource registry."""
+
+import os
+import threading
+import time
+
+from resources import ResourceRegistry
+
+
+def test_loads_once_on_first_access():
+    calls = []
+    registry = ResourceRegistry()
+    registry.register('data', lambda: calls.append(1) or 'value')
+
+    assert not registry.is_loaded('data') and calls == []
+    assert registry.get('data') == 'value'
+    assert registry.get('data') == 'value'
+    assert calls == [1]
+    assert 'data' in registry.timings()
+
+
+def test_concurrent_first_access_loads_once():
+    calls = []
+
+    def slow_loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return object()
+
+    registry = ResourceRegistry()
+    registry.register('model', slow_loader)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get('model'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_warmup_and_reset():
+    registry = ResourceRegistry()
+    registry.register('a', lambda: 1)
+    registry.register('b', lambda: 2)
+    assert set(registry.warmup()) == {'a', 'b'}
+
+    registry.reset(['a'])
+    assert not registry.is_loaded('a') and registry.is_loaded('b')
+
+
+def test_reset_closes_the_old_value():
+    closed = []
+    registry = ResourceRegistry()
+    registry.register('provider', object, close=closed.append)
+    registry.register('none', lambda: None, close=closed.append)
+    first = registry.get('provider')
+    registry.get('none')
+
+    registry.reset()
+    assert closed == [first]
+    registry.reset(['provider'])
+    assert closed == [first]
+    assert registry.get('provider') is not first
+
+
+def test_static_routes_do_not_load_resources():
+    import main
+
+    main.resources.reset()
+    response = main.app.test_client().get('/about')
+    assert response.status_code == 200
+    assert not any(main.resources.is_loaded(name) for name in main.resources.names())
+
+
+def test_watched_files_cover_resource_sources():
+    import main
+
+    watched = {os.path.basename(path) for path in main.prediction_cache.watcher.paths}
+    # symptom_classifier
+    assert 'Training.csv' in watched
+    # triage
+    assert 'Symptom-severity.csv' in watched
+    # symptom_suggester
+    assert {'Symptom-severity.csv', 'symtoms_df.csv'} <= watched
@@ -0,0 +1,20 @@
+"""Tests for the production entry point (serve.py) and the readiness probe."""
+
+import main
+import serve
+
+
+def test_ready_reports_503_until_warmup(client, monkeypatch):
+    monkeypatch.setattr(main, '_warmup_complete', False)
+    response = client.get('/ready')
+    assert response.status_code == 503 and response.get_json()['ready'] is False
+
+    monkeypatch.setattr(main, '_warmup_complete', True)
+    response = client.get('/ready')
+    assert response.status_code == 200 and response.get_json()['ready'] is True
+
+
+def test_gunicorn_options_preload_and_pick_worker_class():
+    options = serve.gunicorn_options('127.0.0.1:8000', workers=4, threads=1, timeout=30)
+    assert options['preload_app'] is True and options['workers'] == 4 and options['worker_class'] == 'sync'
+    assert serve.gunicorn_options('127.0.0.1:8000', workers=2, threads=8, timeout=30)['worker_class'] == 'gthread'
@@ -0,0 +1,67 @@
+"""Tests for the grid spatial index, checked against brute-force haversine."""
+
+import numpy as np
+import pytest
+
+from spatial_index import SpatialIndex, haversine_km
+
+
+@pytest.fixture(scope='module')
+def points():
+    rng = np.random.default_rng(0)
+    # Dense clusters (a city, the antimeridian, near a pole) plus uniform global points
+    lats = np.concatenate([rng.normal(40.7, 0.1, 3000), rng.uniform(-10, 10, 1000),
+                           rng.uniform(85, 90, 500), rng.uniform(-90, 90, 2000)])
+    lngs = np.concatenate([rng.normal(-74.0, 0.1, 3000), rng.choice([-179.9, 179.9], 1000) + rng.normal(0, 0.05, 1000),
+                           rng.uniform(-180, 180, 500), rng.uniform(-180, 180, 2000)])
+    lngs = (lngs + 180) % 360 - 180
+    types = rng.choice(['Hospital', 'Clinic', 'Pharmacy'], len(lats))
+    open_now = rng.random(len(lats)) < 0.5
+    return lats, lngs, types, open_now
+
+
+QUERIES = [(40.7, -74.0, 2.0), (40.7, -74.0, 25.0), (0.0, 180.0, 30.0), (0.0, -179.95, 300.0),
+           (89.0, 10.0, 400.0), (-45.0, 60.0, 3000.0), (12.0, 77.0, 25000.0)]
+
+
+@pytest.mark.parametrize('lat,lng,radius_km', QUERIES)
+def test_radius_matches_brute_force(points, lat, lng, radius_km):
+    lats, lngs, types, open_now = points
+    index = SpatialIndex(lats, lngs, cell_deg=0.05, attributes={'type': types, 'open_now': open_now})
+    distances = haversine_km(lat, lng, lats, lngs)
+
+    positions, km = index.radius(lat, lng, radius_km)
+    assert set(positions) == set(np.flatnonzero(distances <= radius_km))
+    assert np.all(np.diff(km) >= 0)
+    np.testing.assert_allclose(km, distances[positions])
+
+    positions, _ = index.radius(lat, lng, radius_km, type=['Clinic', 'Hospital'], open_now=True)
+    expected = (distances <= radius_km) & np.isin(types, ['Clinic', 'Hospital']) & open_now
+    assert set(positions) == set(np.flatnonzero(expected))
+
+
+def test_nearest_matches_brute_force(points):
+    lats, lngs, types, _ = points
+    index = SpatialIndex(lats, lngs, cell_deg=0.05, attributes={'type': types})
+    for lat, lng, _ in QUERIES:
+        distances = haversine_km(lat, lng, lats, lngs)
+        positions, km = index.nearest(lat, lng, k=15)
+        np.testing.assert_allclose(km, np.sort(distances)[:15])
+
+        positions, km = index.nearest(lat, lng, k=5, type='Pharmacy')
+        pharmacy = np.flatnonzero(types == 'Pharmacy')
+        np.testing.assert_allclose(km, np.sort(distances[pharmacy])[:5])
+        assert all(types[p] == 'Pharmacy' for p in positions)
+
+
+def test_limits_and_bad_input(points):
+    lats, lngs, types, _ = points
+    index = SpatialIndex(lats, lngs, attributes={'type': types})
+    positions, km = index.radius(40.7, -74.0, 50, limit=3)
+    assert len(positions) == 3 and np.all(np.diff(km) >= 0)
+    assert len(index.radius(40.7, -74.0, 50, type='Dentist')[0]) == 0
+    assert len(index.nearest(40.7, -74.0, k=5, max_radius_km=0.001)[0]) <= 5
+    with pytest.raises(KeyError):
+        index.radius(40.7, -74.0, 5, colour='red')
+    with pytest.raises(ValueError):
+        SpatialIndex([4000.0], [1.0])
@@ -0,0 +1,87 @@
+"""Tests for typo correction before vectorizing."""
+
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import main
+from spelling import SpellingCorrector, edit_distance
+
+CORPUS = [
+    'headache, fever, chest pain',
+    'stomach pain, vomiting, nausea',
+    'skin rash, itching, fever',
+    'breathlessness, chest pain, cough',
+    'diarrhoea, stomach pain, fever',
+]
+
+
+@pytest.fixture(scope='module')
+def corrector():
+    vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2)).fit(CORPUS)
+    return SpellingCorrector.from_vectorizer(vectorizer)
+
+
+def test_edit_distance():
+    assert edit_distance('headache', 'headache', 2) == 0
+    assert edit_distance('hedache', 'headache', 2) == 1
+    assert edit_distance('pian', 'pain', 2) == 1
+    assert edit_distance('abcdef', 'ab', 2) == 3
+    assert edit_distance('fever', 'cough', 2) == 3
+
+
+def test_corrects_unknown_tokens(corrector):
+    assert corrector.correct('stomache pain') == 'stomach pain'
+    assert corrector.correct('hedache and fevr, chest pian') == 'headache and fever, chest pain'
+    assert corrector.correct('breathlesness') == 'breathlessness'
+    assert corrector.corrections('itchng skin rassh') == [('itchng', 'itching'), ('rassh', 'rash')]
+
+
+def test_leaves_known_short_and_distant_tokens(corrector):
+    # Known words, stop words, short tokens, digits and far-off words are kept
+    text = 'i have a fever with 39c and zzzzzz since monday'
+    assert corrector.correct(text) == text
+    assert corrector.correct('') == ''
+
+
+def test_ties_go_to_the_more_frequent_word():
+    corrector = SpellingCorrector({'fever': 3.0, 'fewer': 1.0})
+    assert corrector.correct_token('fevet') == 'fever'
+
+
+def test_corrections_are_cached(corrector):
+    corrector.cache.clear()
+    corrector.correct('hedache')
+    corrector.correct('hedache, hedache')
+    stats = corrector.cache.stats()
+    assert stats['size'] == 1 and stats['hits'] == 2
+
+    bounded = SpellingCorrector({'headache': 1.0, 'fever': 1.0}, cache_size=1)
+    bounded.correct('hedache fevr')
+    assert len(bounded.cache) == 1
+
+
+def test_prediction_uses_corrected_text(client, model_pipeline, monkeypatch):
+    monkeypatch.setattr(main, 'CASCADE_ENABLED', False)
+    vectorizer = model_pipeline['vectorizer']
+    assert 'fatigue' in vectorizer.vocabulary_
+    assert main.correct_spelling('fatiuge, sore throat') == 'fatigue, sore throat'
+
+    before = main.metrics.counter_value('medi_spelling_corrections_total')
+    misspelled = main.rank_diseases_from_symptoms('fatiuge, sore throat', model_pipeline)
+    assert misspelled == main.rank_diseases_from_symptoms('fatigue, sore throat', model_pipeline)
+    assert main.predict_diseases_batch(['fatiuge, sore throat'], model_pipeline) == [
+        main.predict_disease_from_symptoms('fatigue, sore throat', model_pipeline)]
+    assert main.metrics.counter_value('medi_spelling_corrections_total') == before + 2
+
+    monkeypatch.setattr(main, 'SPELL_CORRECTION', False)
+    assert main.correct_spelling('fatiuge') == 'fatiuge'
+
+
+def test_hashing_models_are_not_corrected(hashing_pipeline):
+    main.resources.override('model', hashing_pipeline)
+    main.resources.reset(['spelling_corrector'])
+    try:
+        assert main.resources.get('spelling_corrector') is None
+        assert main.correct_spelling('hedache') == 'hedache'
+    finally:
+        main.resources.reset(['model', 'spelling_corrector'])
@@ -0,0 +1,77 @@
+"""Tests for out-of-core training (medicine_rec_train.py --streaming)."""
+
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import streaming_train
+from medicine_rec_train import VECTORIZER_PARAMS
+from model_artifact import load_model_artifact
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _chunks(texts, size):
+    for start in range(0, len(texts), size):
+        part = texts[start:start + size]
+        yield pd.DataFrame({'symptoms': part, 'disease': ['x'] * len(part)})
+
+
+def test_two_pass_vocabulary_matches_tfidf_vectorizer(training_corpus):
+    texts = training_corpus[0][:1500]
+    scan = streaming_train.scan_corpus(_chunks(texts, 200), 'vocabulary')
+    streamed = streaming_train.build_vectorizer(scan, 'vocabulary', max_features=100000)
+
+    reference = TfidfVectorizer(**{**VECTORIZER_PARAMS, 'max_features': None}).fit(texts)
+    assert streamed.vocabulary_ == reference.vocabulary_
+    np.testing.assert_allclose(streamed.idf_, reference.idf_)
+    assert abs(streamed.transform(texts[:50]) - reference.transform(texts[:50])).max() < 1e-12
+
+
+def test_hashing_vectorizer_is_normalized(training_corpus):
+    texts = training_corpus[0][:300]
+    scan = streaming_train.scan_corpus(_chunks(texts, 100), 'hashing')
+    X = streaming_train.build_vectorizer(scan, 'hashing').transform(texts)
+    assert X.shape == (300, streaming_train.HASHING_FEATURES)
+    norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+    np.testing.assert_allclose(norms[norms > 0], 1.0)
+
+
+@pytest.mark.parametrize('vectorizer_kind', ['vocabulary', 'hashing'])
+def test_train_streaming_end_to_end(tmp_path, monkeypatch, vectorizer_kind):
+    for name in ('Diseases_Symptoms.csv', 'disease_diagnosis.csv'):
+        os.symlink(os.path.join(BASE_DIR, name), tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    # An artifact left by an earlier run
+    os.mkdir('disease_model_arrays')
+
+    report = streaming_train.train_streaming(chunksize=300, epochs=2, vectorizer_kind=vectorizer_kind,
+                                             baseline='fit')
+    assert report['eval_rows'] > 0 and 0 < report['accuracy'] <= 1
+    assert 0 < report['baseline']['accuracy'] <= 1
+
+    pipeline = joblib.load('disease_model.joblib')
+    assert 'calibration' in pipeline
+    assert pipeline['model'].predict(pipeline['vectorizer'].transform(['fever, cough']))[0] in pipeline['model'].classes_
+    assert os.path.exists('disease_model_arrays') == (vectorizer_kind == 'vocabulary')
+    if vectorizer_kind == 'vocabulary':
+        assert load_model_artifact('disease_model_arrays').classes == list(pipeline['model'].classes_)
+
+
+def test_calibration_rows_are_kept_out_of_training_and_evaluation(tmp_path, monkeypatch):
+    os.symlink(os.path.join(BASE_DIR, 'Diseases_Symptoms.csv'), tmp_path / 'Diseases_Symptoms.csv')
+    monkeypatch.chdir(tmp_path)
+
+    def rows(chunks):
+        return set(map(tuple, pd.concat(chunks)[['symptoms', 'disease']].to_numpy().tolist()))
+
+    training = rows(streaming_train.stream_training_chunks(200, holdout=True, calibration=True))
+    calibration = rows(streaming_train.stream_calibration_chunks(200))
+    evaluation = rows(streaming_train.stream_evaluation_chunks(200, holdout=True))
+    assert calibration and evaluation and training
+    assert not (calibration & training) and not (calibration & evaluation) and not (training & evaluation)
+    assert rows(streaming_train.stream_training_chunks(200, holdout=True)) == training | calibration
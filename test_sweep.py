@@ -0,0 +1,49 @@
+"""Tests for the hyperparameter and model-family sweep (sweep.py)."""
+
+import csv
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import sweep
+from medicine_rec_train import VECTORIZER_PARAMS
+
+
+@pytest.fixture(scope='module')
+def corpus(training_corpus):
+    texts, labels = training_corpus
+    rows = pd.DataFrame({'symptoms': texts, 'disease': labels})
+    counts = rows['disease'].value_counts()
+    rows = rows[rows['disease'].isin(counts[counts >= 4].index)].reset_index(drop=True)
+    test = np.arange(len(rows)) % 4 == 0
+    return rows['symptoms'][~test], rows['disease'][~test], rows['symptoms'][test], rows['disease'][test]
+
+
+def test_vectorizer_grid_and_labels():
+    params = sweep.vectorizer_grid(VECTORIZER_PARAMS, {'max_features': [5000, 100], 'min_df': [1]})
+    assert len(params) == 2 and all(p['stop_words'] == 'english' for p in params)
+    assert [sweep.describe_params(p, VECTORIZER_PARAMS) for p in params] == ['min_df=1', 'max_features=100,min_df=1']
+
+
+def test_sweep_fits_every_pair_with_shared_matrices(tmp_path, corpus):
+    params = [VECTORIZER_PARAMS, {**VECTORIZER_PARAMS, 'ngram_range': (1, 1)}]
+    models = ['linear_svc', 'complement_nb', 'sgd']
+    results = sweep.run_sweep(*corpus, models=models, vectorizer_params=params, n_jobs=2, cache_dir=str(tmp_path))
+
+    assert {(r['vectorizer'], r['model']) for r in results} == {
+        (v, m) for v in ['default', 'ngram_range=(1, 1)'] for m in models}
+    # One cached TF-IDF fit per vectorizer setting, however many models use it
+    assert len(list(tmp_path.iterdir())) == 2
+    assert [r['accuracy'] for r in results] == sorted((r['accuracy'] for r in results), reverse=True)
+    assert all(0 < r['accuracy'] <= 1 and r['latency_us'] > 0 and r['model_kb'] > 0 for r in results)
+
+    sweep.write_leaderboard(results, tmp_path / 'board.csv')
+    with open(tmp_path / 'board.csv') as f:
+        assert len(list(csv.DictReader(f))) == len(results)
+    assert 'complement_nb' in sweep.format_leaderboard(results)
+
+
+def test_unknown_model_family(corpus):
+    with pytest.raises(ValueError):
+        sweep.run_sweep(*corpus, models=['random_forest'])
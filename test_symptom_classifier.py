@@ -0,0 +1,114 @@
+"""Tests for the structured first-stage classifier and the prediction cascade."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from recommendation_index import _missing_description
+from symptom_classifier import StructuredSymptomClassifier, label_key, normalize_symptom
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def classifier():
+    return StructuredSymptomClassifier.from_csv(os.path.join(BASE_DIR, 'Training.csv'))
+
+
+def test_encode_accepts_only_known_symptoms(classifier):
+    assert normalize_symptom('Spotting_ urination') == 'spotting urination'
+    ids = classifier.encode('skin rash, itching; itching')
+    assert list(ids) == sorted({classifier.symptom_ids['skin rash'], classifier.symptom_ids['itching']})
+    assert classifier.encode('headache and nausea') is not None
+    assert classifier.encode('cold hands and feets') is not None
+    assert classifier.encode('itching, i feel terrible') is None
+    assert classifier.encode('') is None
+
+
+def test_confident_answers_match_training_labels(classifier):
+    df = pd.read_csv(os.path.join(BASE_DIR, 'Training.csv'))
+    symptoms = np.array([c for c in df.columns if c != 'prognosis'])
+    rng = np.random.default_rng(0)
+    hits = 0
+    for row in df.sample(300, random_state=0).itertuples(index=False):
+        present = symptoms[np.asarray(row[:-1], dtype=bool)]
+        query = ', '.join(s.replace('_', ' ') for s in rng.permutation(present)[:3])
+        best = classifier.rank(classifier.encode(query), k=3)[0]
+        if best['confidence'] >= 0.9:
+            hits += 1
+            assert best['disease'].lower() == row[-1].strip().lower()
+    assert hits > 150
+
+
+def test_cascade_routes_structured_and_free_text(model_pipeline, client):
+    before = main.cascade_stats()
+    structured = main.rank_diseases_from_symptoms('itching, skin rash, nodal skin eruptions', model_pipeline,
+                                                  cascade=True)
+    assert structured[0]['disease'] == 'Fungal Infection' and structured[0]['confidence'] >= 0.9
+    main.predict_disease_from_symptoms('My head hurts and I feel dizzy', model_pipeline, cascade=True)
+
+    stats = client.get('/cascade/stats').get_json()
+    assert stats['requests'] == before['requests'] + 2
+    assert stats['structured']['hits'] == before['structured']['hits'] + 1
+    assert stats['tfidf']['unmapped'] == before['tfidf']['unmapped'] + 1
+    assert stats['structured']['latency']['p50_ms'] > 0
+
+
+def test_cascade_is_opt_in_for_the_served_model(model_pipeline, client):
+    text = 'itching, skin rash, nodal skin eruptions'
+    model = model_pipeline['model']
+    expected = model.predict(model_pipeline['vectorizer'].transform([main.preprocess_text(text)]))[0].title()
+    before = main.cascade_stats()['requests']
+    assert main.predict_disease_from_symptoms(text, model_pipeline) == expected
+    # Another pipeline never goes through the classifier mapped onto the served model
+    other = dict(model_pipeline)
+    assert main.predict_diseases_batch([text], other, cascade=True) == [expected]
+    assert main.rank_diseases_from_symptoms(text, other, k=1, cascade=True)[0]['disease'] == expected
+    assert main.cascade_stats()['requests'] == before
+
+
+def test_cascade_disabled_uses_tfidf(model_pipeline, monkeypatch):
+    monkeypatch.setattr(main, 'CASCADE_ENABLED', False)
+    text = 'itching, skin rash, nodal skin eruptions'
+    model = model_pipeline['model']
+    expected = model.predict(model_pipeline['vectorizer'].transform([main.preprocess_text(text)]))[0].title()
+    assert main.predict_disease_from_symptoms(text, model_pipeline) == expected
+
+
+def test_relabel_maps_onto_known_labels():
+    classifier = StructuredSymptomClassifier(['fever'], ['Peptic ulcer diseae', '(vertigo) Paroymsal  Positional Vertigo',
+                                                         'Hepatitis D', 'Unknown'], np.zeros((1, 4)), np.zeros(4))
+    labels = ['Peptic ulcer disease', '(vertigo) Paroymsal Positional Vertigo', 'Hepatitis E', 'Hepatitis D']
+    assert label_key(' (Vertigo) Paroymsal  Positional_Vertigo') == 'vertigo paroymsal positional vertigo'
+    assert classifier.relabel(labels) == {'Peptic ulcer diseae': 'Peptic ulcer disease',
+                                          '(vertigo) Paroymsal  Positional Vertigo': labels[1]}
+    assert list(classifier.classes) == labels[:2] + ['Hepatitis D', 'Unknown']
+
+
+def test_every_cascade_class_resolves_in_recommendation_index(client):
+    main.resources.reset(['symptom_classifier'])
+    classifier = main.resources.get('symptom_classifier')
+    index = main.resources.get('recommendation_index')
+    for disease in (str(label).title() for label in classifier.classes):
+        assert index.lookup(disease)[0] != _missing_description(disease), disease
+
+
+def test_batch_matches_single_predictions(model_pipeline, client):
+    df = pd.read_csv(os.path.join(BASE_DIR, 'Training.csv'))
+    symptoms = np.array([c for c in df.columns if c != 'prognosis'])
+    rng = np.random.default_rng(1)
+    texts = [', '.join(s.replace('_', ' ') for s in rng.permutation(symptoms[np.asarray(row, dtype=bool)])[:2])
+             for row in df[symptoms].sample(200, random_state=1).to_numpy()]
+    texts += ['My head hurts and I feel dizzy', '', 'itching, skin rash, nodal skin eruptions']
+
+    before = main.cascade_stats()
+    batch = main.predict_diseases_batch(texts, model_pipeline, cascade=True)
+    middle = main.cascade_stats()
+    assert batch == [main.predict_disease_from_symptoms(text, model_pipeline, cascade=True) for text in texts]
+    after = main.cascade_stats()
+    assert middle['requests'] - before['requests'] == after['requests'] - middle['requests'] == len(texts)
+    assert middle['structured']['hits'] - before['structured']['hits'] == \
+        after['structured']['hits'] - middle['structured']['hits'] > 0
@@ -0,0 +1,77 @@
+"""Tests for symptom autocomplete (symptom_suggest.py and /symptoms/suggest)."""
+
+import os
+import time
+
+import pandas as pd
+
+from symptom_suggest import SymptomSuggester, normalize_phrase, symptom_phrases
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_ranks_by_severity_then_frequency():
+    suggester = SymptomSuggester({
+        'stomach_pain': {'severity': 5, 'count': 10},
+        'stiff_neck': {'severity': 4, 'count': 500},
+        'stomach bleeding': {'severity': 6},
+        'steroid': {'document_frequency': 0.5},
+        'stress': {'document_frequency': 0.9},
+    })
+    assert [s['symptom'] for s in suggester.suggest('st')] == [
+        'stomach bleeding', 'stomach pain', 'stiff neck', 'stress', 'steroid']
+    assert suggester.suggest('st', limit=1) == [{'symptom': 'stomach bleeding', 'severity': 6}]
+    # Later words match too, and multi-word prefixes narrow the result
+    assert [s['symptom'] for s in suggester.suggest('PAIN')] == ['stomach pain']
+    assert [s['symptom'] for s in suggester.suggest('stomach_b')] == ['stomach bleeding']
+    assert suggester.suggest('') == [] and suggester.suggest('zzz') == []
+
+
+def test_matches_linear_scan_on_bundled_vocabulary():
+    phrases = symptom_phrases(pd.read_csv(os.path.join(BASE_DIR, 'Symptom-severity.csv')),
+                              pd.read_csv(os.path.join(BASE_DIR, 'symtoms_df.csv')))
+    suggester = SymptomSuggester(phrases)
+    assert 'dischromic patches' in suggester.phrases and 'spotting urination' in suggester.phrases
+    for query in ['a', 'pa', 'skin', 'yellow', 'f', 'loss of']:
+        matches = [p for p in suggester.phrases if any(w.startswith(normalize_phrase(query))
+                                                       for w in [' '.join(p.split(' ')[i:]) for i in range(len(p.split(' ')))])]
+        assert [s['symptom'] for s in suggester.suggest(query, limit=7)] == matches[:7]
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        suggester.suggest('s')
+    assert (time.perf_counter() - start) / 1000 < 1e-3
+
+
+def test_suggest_endpoint(client):
+    response = client.get('/symptoms/suggest?q=chest&limit=3')
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['query'] == 'chest' and data['suggestions'][0]['symptom'] == 'chest pain'
+    assert len(data['suggestions']) <= 3
+    assert client.get('/symptoms/suggest?q=chest&limit=x').status_code == 400
+
+
+def test_suggest_without_a_model_vocabulary(client, hashing_pipeline):
+    import main
+
+    main.resources.override('model', hashing_pipeline)
+    main.resources.reset(['symptom_suggester'])
+    try:
+        response = client.get('/symptoms/suggest?q=chest')
+        assert response.status_code == 200
+        assert response.get_json()['suggestions'][0]['symptom'] == 'chest pain'
+    finally:
+        main.resources.reset(['symptom_suggester'])
+
+
+def test_vectorizer_bigrams_are_not_suggested():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(ngram_range=(1, 2)).fit(['stomach pain fever', 'pain fever', 'stomach pain'])
+    phrases = symptom_phrases(vectorizer=vectorizer, known_symptoms=['stomach_pain'])
+    assert 'pain fever' not in phrases and 'fever' in phrases
+    assert phrases['stomach pain']['document_frequency'] > 0
+
+    suggester = SymptomSuggester(phrases)
+    assert 'pain fever' not in [s['symptom'] for s in suggester.suggest('pain', limit=50)]
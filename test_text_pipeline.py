@@ -0,0 +1,85 @@
+"""Tests for the shared text normalization and the memoized token encoder."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+import main
+from inference_engine import load_inference_pipeline
+from model_artifact import export_model_artifact
+from text_pipeline import TokenEncoder, normalize_series, preprocess_text
+
+RAW_TEXTS = ['Fever [citation needed]  and   COUGH ', '\tItchy\nskin rash', '', 'the and of',
+             'chest pain; shortness of breath; chest pain', 'café naïve', '12 34 x y z']
+
+
+def test_normalize_series_matches_preprocess_text():
+    texts = pd.Series(RAW_TEXTS + [None, 42])
+    assert list(normalize_series(texts)) == [preprocess_text(text) for text in texts]
+    assert preprocess_text('Fever [note]  and   COUGH ') == 'fever and cough'
+
+
+@pytest.mark.parametrize('params', [
+    {},
+    {'sublinear_tf': True},
+    {'binary': True, 'norm': 'l1'},
+    {'use_idf': False, 'norm': None},
+])
+def test_rows_match_sklearn(training_corpus, params):
+    vectorizer = TfidfVectorizer(stop_words='english', ngram_range=(1, 2), **params).fit(training_corpus[0])
+    texts = training_corpus[0][:200] + RAW_TEXTS
+    expected = vectorizer.transform([preprocess_text(text) for text in texts]).toarray()
+    actual = TokenEncoder(vectorizer).transform(texts).toarray()
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+
+def test_rows_match_numpy_engine(model_pipeline, training_corpus, tmp_path):
+    engine = load_inference_pipeline(export_model_artifact(model_pipeline, str(tmp_path / 'arrays')))
+    texts = training_corpus[0][:200] + RAW_TEXTS
+    encoded = TokenEncoder(engine['vectorizer']).transform(texts)
+    expected = engine['vectorizer'].transform([preprocess_text(text) for text in texts])
+    assert type(encoded) is type(expected)
+    np.testing.assert_allclose(encoded.toarray(), expected.toarray(), rtol=1e-12, atol=1e-12)
+    np.testing.assert_array_equal(engine['model'].predict(encoded), engine['model'].predict(expected))
+
+
+def test_rows_are_memoized(model_pipeline):
+    encoder = TokenEncoder(model_pipeline['vectorizer'], correct=lambda text: text.replace('fevr', 'fever'),
+                           cache_size=2)
+    first = encoder.encode('Fevr, cough')
+    assert first.corrected
+    assert encoder.encode('Fevr, cough') is first
+    assert encoder.cache.stats()['hits'] == 1
+    encoder.transform(['a', 'b', 'c'])
+    assert len(encoder.cache) == 2
+    assert encoder.transform([]).shape == (0, len(model_pipeline['vectorizer'].vocabulary_))
+
+
+def test_app_vectorizes_through_the_encoder(client, model_pipeline):
+    texts = ['fever, cough', 'sore throat and fatigue', 'fever, cough']
+    encoder = main.resources.get('token_encoder')
+    assert encoder.vectorizer is model_pipeline['vectorizer']
+    np.testing.assert_allclose(main.vectorize_symptoms(texts, model_pipeline).toarray(),
+                               model_pipeline['vectorizer'].transform(texts).toarray(), rtol=1e-12, atol=1e-12)
+    assert encoder.cache.stats()['hits'] >= 1
+
+
+def test_hashing_models_are_vectorized_directly(hashing_pipeline):
+    main.resources.override('model', hashing_pipeline)
+    main.resources.reset(['spelling_corrector', 'token_encoder'])
+    try:
+        assert main.resources.get('token_encoder') is None
+        X = main.vectorize_symptoms(['fever headache'], hashing_pipeline)
+        assert abs(X - hashing_pipeline['vectorizer'].transform(['fever headache'])).max() == 0
+        assert len(main.rank_diseases_from_symptoms('fever headache', hashing_pipeline, k=3)) == 3
+    finally:
+        main.resources.reset(['model', 'spelling_corrector', 'token_encoder'])
+
+
+def test_explicit_pipelines_do_not_load_the_served_model(model_pipeline):
+    main.resources.reset(['model', 'spelling_corrector', 'token_encoder'])
+    texts = ['fever, cough', 'fatiuge']
+    X = main.vectorize_symptoms(texts, model_pipeline)
+    assert not main.resources.is_loaded('model') and not main.resources.is_loaded('token_encoder')
+    assert abs(X - model_pipeline['vectorizer'].transform(texts)).max() == 0
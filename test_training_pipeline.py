@@ -0,0 +1,60 @@
+"""Tests for the vectorized and cached training feature pipeline."""
+
+import numpy as np
+import pandas as pd
+
+import medicine_rec_train as training
+
+
+def test_preprocess_series_matches_preprocess_text():
+    texts = pd.Series(['Fever [citation needed]  and   COUGH ', None, 42, '\tItchy\nskin ', ''])
+    expected = [training.preprocess_text(text) for text in texts]
+    assert list(training.preprocess_series(texts)) == expected
+
+
+def test_join_symptom_columns_matches_row_join():
+    df = pd.DataFrame({
+        'Symptom_1': ['fever', np.nan, 'cough', np.nan],
+        'Symptom_2': [np.nan, 'rash', 'fatigue', np.nan],
+        'Symptom_3': ['chills', 'itching', np.nan, np.nan],
+    })
+    columns = ['Symptom_1', 'Symptom_2', 'Symptom_3']
+    expected = df[columns].apply(lambda row: ', '.join(row.dropna()), axis=1)
+    assert list(training.join_symptom_columns(df, columns)) == list(expected)
+
+
+def test_vectorize_reuses_cached_matrices(tmp_path):
+    X_train = pd.Series(['fever cough', 'itchy skin rash', 'stomach pain nausea'])
+    X_test = pd.Series(['fever rash'])
+
+    vectorizer, X_train_tfidf, X_test_tfidf = training.vectorize(X_train, X_test, str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 1
+
+    cached_vectorizer, cached_train, cached_test = training.vectorize(X_train, X_test, str(tmp_path))
+    assert cached_vectorizer.vocabulary_ == vectorizer.vocabulary_
+    assert (cached_train != X_train_tfidf).nnz == 0
+    assert (cached_test != X_test_tfidf).nnz == 0
+
+    # A different corpus gets its own cache entry
+    training.vectorize(X_train, pd.Series(['headache']), str(tmp_path))
+    assert len(list(tmp_path.iterdir())) == 2
+
+
+def test_validation_split_is_stratified():
+    y = np.array(['a'] * 10 + ['b'] * 3 + ['c'] + ['d'] * 2)
+    holdout = training.validation_split(y, fraction=0.2, seed=0)
+    assert {label: int(holdout[y == label].sum()) for label in 'abcd'} == {'a': 2, 'b': 1, 'c': 0, 'd': 0}
+    # Every class keeps a training row
+    assert set(y[~holdout]) == set(y)
+
+
+def test_calibration_is_fitted_on_training_rows_only(training_corpus):
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    texts, labels = training_corpus
+    vectorizer = TfidfVectorizer(**training.VECTORIZER_PARAMS).fit(texts)
+    X, y = vectorizer.transform(texts), np.asarray(labels, dtype=object)
+    calibration = training.fit_calibration(X, y, 'class_weight')
+    assert calibration['method'] == 'temperature' and calibration['temperature'] > 0
+    # Only the training matrix is seen: the same rows give the same temperature
+    assert training.fit_calibration(X, y, 'class_weight') == calibration
@@ -0,0 +1,79 @@
+"""Tests for severity scoring and urgency triage."""
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from triage import SeverityTriage, symptom_phrase
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def triage():
+    return SeverityTriage.from_csv(os.path.join(BASE_DIR, 'Symptom-severity.csv'))
+
+
+def test_symptom_phrases(triage):
+    assert symptom_phrase('Toxic_look_(typhos)') == 'toxic look typhos'
+    assert symptom_phrase(' dischromic _patches') == 'dischromic patches'
+    assert 'prognosis' not in triage.symptoms
+    # Duplicated rows keep the larger weight
+    assert triage.weights[triage.symptoms.index('fluid_overload')] == 6
+
+
+def test_assess(triage):
+    assert triage.assess('chest pain and shortness of breath') == {
+        'level': 'emergency', 'score': 11, 'symptoms': ['breathlessness', 'chest_pain'],
+        'rules': ['chest_pain_with_breathlessness']}
+    assert triage.assess('itching, skin_rash') == {'level': 'low', 'score': 4, 'symptoms': ['itching', 'skin_rash'],
+                                                   'rules': []}
+    assert triage.assess('i feel fine')['level'] == 'none'
+    # The longest phrase wins, so "hip joint pain" is not also "joint pain"
+    assert triage.assess('hip joint pain')['symptoms'] == ['hip_joint_pain']
+    assert triage.assess('Chest pain. Chest pain!')['score'] == 7
+
+
+def test_levels_follow_thresholds():
+    triage = SeverityTriage({'a': 5, 'b': 6, 'c': 9, 'd': 1}, rules=[('a_and_d', ('a', 'd'))],
+                            high_score=15, moderate_score=10)
+    result = triage.assess_batch(['a', 'a b', 'a b c', 'a d', 'nothing', ''])
+    assert result['level'].tolist() == ['low', 'moderate', 'high', 'emergency', 'none', 'none']
+    assert result['score'].tolist() == [5, 11, 20, 6, 0, 0]
+    assert result['rules'][:, 0].tolist() == [False, False, False, True, False, False]
+
+
+def test_rules_must_name_known_symptoms():
+    with pytest.raises(ValueError):
+        SeverityTriage({'a': 1}, rules=[('missing', ('a', 'b'))])
+    with pytest.raises(ValueError):
+        SeverityTriage({f's{i}': 1 for i in range(65)}, rules=[('many', tuple(f's{i}' for i in range(65)))])
+
+
+def test_batch_matches_single_texts(triage):
+    df = pd.read_csv(os.path.join(BASE_DIR, 'symtoms_df.csv'))
+    columns = [c for c in df.columns if c.startswith('Symptom')]
+    texts = df[columns].fillna('').agg(', '.join, axis=1).tolist()[:300]
+    texts += ['chest pain, sweating', 'high fever with a stiff neck', '', 'vomiting blood']
+
+    result = triage.assess_batch(texts)
+    assert triage.records(result) == [triage.assess(text) for text in texts]
+    assert triage.records(triage.assess_batch([])) == []
+    assert np.all(result['score'] == result['presence'] @ triage.weights)
+
+
+def test_urgency_in_responses(client, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, 'CASCADE_ENABLED', False)
+    response = client.post('/api/predict', json={'symptoms': 'chest pain, shortness of breath'})
+    assert response.get_json()['urgency']['level'] == 'emergency'
+
+    response = client.post('/predict', data={'symptoms': 'chest pain, shortness of breath'})
+    assert b'can be a medical emergency' in response.data
+
+    response = client.post('/predict/batch', json={'symptoms': ['itching, skin rash', '', 'coma']})
+    rows = response.get_json()['predictions']
+    assert [row.get('urgency', {}).get('level') for row in rows] == ['low', None, 'emergency']
@@ -0,0 +1,91 @@
+"""Tests for incremental model updates (update_model.py)."""
+
+import json
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.svm import LinearSVC
+
+import update_model
+from medicine_rec_train import preprocess_series
+from model_artifact import export_model_artifact, load_model_artifact
+
+
+@pytest.fixture(scope='module')
+def symptom_rows():
+    """Training.csv one-hot rows turned into short symptom texts."""
+    df = pd.read_csv(update_model.__file__.replace('update_model.py', 'Training.csv'))
+    symptoms = df.columns[:-1]
+    rng = np.random.default_rng(0)
+    texts = []
+    for row in df[symptoms].to_numpy():
+        present = [name.replace('_', ' ').strip() for name in symptoms[row.astype(bool)]]
+        texts.append(', '.join(rng.permutation(present)[:rng.integers(2, 6)]))
+    rows = pd.DataFrame({'symptoms': texts, 'disease': preprocess_series(df['prognosis'])})
+    return rows.assign(test=rng.random(len(rows)) < 0.2)
+
+
+def _accuracy(pipeline, rows):
+    predicted = pipeline['model'].predict(pipeline['vectorizer'].transform(rows['symptoms']))
+    return float(np.mean(predicted == rows['disease'].to_numpy()))
+
+
+def test_update_adds_new_disease_and_keeps_old_accuracy(tmp_path, symptom_rows):
+    held = sorted(symptom_rows['disease'].unique())[:2]
+    train, test = symptom_rows[~symptom_rows['test']], symptom_rows[symptom_rows['test']]
+    base, new = train[~train['disease'].isin(held)], train[train['disease'].isin(held)].head(40)
+
+    vectorizer = TfidfVectorizer(stop_words='english', max_features=5000, ngram_range=(1, 2)).fit(train['symptoms'])
+    model = LinearSVC(random_state=42).fit(vectorizer.transform(base['symptoms']), base['disease'])
+    model_path, artifact_dir = tmp_path / 'model.joblib', tmp_path / 'arrays'
+    joblib.dump({'model': model, 'vectorizer': vectorizer}, model_path)
+    base.head(1500)[['symptoms', 'disease']].to_csv(tmp_path / 'replay.csv', index=False)
+    new[['symptoms', 'disease']].to_csv(tmp_path / 'new.csv', index=False)
+
+    old_test = test[~test['disease'].isin(held)]
+    before = _accuracy({'model': model, 'vectorizer': vectorizer}, old_test)
+
+    record = update_model.update_model(str(tmp_path / 'new.csv'), str(model_path), str(artifact_dir),
+                                       replay=1000, lineage_path=str(tmp_path / 'lineage.json'),
+                                       replay_sources=[str(tmp_path / 'replay.csv')])
+    assert record['new_classes'] == held and record['rows_added'] == 40
+    assert record['parent_sha256'] and record['new_rows_accuracy'] == 1.0
+
+    updated = joblib.load(model_path)
+    assert list(updated['model'].classes_) == sorted(updated['model'].classes_)
+    assert _accuracy(updated, test[test['disease'].isin(held)]) > 0.9
+    assert _accuracy(updated, old_test) >= before - 0.02
+
+    assert len(updated['lineage']) == 1 and updated['lineage'][0]['input'] == record['input']
+    assert load_model_artifact(str(artifact_dir)).meta['lineage'][0]['new_classes'] == held
+    with open(tmp_path / 'lineage.json') as f:
+        assert json.load(f)[-1]['seconds'] == record['seconds']
+
+
+def test_no_export_removes_stale_artifact(tmp_path, symptom_rows):
+    train = symptom_rows[~symptom_rows['test']].head(600)
+    vectorizer = TfidfVectorizer(stop_words='english').fit(train['symptoms'])
+    model = LinearSVC(random_state=42).fit(vectorizer.transform(train['symptoms']), train['disease'])
+    model_path, artifact_dir = tmp_path / 'model.joblib', tmp_path / 'arrays'
+    joblib.dump({'model': model, 'vectorizer': vectorizer}, model_path)
+    export_model_artifact({'model': model, 'vectorizer': vectorizer}, str(artifact_dir), source=str(model_path))
+    train.tail(20)[['symptoms', 'disease']].to_csv(tmp_path / 'new.csv', index=False)
+
+    update_model.update_model(str(tmp_path / 'new.csv'), str(model_path), str(artifact_dir), replay=0,
+                              epochs=5, export=False, lineage_path=str(tmp_path / 'lineage.json'))
+    assert len(joblib.load(model_path)['lineage']) == 1
+    assert not artifact_dir.exists()
+
+
+def test_read_labeled_rows_formats(tmp_path):
+    pd.DataFrame({'Symptoms': ['Fever [x]', None], 'Name': ['Flu', 'Cold']}).to_csv(tmp_path / 'a.csv', index=False)
+    pd.DataFrame({'Symptom_1': ['Cough'], 'Symptom_2': [None], 'Symptom_3': ['Fever'],
+                  'Diagnosis': ['Bronchitis']}).to_csv(tmp_path / 'b.csv', index=False)
+    assert update_model.read_labeled_rows(str(tmp_path / 'a.csv')).values.tolist() == [['fever', 'flu']]
+    assert update_model.read_labeled_rows(str(tmp_path / 'b.csv')).values.tolist() == [['cough, fever', 'bronchitis']]
+    pd.DataFrame({'text': ['x']}).to_csv(tmp_path / 'c.csv', index=False)
+    with pytest.raises(ValueError):
+        update_model.read_labeled_rows(str(tmp_path / 'c.csv'))
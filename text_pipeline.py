@@ -0,0 +1,136 @@
+"""
+Text normalization and tokenization shared by training and serving.
+
+``preprocess_text`` (one string) and ``normalize_series`` (a pandas column)
+apply the same precompiled patterns: lowercase, drop ``[bracketed]`` notes,
+collapse whitespace. ``medicine_rec_train.py`` cleans the training corpus with
+them and ``main.py`` cleans requests with them, so both sides always agree.
+
+``TokenEncoder`` turns one text into its finished TF-IDF row in one pass:
+clean, correct typos (optional), run the fitted vectorizer's analyzer, look
+the n-grams up in the vocabulary and apply the tf, idf and norm settings. Rows
+are memoized in a bounded ``cache.LRUCache``, so a frequent input skips every
+regex and dictionary lookup; ``transform`` then only concatenates cached rows.
+The rows equal ``vectorizer.transform`` of the cleaned text for both
+scikit-learn's ``TfidfVectorizer`` and ``inference_engine.NumpyTfidfVectorizer``.
+"""
+
+import math
+import re
+from collections import namedtuple
+
+import numpy as np
+
+from cache import LRUCache
+from inference_engine import NumpyTfidfVectorizer, SparseRows
+
+
+DEFAULT_CACHE_SIZE = 8192
+
+_BRACKETED = re.compile(r'\[.*?\]')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def preprocess_text(text):
+    """Cleans and standardizes text for modeling and prediction."""
+    if not isinstance(text, str):
+        return ""
+    text = _BRACKETED.sub('', text.lower())
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+def normalize_series(series):
+    """preprocess_text over a pandas Series; non-strings become ``""``."""
+    return (series.str.lower()
+                  .str.replace(_BRACKETED, '', regex=True)
+                  .str.replace(_WHITESPACE, ' ', regex=True)
+                  .str.strip()
+                  .fillna(''))
+
+
+# A TF-IDF row: sorted vocabulary ids, their weights, and whether typo correction changed the text
+EncodedText = namedtuple('EncodedText', ['indices', 'values', 'corrected'])
+
+
+class TokenEncoder:
+    """
+    Memoized text -> TF-IDF row encoder for a fitted word-analyzer vectorizer.
+
+    Args:
+        vectorizer: A fitted ``TfidfVectorizer`` or ``NumpyTfidfVectorizer``.
+        correct (callable, optional): Cleaned text -> text with typos corrected.
+        cache_size (int): Rows remembered; 0 disables the cache.
+    """
+
+    def __init__(self, vectorizer, correct=None, cache_size=DEFAULT_CACHE_SIZE):
+        if isinstance(vectorizer, NumpyTfidfVectorizer):
+            params = vectorizer.params
+            self._analyze = vectorizer.analyze
+            # Keeps the NumPy-only serving path free of scipy
+            self._build_matrix = SparseRows
+        else:
+            from scipy.sparse import csr_matrix
+
+            params = vectorizer.get_params()
+            self._analyze = vectorizer.build_analyzer()
+            self._build_matrix = lambda data, indices, indptr, shape: csr_matrix((data, indices, indptr), shape=shape)
+        self.vectorizer = vectorizer
+        self.vocabulary = vectorizer.vocabulary_
+        self.n_features = len(vectorizer.idf_) if hasattr(vectorizer, 'params') else len(self.vocabulary)
+        self.binary = params.get('binary', False)
+        self.sublinear_tf = params.get('sublinear_tf', False)
+        self.use_idf = params.get('use_idf', True)
+        self.idf = np.asarray(vectorizer.idf_, dtype=np.float64) if self.use_idf else None
+        self.norm = params.get('norm', 'l2')
+        if self.norm not in ('l2', 'l1', None):
+            raise ValueError(f"Unsupported norm: {self.norm!r}")
+        self.correct = correct
+        self.cache = LRUCache(maxsize=cache_size)
+
+    def _encode(self, text):
+        cleaned = preprocess_text(text)
+        corrected = self.correct(cleaned) if self.correct is not None else cleaned
+        counts = {}
+        vocabulary = self.vocabulary
+        for term in self._analyze(corrected):
+            index = vocabulary.get(term)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+
+        indices = np.fromiter(sorted(counts), dtype=np.int64, count=len(counts))
+        if self.binary:
+            values = np.ones(len(indices))
+        elif self.sublinear_tf:
+            values = np.array([1.0 + math.log(counts[i]) for i in indices.tolist()])
+        else:
+            values = np.array([float(counts[i]) for i in indices.tolist()])
+        if self.idf is not None and len(values):
+            values *= self.idf[indices]
+        if self.norm is not None and len(values):
+            total = np.sqrt(np.dot(values, values)) if self.norm == 'l2' else np.abs(values).sum()
+            if total:
+                values /= total
+        return EncodedText(indices, values, corrected != cleaned)
+
+    def encode(self, text):
+        """The TF-IDF row of a raw or cleaned text, from the cache when possible."""
+        row = self.cache.get(text)
+        if row is None:
+            row = self._encode(text)
+            self.cache.set(text, row)
+        return row
+
+    def matrix(self, rows):
+        """Stack encoded rows into the matrix ``vectorizer.transform`` would return."""
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(row.indices) for row in rows], out=indptr[1:])
+        if rows:
+            indices = np.concatenate([row.indices for row in rows])
+            data = np.concatenate([row.values for row in rows])
+        else:
+            indices, data = np.zeros(0, dtype=np.int64), np.zeros(0)
+        return self._build_matrix(data, indices, indptr, (len(rows), self.n_features))
+
+    def transform(self, texts):
+        """TF-IDF matrix of many texts, one row each."""
+        return self.matrix([self.encode(text) for text in texts])
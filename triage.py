@@ -0,0 +1,187 @@
+"""
+Severity scoring and urgency triage from ``Symptom-severity.csv``.
+
+Every symptom of the severity table is a column. Symptom phrases (and a few
+common synonyms) are found with one precompiled alternation, longest phrase
+first, so "hip joint pain" is not also counted as "joint pain". For a batch,
+the cleaning, matching and phrase -> column lookup are pandas string
+operations over the whole column, giving a sparse (n_texts, n_symptoms)
+presence matrix; the severity score of every text is that matrix times the
+weight vector.
+
+Urgent combinations are rules such as "chest pain and breathlessness". The
+symptoms named by any rule get one bit each, so each text reduces to a
+``uint64`` bitmask and each rule to a precomputed mask; a rule fires for every
+row where ``row_mask & rule_mask == rule_mask``, which NumPy evaluates for the
+whole batch at once.
+
+The urgency level is ``emergency`` when any rule fires, otherwise ``high``,
+``moderate`` or ``low`` by score, and ``none`` when no known symptom was found.
+This is a triage aid for the web page, not a diagnosis.
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+
+SEVERITY_FILE = 'Symptom-severity.csv'
+
+LEVELS = ('none', 'low', 'moderate', 'high', 'emergency')
+DEFAULT_HIGH_SCORE = 20
+DEFAULT_MODERATE_SCORE = 10
+
+# (rule name, symptoms that must all be present)
+URGENT_RULES = (
+    ('chest_pain_with_breathlessness', ('chest_pain', 'breathlessness')),
+    ('chest_pain_with_sweating', ('chest_pain', 'sweating')),
+    ('chest_pain_with_fast_heart_rate', ('chest_pain', 'fast_heart_rate')),
+    ('stroke_signs', ('weakness_of_one_body_side', 'slurred_speech')),
+    ('fever_with_stiff_neck', ('high_fever', 'stiff_neck')),
+    ('severe_dehydration', ('vomiting', 'diarrhoea', 'sunken_eyes')),
+    ('coma', ('coma',)),
+    ('stomach_bleeding', ('stomach_bleeding',)),
+    ('blood_in_sputum', ('blood_in_sputum',)),
+    ('acute_liver_failure', ('acute_liver_failure',)),
+)
+
+# Everyday phrasings of symptoms the rules depend on
+SYNONYMS = {
+    'shortness of breath': 'breathlessness',
+    'short of breath': 'breathlessness',
+    'difficulty breathing': 'breathlessness',
+    'chest pains': 'chest_pain',
+    'chest tightness': 'chest_pain',
+    'racing heart': 'fast_heart_rate',
+    'rapid heartbeat': 'fast_heart_rate',
+    'vomiting blood': 'stomach_bleeding',
+    'coughing blood': 'blood_in_sputum',
+    'unconscious': 'coma',
+}
+
+_SEPARATORS = re.compile(r'[\W_]+')
+
+
+def symptom_phrase(text):
+    """``'Toxic_look_(typhos)'`` -> ``'toxic look typhos'``; texts are cleaned the same way before matching."""
+    return _SEPARATORS.sub(' ', str(text).lower()).strip()
+
+
+class SeverityTriage:
+    """
+    Vectorized severity scores and urgency rules.
+
+    Args:
+        weights (dict): Symptom ID -> severity weight; the largest weight wins for duplicates.
+        rules (iterable): (name, symptom IDs) pairs; a rule fires when all are present.
+        synonyms (dict): Extra phrase -> symptom ID.
+        high_score, moderate_score (int): Score thresholds of the ``high`` and ``moderate`` levels.
+
+    Raises:
+        ValueError: If a rule names an unknown symptom or the rules use more than 64 symptoms.
+    """
+
+    def __init__(self, weights, rules=URGENT_RULES, synonyms=None, high_score=DEFAULT_HIGH_SCORE,
+                 moderate_score=DEFAULT_MODERATE_SCORE):
+        self.symptoms = sorted(weights)
+        columns = {symptom: i for i, symptom in enumerate(self.symptoms)}
+        self.weights = np.array([weights[symptom] for symptom in self.symptoms], dtype=np.float64)
+        self.high_score = high_score
+        self.moderate_score = moderate_score
+
+        # phrase -> column; a symptom whose phrase repeats (e.g. fluid_overload) keeps one column
+        phrases = {}
+        for symptom in self.symptoms:
+            phrases.setdefault(symptom_phrase(symptom), columns[symptom])
+        for phrase, symptom in (SYNONYMS if synonyms is None else synonyms).items():
+            if symptom in columns:
+                phrases.setdefault(symptom_phrase(phrase), columns[symptom])
+        self._columns = phrases
+        self._pattern = re.compile(
+            r'\b(?:' + '|'.join(re.escape(p) for p in sorted(phrases, key=lambda p: (-len(p), p))) + r')\b')
+
+        self.rule_names = [name for name, _ in rules]
+        rule_symptoms = sorted({symptom for _, required in rules for symptom in required})
+        unknown = [symptom for symptom in rule_symptoms if symptom not in columns]
+        if unknown:
+            raise ValueError(f"Rules use unknown symptoms: {', '.join(unknown)}")
+        if len(rule_symptoms) > 64:
+            raise ValueError("Rules may use at most 64 distinct symptoms")
+        bits = {symptom: np.uint64(1) << np.uint64(i) for i, symptom in enumerate(rule_symptoms)}
+        # Bit of each symptom column, 0 for symptoms no rule uses
+        self._column_bits = np.zeros(len(self.symptoms), dtype=np.uint64)
+        for symptom, bit in bits.items():
+            self._column_bits[columns[symptom]] = bit
+        self._rule_masks = np.array([np.bitwise_or.reduce([bits[s] for s in required]) for _, required in rules],
+                                    dtype=np.uint64)
+
+    @classmethod
+    def from_csv(cls, path=SEVERITY_FILE, **kwargs):
+        df = pd.read_csv(path).dropna(subset=['Symptom', 'weight'])
+        weights = {}
+        for symptom, weight in zip(df['Symptom'], df['weight']):
+            symptom = str(symptom).strip()
+            if symptom and symptom != 'prognosis':
+                weights[symptom] = max(weights.get(symptom, 0), int(weight))
+        return cls(weights, **kwargs)
+
+    def _matrix(self, rows, columns, n_texts):
+        # One entry per distinct (row, column), in CSR order
+        keys = np.unique(rows * len(self.symptoms) + columns)
+        rows, columns = np.divmod(keys, len(self.symptoms))
+        indptr = np.zeros(n_texts + 1, dtype=np.intp)
+        np.cumsum(np.bincount(rows, minlength=n_texts), out=indptr[1:])
+        return sparse.csr_matrix((np.ones(len(keys)), columns, indptr), shape=(n_texts, len(self.symptoms)))
+
+    def presence(self, texts):
+        """Sparse (n_texts, n_symptoms) 0/1 matrix of the symptoms mentioned in each text."""
+        cleaned = pd.Series(texts, dtype=object).fillna('').astype(str).str.lower().str.replace(
+            _SEPARATORS, ' ', regex=True)
+        matches = cleaned.str.findall(self._pattern).explode().dropna()
+        columns = matches.map(self._columns)
+        return self._matrix(np.asarray(matches.index, dtype=np.intp), columns.to_numpy(dtype=np.intp), len(cleaned))
+
+    def _presence_one(self, text):
+        columns = [self._columns[phrase] for phrase in self._pattern.findall(symptom_phrase(text))]
+        return self._matrix(np.zeros(len(columns), dtype=np.intp), np.asarray(columns, dtype=np.intp), 1)
+
+    def assess_batch(self, texts):
+        """
+        Score and triage many texts at once.
+
+        Returns:
+            dict: ``score`` (float array), ``level`` (array of ``LEVELS`` names),
+            ``rules`` ((n_texts, n_rules) bool array) and ``presence`` (sparse matrix).
+        """
+        return self._triage(self.presence(texts))
+
+    def _triage(self, present):
+        score = present @ self.weights
+        masks = np.zeros(present.shape[0], dtype=np.uint64)
+        np.bitwise_or.at(masks, np.repeat(np.arange(present.shape[0]), np.diff(present.indptr)),
+                         self._column_bits[present.indices])
+        fired = (masks[:, None] & self._rule_masks[None, :]) == self._rule_masks[None, :]
+        level = np.select(
+            [fired.any(axis=1), score >= self.high_score, score >= self.moderate_score, score > 0],
+            ['emergency', 'high', 'moderate', 'low'], default='none').astype(object)
+        return {'score': score, 'level': level, 'rules': fired, 'presence': present}
+
+    def records(self, result):
+        """The rows of an ``assess_batch`` result as JSON-serializable dicts."""
+        present = result['presence']
+        symptoms = np.asarray(self.symptoms, dtype=object)
+        rule_names = np.asarray(self.rule_names, dtype=object)
+        rows, rules = np.nonzero(result['rules'])
+        fired = np.split(rule_names[rules], np.searchsorted(rows, np.arange(1, len(result['level']))))
+        return [
+            {'level': level, 'score': int(score), 'symptoms': symptoms[present.indices[start:end]].tolist(),
+             'rules': names.tolist()}
+            for level, score, start, end, names in zip(result['level'], result['score'], present.indptr[:-1],
+                                                       present.indptr[1:], fired)
+        ]
+
+    def assess(self, text):
+        """Urgency of one text: ``{'level', 'score', 'symptoms', 'rules'}``."""
+        return self.records(self._triage(self._presence_one(text)))[0]
@@ -0,0 +1,236 @@
+"""
+Incremental model updates from newly labeled rows, without full retraining.
+
+    python update_model.py new_rows.csv [--replay 2000] [--anchor 0.1] [--epochs 100]
+
+The new rows are vectorized with the saved (fixed) vocabulary and the
+one-vs-rest linear weights are refined by full-batch gradient descent on the
+LinearSVC objective (squared hinge) with the L2 penalty centred on the
+current weights instead of on zero:
+
+    anchor / 2 * ||W - W_saved||^2  +  weighted mean squared-hinge loss
+
+so classes untouched by the update barely move. Diseases not seen before get
+a new weight row (starting from zero). A replay sample of the original
+training CSVs is mixed in, carrying half of the loss, so new classes also
+learn what they are not and old classes keep their accuracy.
+
+``disease_model.joblib`` and the memory-mapped artifact are replaced
+atomically. Every update appends a lineage record (parent model hash, input
+file hashes, row and class counts, settings) to ``pipeline['lineage']``, to
+the artifact metadata and to ``model_lineage.json``.
+
+Accepted input columns: ``symptoms``/``disease``, ``Symptoms``/``Name``
+(Diseases_Symptoms.csv) or ``Symptom_1..3``/``Diagnosis`` (disease_diagnosis.csv).
+"""
+
+import argparse
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from medicine_rec_train import join_symptom_columns, preprocess_series
+from model_artifact import (export_model_artifact, file_sha256, load_model_artifact, remove_model_artifact,
+                            to_sklearn_pipeline)
+
+
+DEFAULT_MODEL_PATH = 'disease_model.joblib'
+DEFAULT_ARTIFACT_DIR = 'disease_model_arrays'
+LINEAGE_FILE = 'model_lineage.json'
+REPLAY_SOURCES = ('Diseases_Symptoms.csv', 'disease_diagnosis.csv')
+
+
+def read_labeled_rows(path):
+    """
+    Read new rows in any of the supported layouts as cleaned (symptoms, disease).
+
+    Raises:
+        ValueError: If the file has none of the supported column layouts.
+    """
+    df = pd.read_csv(path)
+    if {'symptoms', 'disease'} <= set(df.columns):
+        rows = df[['symptoms', 'disease']]
+    elif {'Symptoms', 'Name'} <= set(df.columns):
+        rows = df[['Symptoms', 'Name']].rename(columns={'Symptoms': 'symptoms', 'Name': 'disease'})
+    elif 'Diagnosis' in df.columns and 'Symptom_1' in df.columns:
+        columns = [c for c in ('Symptom_1', 'Symptom_2', 'Symptom_3') if c in df.columns]
+        rows = pd.DataFrame({'symptoms': join_symptom_columns(df, columns), 'disease': df['Diagnosis']})
+    else:
+        raise ValueError(f"{path}: expected symptoms/disease, Symptoms/Name or Symptom_1../Diagnosis columns")
+
+    rows = rows.dropna()
+    rows = rows.assign(symptoms=preprocess_series(rows['symptoms']), disease=preprocess_series(rows['disease']))
+    return rows[(rows['symptoms'] != '') & (rows['disease'] != '')].reset_index(drop=True)
+
+
+def sample_replay_rows(n, classes, sources=REPLAY_SOURCES, seed=0):
+    """Up to ``n`` rows of the original training CSVs whose disease the model already knows."""
+    frames = [read_labeled_rows(path) for path in sources if os.path.exists(path)]
+    if not frames or n <= 0:
+        return pd.DataFrame(columns=['symptoms', 'disease'])
+    rows = pd.concat(frames, ignore_index=True)
+    rows = rows[rows['disease'].isin(set(classes))]
+    return rows.sample(n=min(n, len(rows)), random_state=seed)
+
+
+def load_pipeline(model_path=DEFAULT_MODEL_PATH, artifact_dir=DEFAULT_ARTIFACT_DIR):
+    """The saved pipeline, from the joblib file or else from the artifact."""
+    if os.path.exists(model_path):
+        return joblib.load(model_path)
+    return to_sklearn_pipeline(load_model_artifact(artifact_dir, mmap_mode=None))
+
+
+def _squared_hinge_step(W, b, W_anchor, b_anchor, X, targets, weights, anchor, step):
+    """One gradient step of the anchored one-vs-rest squared-hinge objective."""
+    scores = X @ W.T + b
+    slack = np.maximum(0.0, 1.0 - targets * scores)
+    # d/ds of the weighted mean of slack^2, per sample and class
+    dscores = -2.0 * targets * slack * weights[:, None]
+    grad_W = (X.T @ dscores).T + anchor * (W - W_anchor)
+    grad_b = dscores.sum(axis=0) + anchor * (b - b_anchor)
+    W -= step * grad_W
+    b -= step * grad_b
+    return float(weights @ (slack ** 2).sum(axis=1))
+
+
+def update_weights(coef, intercept, classes, X, labels, anchor=0.1, epochs=100, sample_weight=None):
+    """
+    Refine linear one-vs-rest weights on new rows.
+
+    Args:
+        coef (array): (n_classes, n_features) current weights.
+        classes (array): Current class labels; labels not in it become new classes.
+        X (sparse matrix): TF-IDF rows of the new (and replay) samples.
+        labels (array): Their disease labels.
+        anchor (float): Strength of the pull towards the current weights.
+        sample_weight (array, optional): Relative weight of each row.
+
+    Returns:
+        tuple: (coef, intercept, classes) with classes sorted like sklearn's.
+    """
+    classes = np.asarray(classes, dtype=object)
+    new_classes = sorted(set(labels) - set(classes))
+    all_classes = np.array(sorted(list(classes) + new_classes), dtype=object)
+    position = {label: i for i, label in enumerate(all_classes)}
+
+    # Old rows move to their sorted position; new classes start at zero
+    W = np.zeros((len(all_classes), coef.shape[1]), dtype=np.float64)
+    b = np.zeros(len(all_classes), dtype=np.float64)
+    old_rows = np.array([position[label] for label in classes])
+    W[old_rows] = coef
+    b[old_rows] = intercept
+    W_anchor, b_anchor = W.copy(), b.copy()
+
+    weights = np.ones(X.shape[0]) if sample_weight is None else np.asarray(sample_weight, dtype=np.float64)
+    weights = weights / weights.sum()
+    targets = -np.ones((X.shape[0], len(all_classes)))
+    targets[np.arange(X.shape[0]), [position[label] for label in labels]] = 1.0
+
+    # 1 / Lipschitz constant: rows are L2-normalized, so with the bias ||[x, 1]||^2 = 2 and the loss is 4-smooth
+    step = 1.0 / (anchor + 4.0)
+    for _ in range(epochs):
+        _squared_hinge_step(W, b, W_anchor, b_anchor, X, targets, weights, anchor, step)
+    return W, b, all_classes
+
+
+def _save_pipeline(pipeline, model_path):
+    tmp_path = f'{model_path}.{os.getpid()}.tmp'
+    joblib.dump(pipeline, tmp_path)
+    os.replace(tmp_path, model_path)
+
+
+def append_lineage(record, path=LINEAGE_FILE):
+    history = []
+    if os.path.exists(path):
+        with open(path) as f:
+            history = json.load(f)
+    history.append(record)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def update_model(new_rows_path, model_path=DEFAULT_MODEL_PATH, artifact_dir=DEFAULT_ARTIFACT_DIR,
+                 replay=2000, anchor=0.1, epochs=100, export=True, lineage_path=LINEAGE_FILE,
+                 replay_sources=REPLAY_SOURCES):
+    """
+    Apply newly labeled rows to the saved model.
+
+    Returns:
+        dict: The lineage record of this update.
+    """
+    start = time.perf_counter()
+    parent_hash = file_sha256(model_path) if os.path.exists(model_path) else None
+    pipeline = load_pipeline(model_path, artifact_dir)
+    vectorizer, model = pipeline['vectorizer'], pipeline['model']
+    if not hasattr(model, 'coef_') or len(model.classes_) < 3:
+        raise ValueError("Incremental updates need a multi-class linear model with coef_.")
+
+    new_rows = read_labeled_rows(new_rows_path)
+    if new_rows.empty:
+        raise ValueError(f"{new_rows_path} has no usable labeled rows.")
+    replay_rows = sample_replay_rows(replay, model.classes_, replay_sources)
+    rows = pd.concat([new_rows, replay_rows], ignore_index=True)
+
+    # New rows and the replay sample each carry half of the loss
+    weights = np.ones(len(rows))
+    if len(replay_rows):
+        weights[len(new_rows):] = len(new_rows) / len(replay_rows)
+
+    X = vectorizer.transform(rows['symptoms'])
+    coef, intercept, classes = update_weights(np.asarray(model.coef_), np.asarray(model.intercept_),
+                                              model.classes_, X, rows['disease'].to_numpy(), anchor, epochs,
+                                              sample_weight=weights)
+    new_classes = sorted(set(classes) - set(model.classes_))
+    model.coef_, model.intercept_, model.classes_ = coef, intercept, classes
+    if hasattr(model, 'n_features_in_'):
+        model.n_features_in_ = coef.shape[1]
+
+    X_new = vectorizer.transform(new_rows['symptoms'])
+    record = {
+        'type': 'incremental',
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'parent_sha256': parent_hash,
+        'input': {'path': os.path.abspath(new_rows_path), 'sha256': file_sha256(new_rows_path)},
+        'rows_added': len(new_rows),
+        'replay_rows': len(replay_rows),
+        'new_classes': new_classes,
+        'n_classes': len(classes),
+        'anchor': anchor,
+        'epochs': epochs,
+        'new_rows_accuracy': round(float(np.mean(model.predict(X_new) == new_rows['disease'].to_numpy())), 4),
+    }
+    pipeline['lineage'] = list(pipeline.get('lineage', [])) + [record]
+
+    _save_pipeline(pipeline, model_path)
+    if export:
+        export_model_artifact(pipeline, artifact_dir, source=model_path)
+    else:
+        # The old arrays no longer match the joblib and must not be served
+        remove_model_artifact(artifact_dir)
+    record['seconds'] = round(time.perf_counter() - start, 3)
+    append_lineage(record, lineage_path)
+    return record
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('new_rows', help="CSV of newly labeled rows.")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH)
+    parser.add_argument('--artifact-dir', default=DEFAULT_ARTIFACT_DIR)
+    parser.add_argument('--replay', type=int, default=2000,
+                        help="Rows of the original training CSVs mixed into the update (0 to disable).")
+    parser.add_argument('--anchor', type=float, default=0.1,
+                        help="Pull towards the current weights; higher keeps the old model more intact.")
+    parser.add_argument('--epochs', type=int, default=100, help="Gradient steps over the update batch.")
+    parser.add_argument('--no-export', action='store_true', help="Only update the joblib file; the now stale artifact is removed.")
+    args = parser.parse_args()
+
+    record = update_model(args.new_rows, args.model, args.artifact_dir, replay=args.replay,
+                          anchor=args.anchor, epochs=args.epochs, export=not args.no_export)
+    print(json.dumps(record, indent=2))